@@ -0,0 +1,727 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Decoded, read-only copy of the yang-catalog data kept in the memory
+of the API process. A snapshot is built once every time the cache is
+loaded from confd and it is never modified afterwards. New data
+results in a new snapshot with a higher generation which is then
+swapped in place of the old one, so readers can simply keep a
+reference to the snapshot they started with without any locking.
+If only a few modules or vendors changed, the new snapshot is patched
+from the old one and shares all the unchanged modules with it.
+
+Nothing that is handed out by the snapshot may be modified by the
+caller. If an endpoint needs to change a module before sending it
+back it has to make a copy of it first.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import collections
+import hashlib
+import json
+import sys
+import zlib
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# leafs of the module that can be searched for using /search/<key>/<value>
+SEARCH_KEYS = ['ietf/ietf-wg', 'maturity-level', 'document-name', 'author-email', 'compilation-status',
+               'namespace', 'conformance-type', 'module-type', 'organization', 'yang-version', 'name',
+               'revision', 'tree-type', 'belongs-to', 'generated-from', 'expires', 'expired', 'prefix',
+               'reference']
+# lists of the module indexed by name of the item. Index of dependencies
+# is the reverse dependency index - name of the module to its dependents
+LIST_KEYS = ['dependencies', 'dependents', 'submodule']
+# leafs of the implementation indexed by their value
+IMPLEMENTATION_KEYS = ['vendor', 'platform', 'software-version']
+
+MODULE_RESPONSE_PREFIX = b'{"module": ['
+MODULE_RESPONSE_SUFFIX = b']}'
+# size of the pieces in which big responses are sent
+CHUNK_SIZE = 64000
+# content codings of precompressed responses in order of preference.
+# brotli is used only if the optional brotli package is installed
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+# brotli quality and gzip level of the compressed responses. Highest levels
+# are many times slower on the whole catalog for only a few percent smaller body
+COMPRESS_LEVELS = {'br': 5, 'gzip': 6}
+# levels used for bodies that are compressed again on every patch
+FAST_COMPRESS_LEVELS = {'br': 1, 'gzip': 1}
+# encoding of the decoded catalog saved in snapshot file. msgpack is used
+# only if the optional msgpack package is installed
+CATALOG_ENCODING = 'msgpack' if msgpack is not None else 'json'
+# leafs whose values repeat in many modules. Their values are interned
+# while decoding so all the modules share one copy of every value
+INTERNED_KEYS = frozenset(['name', 'revision', 'organization', 'namespace', 'vendor', 'platform',
+                           'software-version', 'software-flavor', 'os-version', 'feature-set', 'os-type',
+                           'conformance-type', 'compilation-status', 'maturity-level', 'module-type',
+                           'yang-version', 'tree-type', 'ietf-wg', 'schema'])
+# organizations that are not listed among contributors
+HIDDEN_ORGANIZATIONS = ['example', 'missing element']
+
+
+def module_signature(name, revision, organization):
+    """Create key that is used to identify module in snapshot
+            Arguments:
+                :param name: (str) name of the module
+                :param revision: (str) revision of the module
+                :param organization: (str) organization of the module
+                :return key in format <name>@<revision>/<organization>
+    """
+    return '{}@{}/{}'.format(name, revision, organization)
+
+
+class CatalogSnapshot(object):
+
+    def __init__(self, generation, data, compress=False, previous=None, stored=None):
+        """Decode catalog data downloaded from confd.
+                Arguments:
+                    :param generation: (int) number of the cache load this
+                        snapshot was created from
+                    :param data: (str) text of the whole catalog as it is
+                        returned by confd or (dict) already decoded catalog
+                    :param compress: (bool) whether to create also compressed
+                        variants of the responses in all the ENCODINGS
+                    :param previous: (CatalogSnapshot) snapshot that shares
+                        modules with this one. Serialized and compressed forms
+                        of the shared modules are taken over from it
+                    :param stored: (SnapshotFile) snapshot file to read the
+                        catalog from. Serialized and compressed forms are not
+                        created but they are slices of the file instead
+        """
+        self.generation = generation
+        # second precision since it is sent in Last-Modified header
+        self.created = datetime.utcnow().replace(microsecond=0)
+        # id of the snapshot file this snapshot was read from
+        self.file_id = None
+        if stored is not None:
+            self.file_id = stored.file_id
+            self.created = stored.created
+            self.etag = stored.etag
+            self.catalog = stored.catalog()
+        elif isinstance(data, str):
+            # same data give the same ETag even if loaded by another process
+            self.etag = hashlib.sha1(data.encode('utf-8')).hexdigest()
+            self.catalog = decode_catalog(data)
+        else:
+            self.etag = None
+            self.catalog = data
+        catalog = self.catalog.get('yang-catalog:catalog', {})
+        self.modules = catalog.get('modules', {})
+        self.vendors = catalog.get('vendors', {})
+        self.module_list = self.modules.get('module', [])
+
+        self.signatures = []
+        self.module_position = {}
+        self.modules_by_signature = {}
+        # name of the module to signature of its latest revision
+        self.latest_revision = {}
+        # <name>@<revision> to signature of the first such module in catalog
+        self.name_revision = {}
+        if stored is not None:
+            self.encodings = stored.encodings
+        else:
+            self.encodings = ENCODINGS if compress else []
+        self.module_response = {}
+        self.module_compressed = dict((encoding, {}) for encoding in self.encodings)
+        self.search_index = dict((key, {}) for key in SEARCH_KEYS)
+        self.list_index = dict((key, {}) for key in LIST_KEYS)
+        self.implementation_index = dict((key, {}) for key in IMPLEMENTATION_KEYS)
+        organizations = set()
+        for module in self.module_list:
+            signature = module_signature(module['name'], module['revision'],
+                                         module['organization'])
+            self.module_position[signature] = len(self.signatures)
+            self.signatures.append(signature)
+            self.modules_by_signature[signature] = module
+            self.name_revision.setdefault('{}@{}'.format(module['name'], module['revision']), signature)
+            latest = self.latest_revision.get(module['name'])
+            if latest is None or module['revision'] > self.modules_by_signature[latest]['revision']:
+                self.latest_revision[module['name']] = signature
+            if module['organization'] not in HIDDEN_ORGANIZATIONS:
+                organizations.add(module['organization'])
+            if stored is not None:
+                self.module_response[signature] = stored.module_response(signature)
+            elif previous is not None and previous.modules_by_signature.get(signature) is module:
+                # module did not change so it does not need to be encoded again
+                self.module_response[signature] = previous.module_response[signature]
+                for encoding in self.encodings:
+                    if signature in previous.module_compressed.get(encoding, {}):
+                        self.module_compressed[encoding][signature] = previous.module_compressed[encoding][signature]
+            else:
+                self.module_response[signature] = MODULE_RESPONSE_PREFIX + \
+                    json.dumps(module).encode('utf-8') + MODULE_RESPONSE_SUFFIX
+        if previous is not None and stored is None:
+            self.__patch_indexes(previous)
+        else:
+            indexes = self.__indexes()
+            for signature in self.signatures:
+                for name, key, value in module_index_values(self.modules_by_signature[signature]):
+                    indexes[name][key].setdefault(value, []).append(signature)
+
+        # signature to list of (name, revision, resolved signature) of its
+        # dependencies and signature to signatures of modules depending on it
+        self.dependency_graph = {}
+        self.dependents_graph = dict((signature, []) for signature in self.signatures)
+        for signature in self.signatures:
+            edges = []
+            for dependency in self.modules_by_signature[signature].get('dependencies', []):
+                name = dependency.get('name')
+                revision = dependency.get('revision')
+                resolved = self.resolve_dependency(name, revision)
+                edges.append((name, revision, resolved))
+                if resolved is not None:
+                    self.dependents_graph[resolved].append(signature)
+            self.dependency_graph[signature] = edges
+        self.latest_signatures = sorted(self.latest_revision.values(),
+                                        key=lambda sig: self.modules_by_signature[sig]['name'])
+        # vendors did not change so nothing derived from them needs to be created again
+        same_vendors = previous is not None and previous.vendors is self.vendors \
+            and previous.encodings == self.encodings
+        if stored is not None:
+            self.vendors_json = stored.vendors_json()
+        elif same_vendors:
+            self.vendors_json = previous.vendors_json
+        else:
+            self.vendors_json = json.dumps(self.vendors).encode('utf-8')
+        # responses of /contributors and /search/vendor/<org> change only with the snapshot
+        self.contributors_json = json.dumps({'contributors': sorted(organizations)}).encode('utf-8')
+        if same_vendors:
+            self.vendor_statistics = previous.vendor_statistics
+        else:
+            self.vendor_statistics = dict((vendor['name'], json.dumps(vendor_statistics(vendor)).encode('utf-8'))
+                                          for vendor in self.vendors.get('vendor', []))
+        self.modules_length = sum([len(piece) for piece in self.modules_body()])
+        self.catalog_length = sum([len(piece) for piece in self.catalog_body()])
+        self.modules_compressed = {}
+        self.vendors_compressed = {}
+        self.catalog_compressed = {}
+        # patched snapshot is replaced by the next patch or load soon, so it is
+        # compressed fast
+        levels = FAST_COMPRESS_LEVELS if previous is not None else COMPRESS_LEVELS
+        for encoding in self.encodings:
+            if stored is not None:
+                self.modules_compressed[encoding] = stored.compressed('modules', encoding)
+                self.vendors_compressed[encoding] = stored.compressed('vendors', encoding)
+                self.catalog_compressed[encoding] = stored.compressed('catalog', encoding)
+            else:
+                self.modules_compressed[encoding] = compress_body(self.modules_body(), encoding, levels)
+                if same_vendors:
+                    self.vendors_compressed[encoding] = previous.vendors_compressed[encoding]
+                else:
+                    self.vendors_compressed[encoding] = compress_body(self.vendors_body(), encoding, levels)
+                self.catalog_compressed[encoding] = compress_body(self.catalog_body(), encoding, levels)
+        if self.etag is None:
+            etag = hashlib.sha1()
+            for piece in self.catalog_body():
+                etag.update(piece)
+            self.etag = etag.hexdigest()
+
+    def __indexes(self):
+        return {'search_index': self.search_index, 'list_index': self.list_index,
+                'implementation_index': self.implementation_index}
+
+    def __patch_indexes(self, previous):
+        """Create indexes out of the indexes of the previous snapshot. Only
+        the lists of signatures under values of added, changed or deleted
+        modules are created again, all the other lists are shared.
+                Arguments:
+                    :param previous: (CatalogSnapshot) snapshot this one
+                        was patched from
+        """
+        indexes = self.__indexes()
+        for name, index in previous.__indexes().items():
+            for key, values in index.items():
+                indexes[name][key] = dict(values)
+        changed = set([signature for signature in self.signatures
+                       if previous.modules_by_signature.get(signature) is not self.modules_by_signature[signature]])
+        removed = changed.union(set(previous.signatures).difference(self.signatures))
+        touched = set()
+        for signature in removed:
+            if signature in previous.modules_by_signature:
+                touched.update(module_index_values(previous.modules_by_signature[signature]))
+        added = {}
+        for signature in changed:
+            for entry in module_index_values(self.modules_by_signature[signature]):
+                touched.add(entry)
+                added.setdefault(entry, []).append(signature)
+        for entry in touched:
+            name, key, value = entry
+            index = indexes[name][key]
+            signatures = [signature for signature in index.get(value, []) if signature not in removed]
+            signatures.extend(added.get(entry, []))
+            if len(signatures) > 0:
+                index[value] = sorted(signatures, key=self.module_position.get)
+            else:
+                index.pop(value, None)
+
+    def patch(self, generation, modules=(), deleted_modules=(), vendors=(), deleted_vendors=()):
+        """Create new snapshot in which only some modules and vendors are
+        changed. Modules that did not change are shared by both snapshots
+        so only the changed modules are serialized and indexed again.
+                Arguments:
+                    :param generation: (int) generation of the new snapshot
+                    :param modules: (list) new or changed modules as they are
+                        returned by confd
+                    :param deleted_modules: (list) signatures of deleted modules
+                    :param vendors: (list) new or changed vendors as they are
+                        returned by confd
+                    :param deleted_vendors: (list) names of deleted vendors
+                    :return CatalogSnapshot
+        """
+        changed = collections.OrderedDict()
+        for module in modules:
+            changed[module_signature(module['name'], module['revision'], module['organization'])] = module
+        deleted = set(deleted_modules)
+        module_list = []
+        for signature, module in zip(self.signatures, self.module_list):
+            if signature not in deleted:
+                module_list.append(changed.pop(signature, module))
+        module_list.extend(changed.values())
+
+        changed = collections.OrderedDict((vendor['name'], vendor) for vendor in vendors)
+        deleted = set(deleted_vendors)
+        vendor_list = []
+        for vendor in self.vendors.get('vendor', []):
+            if vendor['name'] not in deleted:
+                vendor_list.append(changed.pop(vendor['name'], vendor))
+        vendor_list.extend(changed.values())
+
+        catalog = collections.OrderedDict(self.catalog.get('yang-catalog:catalog', {}))
+        if len(module_list) > 0 or 'modules' in catalog:
+            catalog['modules'] = collections.OrderedDict(self.modules)
+            catalog['modules']['module'] = module_list
+        if (len(vendors) > 0 or len(deleted_vendors) > 0) and (len(vendor_list) > 0 or 'vendors' in catalog):
+            catalog['vendors'] = collections.OrderedDict(self.vendors)
+            catalog['vendors']['vendor'] = vendor_list
+        data = collections.OrderedDict([('yang-catalog:catalog', catalog)])
+        return CatalogSnapshot(generation, data, len(self.encodings) > 0, previous=self)
+
+    def get_module(self, name, revision, organization):
+        """Get one module from snapshot
+                Arguments:
+                    :param name: (str) name of the module
+                    :param revision: (str) revision of the module
+                    :param organization: (str) organization of the module
+                    :return module or None if it does not exist
+        """
+        return self.modules_by_signature.get(
+            module_signature(name, revision, organization))
+
+    def find_modules(self, signatures):
+        """Get many modules from snapshot at once
+                Arguments:
+                    :param signatures: (iterable) signatures of the modules
+                    :return ordered dictionary of signature to module with
+                        all the modules that exist in the given order
+        """
+        found = collections.OrderedDict()
+        for signature in signatures:
+            module = self.modules_by_signature.get(signature)
+            if module is not None:
+                found[signature] = module
+        return found
+
+    def search(self, key, value):
+        """Find all the modules that contain value on the path defined by key
+                Arguments:
+                    :param key: (str) one of the SEARCH_KEYS
+                    :param value: (str) value searched for
+                    :return list of signatures of modules that were found in
+                        the same order as they are in the catalog
+        """
+        return self.search_index[key].get(value, [])
+
+    def lookup(self, index, value, partial=False):
+        """Find modules in one of the indexes of this snapshot
+                Arguments:
+                    :param index: (dict) index that maps value to signatures
+                    :param value: (str) value searched for
+                    :param partial: (bool) whether value is only a part of the
+                        indexed value
+                    :return list of signatures in the same order as they are
+                        in the catalog
+        """
+        if not partial:
+            return index.get(value, [])
+        found = set()
+        for key, signatures in index.items():
+            if isinstance(key, str) and value in key:
+                found.update(signatures)
+        return sorted(found, key=self.module_position.get)
+
+    def resolve_dependency(self, name, revision=None):
+        """Find module that is imported or included. If the revision is not
+        given the latest revision of the module is used.
+                Arguments:
+                    :param name: (str) name of the module
+                    :param revision: (str) revision of the module or None
+                    :return signature of the module or None if it is not in catalog
+        """
+        if revision:
+            return self.name_revision.get('{}@{}'.format(name, revision))
+        return self.latest_revision.get(name)
+
+    def dependency_closure(self, signatures, names=None):
+        """Find all the modules that the given modules import or include
+        transitively. Only one revision of every module name is taken, the one
+        that was reached first.
+                Arguments:
+                    :param signatures: (list) signatures of the modules to start with
+                    :param names: (set) names of modules that are already resolved
+                        and should be skipped. Names of all the modules that
+                        are found are added to it
+                    :return tuple of list of signatures of the modules in the order
+                        they were reached, including the starting modules, and list
+                        of dependencies (name and revision) that are not in catalog
+        """
+        if names is None:
+            names = set()
+        closure = []
+        missing = []
+        for signature in signatures:
+            if signature not in self.dependency_graph:
+                continue
+            name = self.modules_by_signature[signature]['name']
+            if name in names:
+                continue
+            names.add(name)
+            closure.append(signature)
+            stack = [iter(self.dependency_graph[signature])]
+            while len(stack) > 0:
+                for name, revision, resolved in stack[-1]:
+                    if name in names:
+                        continue
+                    if resolved is None:
+                        dependency = {'name': name, 'revision': revision}
+                        if dependency not in missing:
+                            missing.append(dependency)
+                        continue
+                    names.add(name)
+                    closure.append(resolved)
+                    stack.append(iter(self.dependency_graph[resolved]))
+                    break
+                else:
+                    stack.pop()
+        return closure, missing
+
+    def dependents_closure(self, signatures):
+        """Find all the modules that depend on the given modules transitively.
+        Dependency is matched by name of the module only, so a module depends
+        on every revision of the modules it imports or includes.
+                Arguments:
+                    :param signatures: (list) signatures of the modules to start with
+                    :return list of signatures of all the dependent modules in the
+                        order they were reached
+        """
+        reverse_dependencies = self.list_index['dependencies']
+        queue = collections.deque([self.modules_by_signature[signature]['name']
+                                   for signature in signatures])
+        resolved = set()
+        found = []
+        while len(queue) > 0:
+            name = queue.popleft()
+            if name in resolved:
+                continue
+            resolved.add(name)
+            for signature in reverse_dependencies.get(name, []):
+                found.append(signature)
+                queue.append(self.modules_by_signature[signature]['name'])
+        return found
+
+    def latest_revisions(self, signatures):
+        """Keep only the latest revision of every module. If there are more
+        modules with the same name and revision the first one is kept.
+                Arguments:
+                    :param signatures: (list) signatures of the modules
+                    :return list of signatures sorted by name of the module
+        """
+        latest = {}
+        for signature in signatures:
+            module = self.modules_by_signature[signature]
+            name = module['name']
+            found = latest.get(name)
+            if found == self.latest_revision[name]:
+                # nothing can be newer than the latest revision in catalog
+                continue
+            if found is None or module['revision'] > self.modules_by_signature[found]['revision']:
+                latest[name] = signature
+        return sorted(latest.values(), key=lambda sig: self.modules_by_signature[sig]['name'])
+
+    def module_variants(self, signature):
+        """Get compressed variants of the response with one module. Modules
+        are small so they are compressed only when they are requested for
+        the first time and kept for the following requests.
+                Arguments:
+                    :param signature: (str) signature of the module
+                    :return dictionary of content coding to compressed body
+        """
+        variants = {}
+        for encoding in self.encodings:
+            compressed = self.module_compressed[encoding].get(signature)
+            if compressed is None:
+                # two threads may compress the same module, both results are the same
+                compressed = compress_body([self.module_response[signature]], encoding)
+                self.module_compressed[encoding][signature] = compressed
+            variants[encoding] = compressed
+        return variants
+
+    def module_json(self, signature):
+        """Get serialized module without copying it
+                Arguments:
+                    :param signature: (str) signature of the module
+                    :return memoryview of json encoded module
+        """
+        return memoryview(self.module_response[signature])[
+            len(MODULE_RESPONSE_PREFIX):-len(MODULE_RESPONSE_SUFFIX)]
+
+    def modules_response(self, signatures, not_found=None):
+        """Create json body of the yang-catalog:modules container out of
+        already serialized modules.
+                Arguments:
+                    :param signatures: (list) signatures of the modules to send
+                    :param not_found: (list) modules that were searched for but
+                        they are not in the catalog. If given they are sent
+                        in not-found list next to the container
+                    :return json encoded bytes with all the modules
+        """
+        body = b'{"yang-catalog:modules": {"module": [' + \
+               b', '.join([self.module_json(sig) for sig in signatures]) + b']}'
+        if not_found is not None:
+            body += b', "not-found": ' + json.dumps(not_found).encode('utf-8')
+        return body + b'}'
+
+    def modules_list_response(self, signatures):
+        """Create json list of already serialized modules. This is how the
+        modules are sent if only their latest revisions were requested.
+                Arguments:
+                    :param signatures: (list) signatures of the modules to send
+                    :return json encoded bytes with all the modules
+        """
+        return b'[' + b', '.join([self.module_json(sig) for sig in signatures]) + b']'
+
+    def modules_body(self):
+        """Generate json encoded modules container piece by piece out of
+        already serialized modules.
+                :return generator of bytes-like objects
+        """
+        yield MODULE_RESPONSE_PREFIX
+        for i, signature in enumerate(self.signatures):
+            if i > 0:
+                yield b', '
+            yield self.module_json(signature)
+        yield MODULE_RESPONSE_SUFFIX
+
+    def vendors_body(self):
+        """Generate json encoded vendors container piece by piece
+                :return generator of bytes-like objects
+        """
+        view = memoryview(self.vendors_json)
+        for i in range(0, len(view), CHUNK_SIZE):
+            yield view[i:i + CHUNK_SIZE]
+
+    def catalog_body(self):
+        """Generate json encoded whole catalog piece by piece
+                :return generator of bytes-like objects
+        """
+        yield b'{"yang-catalog:catalog": {'
+        catalog = self.catalog.get('yang-catalog:catalog', {})
+        for i, key in enumerate(catalog):
+            if i > 0:
+                yield b', '
+            yield json.dumps(key).encode('utf-8') + b': '
+            if key == 'modules' and len(self.modules) != 0:
+                for piece in self.modules_body():
+                    yield piece
+            elif key == 'vendors':
+                for piece in self.vendors_body():
+                    yield piece
+            else:
+                yield json.dumps(catalog[key]).encode('utf-8')
+        yield b'}}'
+
+
+def vendor_statistics(vendor):
+    """Group platforms of the vendor by os-type and software version. Os-type
+    of the software version is taken from the first module of its first flavor.
+            Arguments:
+                :param vendor: (dict) vendor from the catalog
+                :return dict of os-type to dict of software version to list
+                    of platforms
+    """
+    os_types = {}
+    for platform in vendor.get('platforms', {}).get('platform', []):
+        for version in platform.get('software-versions', {}).get('software-version', []):
+            flavors = version.get('software-flavors', {}).get('software-flavor', [])
+            modules = flavors[0].get('modules', {}).get('module', []) if flavors else []
+            if len(modules) == 0:
+                continue
+            platforms = os_types.setdefault(modules[0].get('os-type'), {}).setdefault(version['name'], [])
+            if platform['name'] not in platforms:
+                platforms.append(platform['name'])
+    return os_types
+
+
+def intern_values(data):
+    """Intern values of INTERNED_KEYS in decoded data in place so all the
+    modules share one copy of every repeated value
+            Arguments:
+                :param data: (dict or list) decoded data
+                :return the same data
+    """
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if isinstance(value, str):
+                    if key in INTERNED_KEYS:
+                        item[key] = sys.intern(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        else:
+            stack.extend(value for value in item if isinstance(value, (dict, list)))
+    return data
+
+
+def decode_catalog(data, encoding='json'):
+    """Decode catalog or its part. Plain dictionaries keep the order of the
+    keys since python 3.7 so OrderedDict is used only on older versions.
+            Arguments:
+                :param data: (str) json text or (bytes-like) msgpack data
+                :param encoding: (str) json or msgpack
+                :return decoded data
+    """
+    hook = None if sys.version_info >= (3, 7) else collections.OrderedDict
+    if encoding == 'msgpack':
+        decoded = msgpack.unpackb(data, object_pairs_hook=hook, raw=False)
+    else:
+        decoded = json.JSONDecoder(object_pairs_hook=hook).decode(data)
+    return intern_values(decoded)
+
+
+def encode_catalog(catalog, encoding='json'):
+    """Encode decoded catalog or its part
+            Arguments:
+                :param catalog: (dict) decoded data
+                :param encoding: (str) json or msgpack
+                :return encoded bytes
+    """
+    if encoding == 'msgpack':
+        return msgpack.packb(catalog, use_bin_type=True)
+    return json.dumps(catalog).encode('utf-8')
+
+
+def split_chunks(body):
+    """Split serialized body into chunks of CHUNK_SIZE. Body that is a slice
+    of snapshot file is copied only one chunk at a time while it is sent.
+            Arguments:
+                :param body: (bytes-like) body to split
+                :return generator of bytes
+    """
+    view = memoryview(body)
+    for i in range(0, len(view), CHUNK_SIZE):
+        yield view[i:i + CHUNK_SIZE].tobytes()
+
+
+def join_chunks(pieces):
+    """Join small pieces of the response into chunks of CHUNK_SIZE so the
+    server does not need to write every piece separately.
+            Arguments:
+                :param pieces: (generator) bytes-like objects to join
+                :return generator of bytes
+    """
+    chunk = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+            size = 0
+    if size > 0:
+        yield b''.join(chunk)
+
+
+def compress_body(pieces, encoding, levels=COMPRESS_LEVELS):
+    """Compress body of the response using given content coding
+            Arguments:
+                :param pieces: (iterable) bytes-like pieces of the body
+                :param encoding: (str) one of the ENCODINGS
+                :param levels: (dict) content coding to compression level
+                :return compressed bytes
+    """
+    if encoding == 'br':
+        return brotli.compress(b''.join(pieces), quality=levels['br'])
+    compressor = zlib.compressobj(levels['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    compressed = [compressor.compress(piece) for piece in pieces]
+    compressed.append(compressor.flush())
+    return b''.join(compressed)
+
+
+def module_index_values(module):
+    """Get all the values under which the module is indexed
+            Arguments:
+                :param module: (dict) module from the catalog
+                :return list of (name of the index, key, value)
+    """
+    entries = []
+    for key in SEARCH_KEYS:
+        values = set()
+        collect_values(module, key.split('/'), -1, values)
+        entries.extend([('search_index', key, value) for value in values])
+    for key in LIST_KEYS:
+        names = set([item.get('name') for item in module.get(key, [])])
+        entries.extend([('list_index', key, name) for name in names])
+    implementations = module.get('implementations', {}).get('implementation', [])
+    for key in IMPLEMENTATION_KEYS:
+        values = set([implementation.get(key) for implementation in implementations])
+        entries.extend([('implementation_index', key, value) for value in values])
+    return entries
+
+
+def collect_values(data, split, count, values):
+    """Iterates recursively through the module to find all the values on the
+    path given by split. It walks the module the same way the leaf search
+    always did so a value is found even if part of the path is a list.
+            Arguments:
+                :param data: (dict) module or its part that is searched
+                :param split: (list) parts of the key path
+                :param count: (int) which part of the path are we searching
+                :param values: (set) all the found values are saved in this variable
+    """
+    if isinstance(data, str):
+        values.add(data)
+    elif isinstance(data, list):
+        for part in data:
+            collect_values(part, split, count, values)
+    elif isinstance(data, dict):
+        if data and count + 1 < len(split):
+            count += 1
+            collect_values(data.get(split[count]), split, count, values)
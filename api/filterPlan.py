@@ -0,0 +1,168 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Filter plan for the /search-filter RPC. Input container of the RPC is
+compiled once into a list of predicates. Candidate modules are taken
+from the most selective index of the catalog snapshot and only those
+are checked against all the predicates. Modules of the snapshot are
+only read, never copied or changed.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+from api.catalogSnapshot import IMPLEMENTATION_KEYS, LIST_KEYS
+
+# leafs that can be used to look up candidates in the search index
+INDEXED_LEAFS = ['name', 'revision', 'organization', 'namespace']
+# leafs that every module has. Partial search lets through modules that
+# do not have the leaf at all so only these can be used for partial lookup
+REQUIRED_LEAFS = ['name', 'revision', 'organization']
+
+
+class FilterPlan(object):
+
+    def __init__(self, rpc_input):
+        """Compile input container of the /search-filter RPC
+                Arguments:
+                    :param rpc_input: (dict) content of the input container
+        """
+        self.partial = bool(rpc_input.get('partial'))
+        self.leafs = []
+        self.lists = []
+        self.implementations = None
+        for leaf, value in rpc_input.items():
+            if leaf == 'partial':
+                continue
+            elif leaf in LIST_KEYS:
+                self.lists.append((leaf, value))
+            elif leaf == 'implementations':
+                self.implementations = value.get('implementation', [])
+            else:
+                self.leafs.append((leaf, value))
+
+    def execute(self, snapshot):
+        """Find all the modules of the snapshot that pass the filter
+                Arguments:
+                    :param snapshot: (CatalogSnapshot) snapshot to search in
+                    :return list of signatures of the modules in the same order
+                        as they are in the catalog
+        """
+        return [signature for signature in self.candidates(snapshot)
+                if self.matches(snapshot.modules_by_signature[signature])]
+
+    def candidates(self, snapshot):
+        """Choose the smallest set of modules that can pass the filter
+        using indexes of the snapshot. If no index can be used all the
+        modules are candidates.
+                Arguments:
+                    :param snapshot: (CatalogSnapshot) snapshot to search in
+                    :return list of signatures
+        """
+        options = []
+        for leaf, value in self.leafs:
+            if leaf in INDEXED_LEAFS and isinstance(value, str):
+                if not self.partial or leaf in REQUIRED_LEAFS:
+                    options.append(snapshot.lookup(snapshot.search_index[leaf], value, self.partial))
+        for key, items in self.lists:
+            for item in items:
+                name = item.get('name')
+                if name and isinstance(name, str):
+                    options.append(snapshot.lookup(snapshot.list_index[key], name, self.partial))
+        if self.implementations:
+            for implementation in self.implementations:
+                for key in IMPLEMENTATION_KEYS:
+                    value = implementation.get(key)
+                    if isinstance(value, str):
+                        options.append(snapshot.lookup(snapshot.implementation_index[key], value,
+                                                       self.partial))
+        if len(options) == 0:
+            return snapshot.signatures
+        return min(options, key=len)
+
+    def matches(self, module):
+        """Check the module against all the predicates of the filter
+                Arguments:
+                    :param module: (dict) module from the snapshot
+                    :return whether the module passed
+        """
+        for key, items in self.lists:
+            if not self.__match_items(items, module.get(key)):
+                return False
+        if self.implementations is not None:
+            if not self.__match_implementations(module.get('implementations')):
+                return False
+        for leaf, value in self.leafs:
+            module_leaf = module.get(leaf)
+            if self.partial:
+                if module_leaf and not self.__match(value, module_leaf):
+                    return False
+            elif value != module_leaf:
+                return False
+        return True
+
+    def __match(self, value, module_value):
+        if module_value is None:
+            return False
+        if self.partial:
+            try:
+                return value in module_value
+            except TypeError:
+                return False
+        return value == module_value
+
+    def __match_items(self, searched_items, items):
+        """Every searched item needs to match at least one of the items
+        of the module by name, revision and schema if they are given.
+        """
+        if items is None:
+            return False
+        for searched in searched_items:
+            found = False
+            for item in items:
+                found = True
+                for leaf in ['name', 'revision', 'schema']:
+                    value = searched.get(leaf)
+                    if value and not self.__match(value, item.get(leaf)):
+                        found = False
+                        break
+                if found:
+                    break
+            if not found:
+                return False
+        return True
+
+    def __match_implementations(self, implementations):
+        """Every leaf of the searched implementations narrows down the
+        implementations of the module. Module passes if there is some
+        implementation left after all the leafs are applied.
+        """
+        if implementations is None:
+            return False
+        remaining = implementations.get('implementation', [])
+        for searched in self.implementations:
+            for leaf, value in searched.items():
+                if leaf == 'deviation':
+                    remaining = [implementation for implementation in remaining
+                                 if self.__match_items(value, implementation.get('deviation'))]
+                else:
+                    remaining = [implementation for implementation in remaining
+                                 if self.__match(value, implementation.get(leaf))]
+                if len(remaining) == 0:
+                    return False
+        return True
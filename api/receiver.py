@@ -116,6 +116,7 @@ def process_sdo(arguments):
         with open(direc + '/prepare.json', 'r') as f:
             global all_modules
             all_modules = json.load(f)
+        set_cache_changes(all_modules)
 
     return __response_type[1]
 
@@ -135,6 +136,42 @@ def create_signature(secret_key, string):
     return hmac.hexdigest()
 
 
+def get_existing_modules(yc_api_prefix, modules, credentials):
+    """Find out which of the modules are already in yangcatalog using one
+    batch request to the API. If the batch request fails every module is
+    asked for separately.
+            Arguments:
+                :param yc_api_prefix: (str) prefix for sending request to api
+                :param modules: (list) modules each with name, revision and organization
+                :param credentials: (list) Basic authorization credentials - username, password
+                    respectively.
+                :return set of <name>@<revision>/<organization> of the modules that exist
+    """
+    body = {'input': {'module': [{'name': module['name'],
+                                  'revision': module['revision'],
+                                  'organization': module['organization']}
+                                 for module in modules]}}
+    response = requests.post(yc_api_prefix + 'search/modules', json=body,
+                             auth=(credentials[0], credentials[1]),
+                             headers={'Accept': 'application/json'})
+    if response.status_code == 200:
+        found = response.json()['yang-catalog:modules']['module']
+        return set(['{}@{}/{}'.format(module['name'], module['revision'], module['organization'])
+                    for module in found])
+    LOGGER.warning('Could not get existing modules at once - status code {}'.format(response.status_code))
+    existing = set()
+    for module in modules:
+        url = '{}search/modules/{},{},{}'.format(yc_api_prefix, module['name'], module['revision'],
+                                                 module['organization'])
+        response = requests.get(url, auth=(credentials[0], credentials[1]),
+                                headers={'Content-Type': 'application/vnd.yang.data+json',
+                                         'Accept': 'application/vnd.yang.data+json'})
+        code = response.status_code
+        if code == 200 or code == 201 or code == 204:
+            existing.add('{}@{}/{}'.format(module['name'], module['revision'], module['organization']))
+    return existing
+
+
 def prepare_to_indexing(yc_api_prefix, modules_to_index, credentials, apiIp = None,
                         sdo_type=False, delete=False, from_api=True,
                         force_indexing=True, LOOGER_temp=None, saveFilesDir=None,
@@ -214,16 +251,10 @@ def prepare_to_indexing(yc_api_prefix, modules_to_index, credentials, apiIp = No
             else:
                 prefix = 'vendor/'
 
+            existing = get_existing_modules(yc_api_prefix, sdos_json['module'], credentials)
             for module in sdos_json['module']:
-                url = '{}search/modules/{},{},{}'.format(yc_api_prefix,
-                                                         module['name'],
-                                                         module['revision'],
-                                                         module['organization'])
-                response = requests.get(url, auth=(credentials[0], credentials[1]),
-                                        headers={'Content-Type': 'application/vnd.yang.data+json',
-                                                 'Accept': 'application/vnd.yang.data+json'})
-                code = response.status_code
-                if force_indexing or (code != 200 and code != 201 and code != 204):
+                key = module['name'] + '@' + module['revision'] + '/' + module['organization']
+                if force_indexing or key not in existing:
                     if module.get('schema'):
                         path = prefix + module['schema'].split('githubusercontent.com/')[1]
                         path = os.path.abspath(temp_dir + '/' + path)
@@ -231,20 +262,12 @@ def prepare_to_indexing(yc_api_prefix, modules_to_index, credentials, apiIp = No
                         path = 'module does not exist'
                     post_body[module['name'] + '@' + module['revision'] + '/' + module['organization']] = path
         else:
+            existing = get_existing_modules(yc_api_prefix, sdos_json['module'], credentials)
             for module in sdos_json['module']:
-                url = '{}search/modules/{},{},{}'.format(yc_api_prefix,
-                                                         module['name'],
-                                                         module['revision'],
-                                                         module['organization'])
-                response = requests.get(url, auth=(credentials[0], credentials[1]),
-                                        headers={'Content-Type': 'application/vnd.yang.data+json',
-                                                 'Accept': 'application/vnd.yang.data+json'})
-                code = response.status_code
-
-                if code != 200 and code != 201 and code != 204:
+                key = module['name'] + '@' + module['revision'] + '/' + module['organization']
+                if key not in existing:
                     load_new_files_to_github = True
-                if force_indexing or (
-                            code != 200 and code != 201 and code != 204):
+                if force_indexing or key not in existing:
                     path = '{}/{}@{}.yang'.format(save_file_dir, module.get('name'), module.get('revision'))
                     post_body[module['name'] + '@' + module['revision'] + '/' + module['organization']] = path
 
@@ -344,6 +367,7 @@ def process_vendor(arguments):
                   'r') as f:
             global all_modules
             all_modules = json.load(f)
+        set_cache_changes(all_modules)
 
     integrity_file_name = datetime.utcnow().strftime("%Y-%m-%dT%H:%m:%S.%f")[:-3] + 'Z'
 
@@ -387,7 +411,10 @@ def process_vendor_deletion(arguments):
 
     modules = set()
     modules_that_succeeded = []
-    iterate_in_depth(vendors_data, modules)
+    # only modules of the deleted branch are affected
+    for branch in vendor_branch(vendors_data, vendor, platform, software_version, software_flavor):
+        iterate_in_depth(branch, modules)
+    changed_modules = [dict(zip(['name', 'revision', 'organization'], mod.split(','))) for mod in modules]
 
     response = requests.delete(path_to_delete, auth=(credentials[0], credentials[1]))
     if response.status_code == 404:
@@ -462,6 +489,9 @@ def process_vendor_deletion(arguments):
                             LOGGER.error('Couldn\'t delete module on path {}. Error : {}'
                                          .format(path, response.text))
                             return __response_type[0] + '#split#' + response.text
+                        changed_modules.append(module_key(existing_module))
+    global cache_changes
+    cache_changes = {'modules': changed_modules, 'vendors': [vendor]}
     if notify_indexing:
         body_to_send = prepare_to_indexing(yangcatalog_api_prefix, modules_that_succeeded,
                             credentials, delete=True)
@@ -470,6 +500,29 @@ def process_vendor_deletion(arguments):
     return __response_type[1]
 
 
+def vendor_branch(vendors_data, vendor, platform, software_version, software_flavor):
+    """Find part of the vendors tree that is deleted
+            Arguments:
+                :param vendors_data: (dict) vendors branch of the catalog
+                :param vendor: (str) name of the vendor
+                :param platform: (str) name of the platform or 'None' for all
+                :param software_version: (str) software version or 'None' for all
+                :param software_flavor: (str) software flavor or 'None' for all
+                :return list of the vendors, platforms, software versions or
+                    software flavors that are deleted
+    """
+    branch = [item for item in vendors_data.get('vendor', []) if item['name'] == vendor]
+    levels = [(platform, 'platforms', 'platform'),
+              (software_version, 'software-versions', 'software-version'),
+              (software_flavor, 'software-flavors', 'software-flavor')]
+    for name, container, key in levels:
+        if name == 'None':
+            break
+        branch = [item for parent in branch for item in parent.get(container, {}).get(key, [])
+                  if item['name'] == name]
+    return branch
+
+
 def iterate_in_depth(value, modules):
     """Iterates through the branch to get to the level with modules
             Arguments:
@@ -498,7 +551,7 @@ def iterate_in_depth(value, modules):
                 iterate_in_depth(val, modules)
 
 
-def make_cache(credentials):
+def make_cache(credentials, changes=None):
     """After we delete or add modules we need to reload all the modules to the file
     for qucker search. This module is then loaded to the memory.
             Arguments:
@@ -506,11 +559,16 @@ def make_cache(credentials):
                     everything went through fine
                 :param credentials: (list) Basic authorization credentials - username, password
                     respectively
+                :param changes: (dict) modules and vendors that have changed. If given
+                    only these are reloaded, otherwise the whole catalog is reloaded
                 :return 'work' if everything went through fine otherwise send back the reason why
                     it failed.
     """
     path = yangcatalog_api_prefix + 'load-cache'
-    response = requests.post(path, auth=(credentials[0], credentials[1]),
+    body = None
+    if changes is not None:
+        body = json.dumps({'input': changes})
+    response = requests.post(path, body, auth=(credentials[0], credentials[1]),
                              headers={'Content-Type': 'application/vnd.yang.data+json',
                                       'Accept': 'application/vnd.yang.data+json'}
                              )
@@ -521,6 +579,32 @@ def make_cache(credentials):
     return response
 
 
+def module_key(module):
+    """Get keys of the module that identify it in confd
+            Arguments:
+                :param module: (dict) module with at least name, revision and organization
+                :return dictionary with name, revision and organization
+    """
+    return {'name': module['name'], 'revision': module['revision'], 'organization': module['organization']}
+
+
+def set_cache_changes(modules):
+    """Remember which modules and vendors were populated so only they are
+    reloaded to the cache
+            Arguments:
+                :param modules: (dict) content of prepare.json created by populate
+    """
+    global cache_changes
+    changed_modules = []
+    vendors = set()
+    for module in modules.get('module', []):
+        changed_modules.append(module_key(module))
+        for implementation in module.get('implementations', {}).get('implementation', []):
+            if implementation.get('vendor'):
+                vendors.add(implementation['vendor'])
+    cache_changes = {'modules': changed_modules, 'vendors': sorted(vendors)}
+
+
 def process_module_deletion(arguments, multiple=False):
     """Deletes module. It calls the delete request to confd to delete module on
     given path. This will delete whole module in modules branch of the
@@ -549,6 +633,7 @@ def process_module_deletion(arguments, multiple=False):
         modules = [{'name': name, 'revision': rev, 'organization': org}]
         paths = [path_to_delete]
     all_mods = requests.get('{}search/modules'.format(yangcatalog_api_prefix)).json()
+    changed_modules = [module_key(mod) for mod in modules]
 
     for mod in modules:
         for existing_module in all_mods['module']:
@@ -564,6 +649,9 @@ def process_module_deletion(arguments, multiple=False):
                             LOGGER.error('Couldn\'t delete module on path {}. Error : {}'
                                          .format(path, response.text))
                             return __response_type[0] + '#split#' + response.text
+                        changed_modules.append(module_key(existing_module))
+    global cache_changes
+    cache_changes = {'modules': changed_modules, 'vendors': []}
     modules_to_index = []
     for path in paths:
         response = requests.delete(path, auth=(credentials[0], credentials[1]))
@@ -647,6 +735,8 @@ def on_request(ch, method, props, body):
         else:
             global all_modules
             all_modules = None
+            global cache_changes
+            cache_changes = None
             if arguments[-3] == 'DELETE':
                 LOGGER.info('Deleting single module')
                 if 'http' in arguments[0]:
@@ -670,7 +760,7 @@ def on_request(ch, method, props, body):
                 direc = arguments[5]
                 shutil.rmtree(direc)
             if final_response.split('#split#')[0] == __response_type[1]:
-                res = make_cache(credentials)
+                res = make_cache(credentials, cache_changes)
                 if res.status_code != 201:
                     final_response = __response_type[0] + '#split#Server error-> could not reload cache'
 
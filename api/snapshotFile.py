@@ -0,0 +1,218 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Catalog snapshot saved to a file that all the API processes map to
+memory read-only. The file contains an index with positions of all the
+serialized modules, compressed responses and the whole catalog followed
+by the data itself. Processes decode the catalog and build their own
+search indexes, but all the serialized bodies are slices of the mapped
+file so they are kept in memory only once no matter how many processes
+use them. Catalog is saved in msgpack if the package is available since
+it is decoded faster than json.
+
+File is never changed once it is written. New snapshot is written to a
+temporary file which is then renamed over the old one, so a process that
+opens the file always sees a whole snapshot and processes that still
+use the old snapshot keep their mapping of the old file. Processes find
+out that another process published a new snapshot by comparing the id of
+the file with the id of the file they have mapped, and they take the lock
+file next to it while they build a new snapshot so only one of them
+loads the catalog at a time. Single modules are not compressed in the
+file, every process compresses the modules it is asked for.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from api.catalogSnapshot import CATALOG_ENCODING, CatalogSnapshot, decode_catalog, encode_catalog
+
+MAGIC = b'YCSNAP'
+# version of the layout of the file. Files with other version are not read
+FORMAT_VERSION = 3
+# magic, format version and length of the index
+HEADER = struct.Struct('<6sHQ')
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+class SnapshotFile(object):
+
+    def __init__(self, path):
+        """Map snapshot file to memory
+                Arguments:
+                    :param path: (str) path to the snapshot file
+        """
+        with open(path, 'rb') as f:
+            self.file_id = file_id(os.fstat(f.fileno()))
+            self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = HEADER.unpack_from(self.__mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError('{} is not a catalog snapshot file of version {}'.format(path, FORMAT_VERSION))
+        view = memoryview(self.__mmap)
+        self.index = json.loads(view[HEADER.size:HEADER.size + length].tobytes().decode('utf-8'))
+        self.__data = view[HEADER.size + length:]
+        self.generation = self.index['generation']
+        self.etag = self.index['etag']
+        self.created = datetime.strptime(self.index['created'], DATE_FORMAT)
+        self.encodings = self.index['encodings']
+
+    def catalog(self):
+        """Decode the catalog saved in the file
+                :return decoded catalog
+        """
+        data = self.__slice(self.index['catalog'])
+        if self.index['catalog-encoding'] == 'json':
+            return decode_catalog(data.tobytes().decode('utf-8'))
+        if self.index['catalog-encoding'] != CATALOG_ENCODING:
+            raise ValueError('catalog is saved in {} which is not available'.format(self.index['catalog-encoding']))
+        return decode_catalog(data, CATALOG_ENCODING)
+
+    def vendors_json(self):
+        return self.__slice(self.index['vendors'])
+
+    def module_response(self, signature):
+        return self.__slice(self.index['modules'][signature])
+
+    def compressed(self, body, encoding):
+        return self.__slice(self.index['compressed'][body][encoding])
+
+    def __slice(self, position):
+        offset, length = position
+        return self.__data[offset:offset + length]
+
+
+class _Blobs(object):
+    """Pieces of data of the file together with their positions"""
+
+    def __init__(self):
+        self.pieces = []
+        self.size = 0
+
+    def add(self, pieces):
+        start = self.size
+        for piece in pieces:
+            self.pieces.append(piece)
+            self.size += len(piece)
+        return [start, self.size - start]
+
+
+def read_snapshot(path):
+    """Read catalog snapshot from file
+            Arguments:
+                :param path: (str) path to the snapshot file
+                :return CatalogSnapshot
+    """
+    stored = SnapshotFile(path)
+    return CatalogSnapshot(stored.generation, None, stored=stored)
+
+
+def file_id(stat):
+    """Create id of the snapshot file that changes whenever the file is replaced
+            Arguments:
+                :param stat: (os.stat_result) status of the file
+                :return tuple with the id
+    """
+    # inode alone is not enough since it may be reused by the next file
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def read_file_id(path):
+    """Get id of the snapshot file that is published now
+            Arguments:
+                :param path: (str) path to the snapshot file
+                :return tuple with the id or None if there is no file
+    """
+    try:
+        return file_id(os.stat(path))
+    except OSError:
+        return None
+
+
+@contextmanager
+def snapshot_lock(path):
+    """Lock the snapshot file against other processes for the time of the
+    with block. Lock is held on a separate lock file since the snapshot file
+    itself is replaced.
+            Arguments:
+                :param path: (str) path to the snapshot file
+    """
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_generation(path):
+    """Read only generation of the snapshot saved in file
+            Arguments:
+                :param path: (str) path to the snapshot file
+                :return generation or 0 if there is no valid snapshot file
+    """
+    try:
+        return SnapshotFile(path).generation
+    except (IOError, OSError, ValueError, struct.error):
+        return 0
+
+
+def write_snapshot(snapshot, path):
+    """Save catalog snapshot to file. The file is replaced atomically.
+            Arguments:
+                :param snapshot: (CatalogSnapshot) snapshot to save
+                :param path: (str) path to the snapshot file
+    """
+    blobs = _Blobs()
+    index = {'generation': snapshot.generation,
+             'etag': snapshot.etag,
+             'created': snapshot.created.strftime(DATE_FORMAT),
+             'encodings': snapshot.encodings,
+             'catalog-encoding': CATALOG_ENCODING,
+             'catalog': blobs.add([encode_catalog(snapshot.catalog, CATALOG_ENCODING)]),
+             'vendors': blobs.add([snapshot.vendors_json]),
+             'modules': {},
+             'compressed': {'modules': {}, 'vendors': {}, 'catalog': {}}}
+    for signature in snapshot.signatures:
+        index['modules'][signature] = blobs.add([snapshot.module_response[signature]])
+    for encoding in snapshot.encodings:
+        index['compressed']['modules'][encoding] = blobs.add([snapshot.modules_compressed[encoding]])
+        index['compressed']['vendors'][encoding] = blobs.add([snapshot.vendors_compressed[encoding]])
+        index['compressed']['catalog'][encoding] = blobs.add([snapshot.catalog_compressed[encoding]])
+    encoded_index = json.dumps(index).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded_index)))
+            f.write(encoded_index)
+            for piece in blobs.pieces:
+                f.write(piece)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,362 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Stanislav Chlebec"
+__copyright__ = "Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "stanislav.chlebec@pantheon.tech"
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+
+import brotli
+
+import api.snapshotFile as snapshotFile
+from api.catalogSnapshot import CatalogSnapshot, compress_body, decode_catalog, encode_catalog, join_chunks
+from api.filterPlan import FilterPlan
+from api.snapshotFile import read_file_id, read_generation, read_snapshot, snapshot_lock, write_snapshot
+
+
+def create_catalog():
+    modules = [
+        {'name': 'ietf-interfaces', 'revision': '2014-05-08', 'organization': 'ietf',
+         'namespace': 'urn:ietf:params:xml:ns:yang:ietf-interfaces',
+         'ietf': {'ietf-wg': 'netmod'}, 'maturity-level': 'ratified',
+         'dependencies': [{'name': 'ietf-yang-types'}]},
+        {'name': 'ietf-interfaces', 'revision': '2018-02-20', 'organization': 'ietf',
+         'namespace': 'urn:ietf:params:xml:ns:yang:ietf-interfaces',
+         'ietf': {'ietf-wg': 'netmod'}, 'maturity-level': 'ratified',
+         'dependencies': [{'name': 'ietf-yang-types', 'revision': '2013-07-15'}]},
+        {'name': 'ietf-yang-types', 'revision': '2013-07-15', 'organization': 'ietf',
+         'namespace': 'urn:ietf:params:xml:ns:yang:ietf-yang-types',
+         'ietf': {'ietf-wg': 'netmod'}, 'maturity-level': 'ratified'},
+        {'name': 'Cisco-IOS-XR-ip-domain-cfg', 'revision': '2015-05-13', 'organization': 'cisco',
+         'namespace': 'http://cisco.com/ns/yang/Cisco-IOS-XR-ip-domain-cfg',
+         'dependencies': [{'name': 'ietf-interfaces'}],
+         'implementations': {'implementation': [
+             {'vendor': 'cisco', 'platform': 'asr9k', 'software-version': '631',
+              'software-flavor': 'ALL', 'os-type': 'IOS-XR', 'conformance-type': 'implement'}]}}
+    ]
+    vendors = {'vendor': [
+        {'name': 'cisco', 'platforms': {'platform': [
+            {'name': 'asr9k', 'software-versions': {'software-version': [
+                {'name': '631', 'software-flavors': {'software-flavor': [
+                    {'name': 'ALL', 'modules': {'module': [
+                        {'name': 'Cisco-IOS-XR-ip-domain-cfg', 'revision': '2015-05-13',
+                         'organization': 'cisco', 'os-type': 'IOS-XR'}]}}]}}]}}]}}]}
+    return json.dumps({'yang-catalog:catalog': {'modules': {'module': modules},
+                                                'vendors': vendors}})
+
+
+class TestCatalogSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = CatalogSnapshot(3, create_catalog())
+
+    def test_decoded_data(self):
+        self.assertEqual(self.snapshot.generation, 3)
+        self.assertEqual(len(self.snapshot.module_list), 4)
+        self.assertEqual(self.snapshot.vendors['vendor'][0]['name'], 'cisco')
+        self.assertIs(self.snapshot.modules['module'], self.snapshot.module_list)
+
+    def test_get_module(self):
+        module = self.snapshot.get_module('ietf-yang-types', '2013-07-15', 'ietf')
+        self.assertEqual(module['namespace'], 'urn:ietf:params:xml:ns:yang:ietf-yang-types')
+        self.assertIsNone(self.snapshot.get_module('ietf-yang-types', '2010-09-24', 'ietf'))
+        found = self.snapshot.find_modules(['ietf-yang-types@2010-09-24/ietf', 'ietf-yang-types@2013-07-15/ietf',
+                                            'ietf-interfaces@2014-05-08/ietf'])
+        self.assertEqual(list(found.keys()), ['ietf-yang-types@2013-07-15/ietf', 'ietf-interfaces@2014-05-08/ietf'])
+
+    def test_search(self):
+        found = self.snapshot.search('ietf/ietf-wg', 'netmod')
+        self.assertEqual(found, ['ietf-interfaces@2014-05-08/ietf', 'ietf-interfaces@2018-02-20/ietf',
+                                 'ietf-yang-types@2013-07-15/ietf'])
+        self.assertEqual(self.snapshot.search('organization', 'cisco'),
+                         ['Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco'])
+        self.assertEqual(self.snapshot.search('organization', 'juniper'), [])
+
+    def test_modules_response(self):
+        signatures = self.snapshot.search('name', 'ietf-interfaces')
+        response = json.loads(self.snapshot.modules_response(signatures))
+        expected = [self.snapshot.get_module('ietf-interfaces', '2014-05-08', 'ietf'),
+                    self.snapshot.get_module('ietf-interfaces', '2018-02-20', 'ietf')]
+        self.assertEqual(response, {'yang-catalog:modules': {'module': expected}})
+        not_found = [{'name': 'ietf-foo', 'revision': '2019-01-01', 'organization': 'ietf'}]
+        response = json.loads(self.snapshot.modules_response(signatures, not_found))
+        self.assertEqual(response, {'yang-catalog:modules': {'module': expected}, 'not-found': not_found})
+
+    def test_latest_revisions(self):
+        self.assertEqual(self.snapshot.latest_revision['ietf-interfaces'], 'ietf-interfaces@2018-02-20/ietf')
+        self.assertEqual(self.snapshot.latest_signatures, ['Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco',
+                                                           'ietf-interfaces@2018-02-20/ietf',
+                                                           'ietf-yang-types@2013-07-15/ietf'])
+        signatures = ['ietf-yang-types@2013-07-15/ietf', 'ietf-interfaces@2014-05-08/ietf']
+        self.assertEqual(self.snapshot.latest_revisions(signatures), ['ietf-interfaces@2014-05-08/ietf',
+                                                                      'ietf-yang-types@2013-07-15/ietf'])
+        response = json.loads(self.snapshot.modules_list_response(self.snapshot.latest_revisions(
+            self.snapshot.search('ietf/ietf-wg', 'netmod'))))
+        self.assertEqual([module['revision'] for module in response], ['2018-02-20', '2013-07-15'])
+
+    def test_dependency_closure(self):
+        cisco = 'Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco'
+        self.assertEqual(self.snapshot.dependency_graph[cisco],
+                         [('ietf-interfaces', None, 'ietf-interfaces@2018-02-20/ietf')])
+        self.assertEqual(self.snapshot.dependents_graph['ietf-yang-types@2013-07-15/ietf'],
+                         ['ietf-interfaces@2014-05-08/ietf', 'ietf-interfaces@2018-02-20/ietf'])
+        closure, missing = self.snapshot.dependency_closure([cisco])
+        self.assertEqual(closure, [cisco, 'ietf-interfaces@2018-02-20/ietf', 'ietf-yang-types@2013-07-15/ietf'])
+        self.assertEqual(missing, [])
+        names = set(['ietf-yang-types'])
+        closure, missing = self.snapshot.dependency_closure(['ietf-interfaces@2014-05-08/ietf'], names)
+        self.assertEqual(closure, ['ietf-interfaces@2014-05-08/ietf'])
+        self.assertEqual(names, set(['ietf-yang-types', 'ietf-interfaces']))
+
+    def test_dependents_closure(self):
+        dependents = self.snapshot.dependents_closure(['ietf-yang-types@2013-07-15/ietf'])
+        self.assertEqual(dependents, ['ietf-interfaces@2014-05-08/ietf', 'ietf-interfaces@2018-02-20/ietf',
+                                      'Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco'])
+        self.assertEqual(self.snapshot.dependents_closure(['Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco']), [])
+
+    def test_module_response(self):
+        signature = 'ietf-yang-types@2013-07-15/ietf'
+        module = self.snapshot.get_module('ietf-yang-types', '2013-07-15', 'ietf')
+        self.assertEqual(json.loads(self.snapshot.module_response[signature].decode('utf-8')),
+                         {'module': [module]})
+        self.assertEqual(self.snapshot.module_variants(signature), {})
+
+    def test_compressed_variants(self):
+        signature = 'ietf-yang-types@2013-07-15/ietf'
+        snapshot = CatalogSnapshot(1, create_catalog(), compress=True)
+        # single modules are compressed only when they are requested
+        self.assertEqual(snapshot.module_compressed['gzip'], {})
+        self.assertEqual(gzip.decompress(snapshot.module_variants(signature)['gzip']),
+                         snapshot.module_response[signature])
+        self.assertIs(snapshot.module_variants(signature)['gzip'], snapshot.module_compressed['gzip'][signature])
+        self.assertEqual(gzip.decompress(snapshot.modules_compressed['gzip']),
+                         b''.join(join_chunks(snapshot.modules_body())))
+        self.assertEqual(gzip.decompress(snapshot.vendors_compressed['gzip']), snapshot.vendors_json)
+        self.assertEqual(gzip.decompress(snapshot.catalog_compressed['gzip']),
+                         b''.join(join_chunks(snapshot.catalog_body())))
+        self.assertEqual(self.snapshot.catalog_compressed, {})
+
+    def test_aggregates(self):
+        self.assertEqual(json.loads(self.snapshot.contributors_json.decode('utf-8')),
+                         {'contributors': ['cisco', 'ietf']})
+        self.assertEqual(json.loads(self.snapshot.vendor_statistics['cisco'].decode('utf-8')),
+                         {'IOS-XR': {'631': ['asr9k']}})
+        self.assertNotIn('huawei', self.snapshot.vendor_statistics)
+
+    def test_bulk_bodies(self):
+        modules = b''.join(join_chunks(self.snapshot.modules_body()))
+        self.assertEqual(modules, json.dumps(self.snapshot.modules).encode('utf-8'))
+        self.assertEqual(len(modules), self.snapshot.modules_length)
+        vendors = b''.join(join_chunks(self.snapshot.vendors_body()))
+        self.assertEqual(vendors, json.dumps(self.snapshot.vendors).encode('utf-8'))
+        catalog = b''.join(join_chunks(self.snapshot.catalog_body()))
+        self.assertEqual(catalog, json.dumps(self.snapshot.catalog).encode('utf-8'))
+        self.assertEqual(len(catalog), self.snapshot.catalog_length)
+
+    def test_empty_catalog(self):
+        snapshot = CatalogSnapshot(1, json.dumps({'yang-catalog:catalog': {}}))
+        self.assertEqual(snapshot.module_list, [])
+        self.assertEqual(snapshot.vendors, {})
+
+    def test_patch(self):
+        snapshot = CatalogSnapshot(1, create_catalog(), compress=True)
+        changed = dict(snapshot.get_module('ietf-yang-types', '2013-07-15', 'ietf'))
+        changed['maturity-level'] = 'adopted'
+        added = {'name': 'ietf-ip', 'revision': '2018-02-22', 'organization': 'ietf',
+                 'dependencies': [{'name': 'ietf-interfaces'}]}
+        patched = snapshot.patch(2, modules=[changed, added],
+                                 deleted_modules=['ietf-interfaces@2014-05-08/ietf'],
+                                 vendors=[{'name': 'huawei'}], deleted_vendors=['cisco'])
+        self.assertEqual(patched.generation, 2)
+        self.assertEqual(patched.signatures, ['ietf-interfaces@2018-02-20/ietf', 'ietf-yang-types@2013-07-15/ietf',
+                                              'Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco',
+                                              'ietf-ip@2018-02-22/ietf'])
+        self.assertEqual(patched.search('maturity-level', 'adopted'), ['ietf-yang-types@2013-07-15/ietf'])
+        self.assertEqual(patched.dependents_closure(['ietf-interfaces@2018-02-20/ietf']),
+                         ['Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco', 'ietf-ip@2018-02-22/ietf'])
+        self.assertEqual(patched.vendors, {'vendor': [{'name': 'huawei'}]})
+        # unchanged module is shared with the old snapshot
+        signature = 'ietf-interfaces@2018-02-20/ietf'
+        self.assertIs(patched.module_response[signature], snapshot.module_response[signature])
+        self.assertEqual(gzip.decompress(patched.catalog_compressed['gzip']),
+                         b''.join(join_chunks(patched.catalog_body())))
+        self.assertNotEqual(patched.etag, snapshot.etag)
+        # the old snapshot stays untouched
+        self.assertEqual(len(snapshot.module_list), 4)
+        self.assertEqual(snapshot.search('maturity-level', 'adopted'), [])
+
+    def test_patch_indexes(self):
+        snapshot = CatalogSnapshot(1, create_catalog(), compress=True)
+        changed = dict(snapshot.get_module('ietf-interfaces', '2018-02-20', 'ietf'))
+        changed['dependencies'] = []
+        changed['maturity-level'] = 'adopted'
+        added = {'name': 'ietf-ip', 'revision': '2018-02-22', 'organization': 'ietf',
+                 'maturity-level': 'ratified', 'dependencies': [{'name': 'ietf-interfaces'}]}
+        patched = snapshot.patch(2, modules=[added, changed], deleted_modules=['ietf-yang-types@2013-07-15/ietf'])
+        # patched indexes are the same as indexes created from the whole catalog
+        rebuilt = CatalogSnapshot(2, patched.catalog)
+        self.assertEqual(patched.search_index, rebuilt.search_index)
+        self.assertEqual(patched.list_index, rebuilt.list_index)
+        self.assertEqual(patched.implementation_index, rebuilt.implementation_index)
+        # lists of unchanged values are shared and vendors are not encoded again
+        self.assertIs(patched.search_index['organization']['cisco'], snapshot.search_index['organization']['cisco'])
+        self.assertIs(patched.vendors_json, snapshot.vendors_json)
+        self.assertIs(patched.vendors_compressed['gzip'], snapshot.vendors_compressed['gzip'])
+
+    def test_old_generation_freed(self):
+        snapshot = CatalogSnapshot(1, create_catalog())
+        patched = snapshot.patch(2, vendors=[{'name': 'huawei'}])
+        old = weakref.ref(snapshot)
+        del snapshot
+        # new generation does not keep the old one alive
+        self.assertIsNone(old())
+        self.assertEqual(patched.generation, 2)
+
+
+class TestSnapshotFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'catalog.snap')
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_read_written_snapshot(self):
+        snapshot = CatalogSnapshot(5, create_catalog(), compress=True)
+        write_snapshot(snapshot, self.path)
+        self.assertEqual(os.listdir(self.directory), ['catalog.snap'])
+        self.assertEqual(read_generation(self.path), 5)
+        stored = read_snapshot(self.path)
+        self.assertEqual(stored.generation, 5)
+        self.assertEqual(stored.etag, snapshot.etag)
+        self.assertEqual(stored.created, snapshot.created)
+        self.assertEqual(stored.catalog, snapshot.catalog)
+        self.assertEqual(stored.signatures, snapshot.signatures)
+        self.assertEqual(stored.search_index, snapshot.search_index)
+        signature = 'ietf-yang-types@2013-07-15/ietf'
+        self.assertIsInstance(stored.module_response[signature], memoryview)
+        self.assertEqual(stored.module_response[signature], snapshot.module_response[signature])
+        self.assertEqual(stored.module_variants(signature), snapshot.module_variants(signature))
+        self.assertEqual(stored.catalog_compressed, snapshot.catalog_compressed)
+        self.assertEqual(b''.join(join_chunks(stored.catalog_body())),
+                         b''.join(join_chunks(snapshot.catalog_body())))
+        self.assertEqual(stored.catalog_length, snapshot.catalog_length)
+
+    def test_replace_snapshot(self):
+        write_snapshot(CatalogSnapshot(1, create_catalog()), self.path)
+        old = read_snapshot(self.path)
+        write_snapshot(old.patch(2, deleted_modules=['ietf-yang-types@2013-07-15/ietf']), self.path)
+        new = read_snapshot(self.path)
+        self.assertEqual(new.generation, 2)
+        # other processes notice the new file by its id
+        self.assertNotEqual(new.file_id, old.file_id)
+        self.assertEqual(read_file_id(self.path), new.file_id)
+        self.assertEqual(len(new.module_list), 3)
+        # old mapping is still readable after the file was replaced
+        self.assertEqual(len(old.module_list), 4)
+        self.assertEqual(json.loads(old.module_response['ietf-yang-types@2013-07-15/ietf'].tobytes().decode('utf-8'))
+                         ['module'][0]['name'], 'ietf-yang-types')
+
+    def test_catalog_encodings(self):
+        snapshot = CatalogSnapshot(1, create_catalog())
+        for encoding in ['json', 'msgpack']:
+            with mock.patch.object(snapshotFile, 'CATALOG_ENCODING', encoding):
+                write_snapshot(snapshot, self.path)
+                self.assertEqual(read_snapshot(self.path).catalog, snapshot.catalog)
+        # file saved in json stays readable when msgpack is installed later
+        with mock.patch.object(snapshotFile, 'CATALOG_ENCODING', 'json'):
+            write_snapshot(snapshot, self.path)
+        with mock.patch.object(snapshotFile, 'CATALOG_ENCODING', 'msgpack'):
+            self.assertEqual(read_snapshot(self.path).catalog, snapshot.catalog)
+        # file saved in msgpack is not readable without it
+        with mock.patch.object(snapshotFile, 'CATALOG_ENCODING', 'msgpack'):
+            write_snapshot(snapshot, self.path)
+        with mock.patch.object(snapshotFile, 'CATALOG_ENCODING', 'json'):
+            with self.assertRaises(ValueError):
+                read_snapshot(self.path).catalog
+
+    def test_missing_file(self):
+        self.assertEqual(read_generation(self.path), 0)
+        self.assertIsNone(read_file_id(self.path))
+
+    def test_snapshot_lock(self):
+        with snapshot_lock(self.path):
+            write_snapshot(CatalogSnapshot(1, create_catalog()), self.path)
+        self.assertEqual(read_generation(self.path), 1)
+
+
+class TestEncodings(unittest.TestCase):
+
+    def test_encode_catalog(self):
+        catalog = json.loads(create_catalog())
+        self.assertEqual(decode_catalog(encode_catalog(catalog, 'msgpack'), 'msgpack'), catalog)
+        self.assertEqual(decode_catalog(encode_catalog(catalog, 'json').decode('utf-8')), catalog)
+
+    def test_compress_body(self):
+        pieces = [b'{"module": [', b'{"name": "ietf-a"}', b']}']
+        self.assertEqual(gzip.decompress(compress_body(pieces, 'gzip')), b''.join(pieces))
+        self.assertEqual(brotli.decompress(compress_body(pieces, 'br')), b''.join(pieces))
+
+
+class TestFilterPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = CatalogSnapshot(1, create_catalog())
+
+    def test_exact_leafs(self):
+        plan = FilterPlan({'name': 'ietf-interfaces', 'revision': '2018-02-20'})
+        self.assertEqual(plan.execute(self.snapshot), ['ietf-interfaces@2018-02-20/ietf'])
+        plan = FilterPlan({'name': 'ietf-interfaces', 'ietf': {'ietf-wg': 'netmod'}})
+        self.assertEqual(len(plan.execute(self.snapshot)), 2)
+        self.assertEqual(FilterPlan({'name': 'ietf'}).execute(self.snapshot), [])
+
+    def test_partial_leafs(self):
+        plan = FilterPlan({'name': 'ietf-', 'partial': True})
+        self.assertEqual(plan.execute(self.snapshot), ['ietf-interfaces@2014-05-08/ietf',
+                                                       'ietf-interfaces@2018-02-20/ietf',
+                                                       'ietf-yang-types@2013-07-15/ietf'])
+        self.assertEqual(len(plan.candidates(self.snapshot)), 3)
+
+    def test_dependencies(self):
+        plan = FilterPlan({'dependencies': [{'name': 'ietf-yang-types', 'revision': '2013-07-15'}]})
+        self.assertEqual(plan.execute(self.snapshot), ['ietf-interfaces@2018-02-20/ietf'])
+        plan = FilterPlan({'dependencies': [{'name': 'ietf-yang-types'}]})
+        self.assertEqual(len(plan.candidates(self.snapshot)), 2)
+        self.assertEqual(len(plan.execute(self.snapshot)), 2)
+
+    def test_implementations(self):
+        plan = FilterPlan({'implementations': {'implementation': [{'vendor': 'cisco', 'platform': 'asr9k'}]}})
+        self.assertEqual(plan.execute(self.snapshot), ['Cisco-IOS-XR-ip-domain-cfg@2015-05-13/cisco'])
+        plan = FilterPlan({'implementations': {'implementation': [{'vendor': 'cisco', 'platform': 'ncs5k'}]}})
+        self.assertEqual(plan.execute(self.snapshot), [])
+
+    def test_no_index(self):
+        plan = FilterPlan({'maturity-level': 'ratified'})
+        self.assertEqual(len(plan.candidates(self.snapshot)), 4)
+        self.assertEqual(len(plan.execute(self.snapshot)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import unittest
+from unittest import mock
+
+import api.receiver as receiver
+
+
+def create_flavor(name, modules):
+    return {'name': name, 'protocols': {'protocol': [{'name': 'netconf'}]},
+            'modules': {'module': [{'name': module, 'revision': '2019-01-01', 'organization': 'cisco'}
+                                   for module in modules]}}
+
+
+def create_vendors():
+    return {'vendor': [
+        {'name': 'cisco', 'platforms': {'platform': [
+            {'name': 'asr9k', 'software-versions': {'software-version': [
+                {'name': '631', 'software-flavors': {'software-flavor': [
+                    create_flavor('ALL', ['Cisco-IOS-XR-a']), create_flavor('mini', ['Cisco-IOS-XR-b'])]}},
+                {'name': '641', 'software-flavors': {'software-flavor': [
+                    create_flavor('ALL', ['Cisco-IOS-XR-c'])]}}]}},
+            {'name': 'ncs5k', 'software-versions': {'software-version': [
+                {'name': '631', 'software-flavors': {'software-flavor': [
+                    create_flavor('ALL', ['Cisco-IOS-XR-d'])]}}]}}]}},
+        {'name': 'huawei', 'platforms': {'platform': [
+            {'name': 'ne5000e', 'software-versions': {'software-version': [
+                {'name': '8.9', 'software-flavors': {'software-flavor': [
+                    create_flavor('ALL', ['huawei-a'])]}}]}}]}}]}
+
+
+def deleted_modules(vendor, platform='None', software_version='None', software_flavor='None'):
+    modules = set()
+    for branch in receiver.vendor_branch(create_vendors(), vendor, platform, software_version, software_flavor):
+        receiver.iterate_in_depth(branch, modules)
+    return sorted(module.split(',')[0] for module in modules)
+
+
+class TestVendorDeletion(unittest.TestCase):
+
+    def test_whole_vendor(self):
+        self.assertEqual(deleted_modules('cisco'),
+                         ['Cisco-IOS-XR-a', 'Cisco-IOS-XR-b', 'Cisco-IOS-XR-c', 'Cisco-IOS-XR-d'])
+        self.assertEqual(deleted_modules('juniper'), [])
+
+    def test_platform(self):
+        self.assertEqual(deleted_modules('cisco', 'asr9k'), ['Cisco-IOS-XR-a', 'Cisco-IOS-XR-b', 'Cisco-IOS-XR-c'])
+
+    def test_software_version_and_flavor(self):
+        self.assertEqual(deleted_modules('cisco', 'asr9k', '631'), ['Cisco-IOS-XR-a', 'Cisco-IOS-XR-b'])
+        self.assertEqual(deleted_modules('cisco', 'asr9k', '631', 'mini'), ['Cisco-IOS-XR-b'])
+
+
+class TestCacheChanges(unittest.TestCase):
+
+    def test_populated_modules(self):
+        modules = {'module': [
+            {'name': 'Cisco-IOS-XR-a', 'revision': '2019-01-01', 'organization': 'cisco', 'namespace': 'urn:a',
+             'implementations': {'implementation': [{'vendor': 'cisco', 'platform': 'asr9k'},
+                                                    {'vendor': 'cisco', 'platform': 'ncs5k'}]}},
+            {'name': 'ietf-a', 'revision': '2019-01-01', 'organization': 'ietf',
+             'implementations': {'implementation': [{'platform': 'asr9k'}, {'vendor': ''}]}}]}
+        receiver.set_cache_changes(modules)
+        self.assertEqual(receiver.cache_changes, {
+            'modules': [{'name': 'Cisco-IOS-XR-a', 'revision': '2019-01-01', 'organization': 'cisco'},
+                        {'name': 'ietf-a', 'revision': '2019-01-01', 'organization': 'ietf'}],
+            'vendors': ['cisco']})
+
+
+def create_response(status_code, body=None):
+    response = mock.MagicMock(status_code=status_code)
+    response.json.return_value = body
+    return response
+
+
+class TestExistingModules(unittest.TestCase):
+
+    def setUp(self):
+        self.modules = [{'name': 'ietf-a', 'revision': '2019-01-01', 'organization': 'ietf'},
+                        {'name': 'ietf-b', 'revision': '2019-01-01', 'organization': 'ietf'}]
+        patcher = mock.patch.object(receiver, 'LOGGER', create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch(self):
+        found = {'yang-catalog:modules': {'module': [self.modules[1]]}, 'not-found': [self.modules[0]]}
+        with mock.patch.object(receiver.requests, 'post', return_value=create_response(200, found)), \
+                mock.patch.object(receiver.requests, 'get') as get:
+            existing = receiver.get_existing_modules('http://api/', self.modules, ['admin', 'admin'])
+        self.assertEqual(existing, {'ietf-b@2019-01-01/ietf'})
+        get.assert_not_called()
+
+    def test_batch_failed(self):
+        def get(url, **kwargs):
+            return create_response(200 if 'ietf-a' in url else 404)
+
+        # one failed request must not make all the modules look new
+        with mock.patch.object(receiver.requests, 'post', return_value=create_response(500)), \
+                mock.patch.object(receiver.requests, 'get', side_effect=get) as get_mock:
+            existing = receiver.get_existing_modules('http://api/', self.modules, ['admin', 'admin'])
+        self.assertEqual(existing, {'ietf-a@2019-01-01/ietf'})
+        self.assertEqual(get_mock.call_args_list[0][0][0], 'http://api/search/modules/ietf-a,2019-01-01,ietf')
@@ -0,0 +1,628 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tests of the API endpoints over a small catalog snapshot. The API is
+imported with its configuration from /etc/yangcatalog/yangcatalog.conf,
+then every test replaces the catalog in use with its own snapshot.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import configparser
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import api.yangCatalogApi as api
+from api.catalogSnapshot import CHUNK_SIZE, CatalogSnapshot, module_signature
+from api.snapshotFile import read_generation, write_snapshot
+
+
+def create_module(name, revision, organization, semver, status='passed', dependencies=None):
+    module = {'name': name, 'revision': revision, 'organization': organization,
+              'namespace': 'urn:{}:{}'.format(organization, name),
+              'schema': 'https://example.com/{}@{}.yang'.format(name, revision),
+              'derived-semantic-version': semver, 'compilation-status': status}
+    if dependencies is not None:
+        module['dependencies'] = [{'name': dependency} for dependency in dependencies]
+    return module
+
+
+def create_catalog():
+    modules = [
+        create_module('ietf-interfaces', '2014-05-08', 'ietf', '1.0.0', dependencies=['ietf-yang-types']),
+        create_module('ietf-interfaces', '2018-02-20', 'ietf', '2.0.0', dependencies=['ietf-yang-types']),
+        create_module('ietf-yang-types', '2013-07-15', 'ietf', '1.0.0'),
+        create_module('example-system', '2019-01-01', 'example', '1.0.0', status='failed',
+                      dependencies=['ietf-interfaces', 'example-missing']),
+    ]
+    return json.dumps({'yang-catalog:catalog': {'modules': {'module': modules},
+                                                'vendors': {'vendor': []}}})
+
+
+class ApiTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.previous_snapshot = api.catalog_snapshot
+        self.previous_check = api.next_snapshot_check
+        # snapshot file of the running API must not replace the test catalog
+        api.next_snapshot_check = float('inf')
+        api.use_snapshot(CatalogSnapshot(self.previous_generation() + 1, create_catalog()))
+        self.client = api.application.test_client()
+
+    def tearDown(self):
+        api.catalog_snapshot = self.previous_snapshot
+        api.next_snapshot_check = self.previous_check
+
+    def previous_generation(self):
+        if self.previous_snapshot is None:
+            return 0
+        return self.previous_snapshot.generation
+
+    def post_json(self, path, body):
+        return self.client.post(path, data=json.dumps(body), content_type='application/json')
+
+
+class TestConditionalRequests(ApiTestCase):
+
+    def test_not_modified(self):
+        response = self.client.get('/search/modules')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual(len(json.loads(response.get_data(as_text=True))['module']), 4)
+        response = self.client.get('/search/modules', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        response = self.client.get('/search/modules', headers={'If-None-Match': 'W/"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_with_new_snapshot(self):
+        etag = self.client.get('/search/modules').headers['ETag']
+        catalog = json.loads(create_catalog())
+        catalog['yang-catalog:catalog']['modules']['module'].pop()
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps(catalog)))
+        response = self.client.get('/search/modules', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.get_data(as_text=True))['module']), 3)
+
+
+class TestModulesBatch(ApiTestCase):
+
+    def test_found_and_not_found(self):
+        response = self.post_json('/search/modules', {'input': {'module': [
+            {'name': 'ietf-yang-types', 'revision': '2013-07-15', 'organization': 'ietf'},
+            {'name': 'ietf-interfaces', 'revision': '2018-02-20', 'organization': 'ietf'},
+            {'name': 'ietf-yang-types', 'revision': '2013-07-15', 'organization': 'ietf'},
+            {'name': 'ietf-yang-types', 'revision': '2010-09-24', 'organization': 'ietf'}]}})
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.get_data(as_text=True))
+        self.assertEqual([(module['name'], module['revision']) for module in body['yang-catalog:modules']['module']],
+                         [('ietf-yang-types', '2013-07-15'), ('ietf-interfaces', '2018-02-20')])
+        self.assertEqual(body['not-found'],
+                         [{'name': 'ietf-yang-types', 'revision': '2010-09-24', 'organization': 'ietf'}])
+
+    def test_bad_input(self):
+        self.assertEqual(self.post_json('/search/modules', {'module': []}).status_code, 400)
+        response = self.post_json('/search/modules', {'input': {'module': [{'name': 'ietf-yang-types'}]}})
+        self.assertEqual(response.status_code, 400)
+
+
+def create_search_row(node, name, revision, organization):
+    return {'node': {'name': node}, 'module': {'name': name, 'revision': revision, 'organization': organization}}
+
+
+class TestFastSearch(ApiTestCase):
+
+    def test_module_metadata(self):
+        rows = [create_search_row('interfaces', 'ietf-interfaces', '2018-02-20', 'ietf'),
+                create_search_row('interface', 'ietf-interfaces', '2018-02-20', 'ietf'),
+                create_search_row('system', 'example-system', '2018-01-01', 'example')]
+        with mock.patch.object(api.inde, 'do_search', return_value=(rows, False)):
+            response = self.post_json('/fast', {'search': 'interface',
+                                                'filter': {'module-metadata': ['name', 'derived-semantic-version']}})
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.get_data(as_text=True))
+        self.assertFalse(body['limit_reched'])
+        self.assertEqual(body['results'], [
+            {'node': {'name': 'interfaces'},
+             'module': {'name': 'ietf-interfaces', 'derived-semantic-version': '2.0.0'}},
+            {'node': {'name': 'interface'},
+             'module': {'name': 'ietf-interfaces', 'derived-semantic-version': '2.0.0'}},
+            {'module': {'error': 'no example-system@2018-01-01 in API'}}])
+
+    def test_missing_search(self):
+        self.assertEqual(self.post_json('/fast', {'filter': {}}).status_code, 400)
+
+
+class TestDependencyClosure(ApiTestCase):
+
+    def test_closure(self):
+        response = self.post_json('/dependency-closure', {'input': {'module': [
+            {'name': 'example-system'}, {'name': 'example-other', 'revision': '2019-01-01'}]}})
+        self.assertEqual(response.status_code, 200)
+        output = json.loads(response.get_data(as_text=True))['output']
+        # imports without revision resolve to the latest revision
+        self.assertEqual([(module['name'], module['revision']) for module in output['module']],
+                         [('example-system', '2019-01-01'), ('ietf-interfaces', '2018-02-20'),
+                          ('ietf-yang-types', '2013-07-15')])
+        self.assertEqual(output['module'][1]['schema'], 'https://example.com/ietf-interfaces@2018-02-20.yang')
+        self.assertEqual(output['not-found'], [{'name': 'example-other', 'revision': '2019-01-01'},
+                                               {'name': 'example-missing', 'revision': None}])
+
+    def test_bad_input(self):
+        self.assertEqual(self.post_json('/dependency-closure', {'input': {}}).status_code, 400)
+        response = self.post_json('/dependency-closure', {'input': {'module': [{'revision': '2019-01-01'}]}})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestModuleSetComparison(ApiTestCase):
+
+    def output(self, path, body):
+        response = self.post_json(path, {'input': body})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.get_data(as_text=True))['output']
+
+    def test_get_common(self):
+        output = self.output('/get-common', {'first': {'organization': 'ietf'}, 'second': {'name': 'ietf-interfaces'}})
+        # every common name is sent only once
+        self.assertEqual([(module['name'], module['revision']) for module in output],
+                         [('ietf-interfaces', '2014-05-08')])
+        response = self.post_json('/get-common', {'input': {'first': {'organization': 'example'},
+                                                            'second': {'organization': 'ietf'}}})
+        self.assertEqual(response.status_code, 404)
+
+    def test_compare(self):
+        output = self.output('/compare', {'old': {'revision': '2014-05-08'},
+                                          'new': {'name': 'ietf-interfaces', 'revision': '2018-02-20'}})
+        self.assertEqual([(module['name'], module['reason-to-show']) for module in output],
+                         [('ietf-interfaces', 'Different revision')])
+        output = self.output('/compare', {'old': {'organization': 'ietf'}, 'new': {'organization': 'example'}})
+        self.assertEqual([(module['name'], module['reason-to-show']) for module in output],
+                         [('example-system', 'New module')])
+        # modules of the snapshot are not changed by the response
+        module = api.get_catalog_snapshot().get_module('example-system', '2019-01-01', 'example')
+        self.assertNotIn('reason-to-show', module)
+
+    def test_check_semantic_version(self):
+        output = self.output('/check-semantic-version', {'old': {'revision': '2014-05-08'},
+                                                         'new': {'revision': '2018-02-20'}})
+        self.assertEqual(len(output), 1)
+        self.assertEqual(output[0]['name'], 'ietf-interfaces')
+        self.assertEqual(output[0]['revision-old'], '2014-05-08')
+        self.assertEqual(output[0]['revision-new'], '2018-02-20')
+        self.assertEqual(output[0]['old-derived-semantic-version'], '1.0.0')
+        self.assertEqual(output[0]['new-derived-semantic-version'], '2.0.0')
+        self.assertTrue(output[0]['derived-semantic-version-results'].startswith('pyang --check-update-from output'))
+        self.assertNotIn('check-update-from-output', output[0])
+        response = self.post_json('/check-semantic-version', {'input': {'old': {'revision': '2018-02-20'},
+                                                                        'new': {'revision': '2018-02-20'}}})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestModuleFiles(ApiTestCase):
+
+    def setUp(self):
+        super(TestModuleFiles, self).setUp()
+        self.previous_dirs = api.application.save_file_dir, api.application.accel_redirect
+        api.application.save_file_dir = tempfile.mkdtemp()
+        api.application.accel_redirect = ''
+        with open(os.path.join(api.application.save_file_dir, 'example-system@2019-01-01.yang'), 'w') as f:
+            f.write('module example-system {\n  description "<b>&</b>";\n}\n')
+
+    def tearDown(self):
+        shutil.rmtree(api.application.save_file_dir)
+        api.application.save_file_dir, api.application.accel_redirect = self.previous_dirs
+        super(TestModuleFiles, self).tearDown()
+
+    def test_reference(self):
+        response = self.client.get('/services/reference/example-system@2019-01-01.yang')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True),
+                         '<html><body><pre>module example-system {\n  description &quot;&lt;b&gt;&amp;&lt;/b&gt;&quot;;'
+                         '\n}\n</pre></body></html>')
+        response = self.client.get('/services/reference/example-system@2019-01-01.yang',
+                                   headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_tree_of_missing_module(self):
+        # html templates are read from the working directory of the API
+        working_directory = os.getcwd()
+        os.chdir(os.path.dirname(api.__file__))
+        self.addCleanup(os.chdir, working_directory)
+        response = self.client.get('/services/tree/example-system@2018-01-01.yang')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('alert-danger', response.get_data(as_text=True))
+
+    def test_download(self):
+        response = self.client.get('/services/download/example-system@2019-01-01.yang')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('example-system@2019-01-01.yang', response.headers['Content-Disposition'])
+        self.assertEqual(response.get_data(as_text=True), 'module example-system {\n  description "<b>&</b>";\n}\n')
+        response.close()
+        response = self.client.get('/services/download/example-system@2019-01-01.yang',
+                                   headers={'Range': 'bytes=0-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.get_data(as_text=True), 'module')
+        response.close()
+        response = self.client.get('/services/download/example-system@2018-01-01.yang')
+        self.assertEqual(response.status_code, 404)
+
+    def test_download_by_web_server(self):
+        api.application.accel_redirect = '/internal/yang'
+        response = self.client.get('/services/download/example-system@2019-01-01.yang')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Accel-Redirect'], '/internal/yang/example-system@2019-01-01.yang')
+        self.assertEqual(response.get_data(), b'')
+
+
+class TestProcesses(ApiTestCase):
+
+    def setUp(self):
+        super(TestProcesses, self).setUp()
+        self.previous_settings = (api.application.snapshot_file, api.application.api_processes, api.checked_file_id)
+        self.directory = tempfile.mkdtemp()
+        api.application.snapshot_file = os.path.join(self.directory, 'catalog.snap')
+
+    def tearDown(self):
+        api.application.snapshot_file, api.application.api_processes, api.checked_file_id = self.previous_settings
+        shutil.rmtree(self.directory)
+        super(TestProcesses, self).tearDown()
+
+    def test_per_process(self):
+        config = configparser.ConfigParser()
+        config.read_string('[API-Section]\npyang-workers = 2\n')
+        api.application.api_processes = 4
+        self.assertEqual(api.application.per_process(config, 'pyang-workers', 2), 1)
+        self.assertEqual(api.application.per_process(config, 'tree-cache-size', 1000), 250)
+
+    def test_snapshot_of_other_process(self):
+        generation = api.catalog_snapshot.generation + 5
+        write_snapshot(CatalogSnapshot(generation, create_catalog()), api.application.snapshot_file)
+        with api.lock_for_load:
+            api.attach_latest()
+        self.assertEqual(api.catalog_snapshot.generation, generation)
+        # older snapshot file does not replace the snapshot in use
+        write_snapshot(CatalogSnapshot(generation - 1, create_catalog()), api.application.snapshot_file)
+        with api.lock_for_load:
+            api.attach_latest()
+        self.assertEqual(api.catalog_snapshot.generation, generation)
+
+    def test_snapshot_file_current(self):
+        self.assertFalse(api.snapshot_file_current())
+        write_snapshot(CatalogSnapshot(1, create_catalog()), api.application.snapshot_file)
+        self.assertTrue(api.snapshot_file_current())
+        # file left from before the start may miss changes
+        earlier = api.process_started - 10
+        os.utime(api.application.snapshot_file, (earlier, earlier))
+        self.assertFalse(api.snapshot_file_current())
+
+    def test_load_from_file(self):
+        generation = api.catalog_snapshot.generation + 5
+        write_snapshot(CatalogSnapshot(generation, create_catalog()), api.application.snapshot_file)
+        with mock.patch.object(api, 'make_cache') as make_cache:
+            api.load(False)
+        self.assertFalse(make_cache.called)
+        self.assertEqual(api.catalog_snapshot.generation, generation)
+        # bodies of the snapshot read from the file are sent from the mapped file
+        response = self.client.get('/search/modules/ietf-yang-types,2013-07-15,ietf')
+        self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+        self.assertEqual(json.loads(response.get_data(as_text=True))['module'][0]['name'], 'ietf-yang-types')
+
+    def test_load_stale_file(self):
+        generation = api.catalog_snapshot.generation + 5
+        write_snapshot(CatalogSnapshot(generation, create_catalog()), api.application.snapshot_file)
+        earlier = api.process_started - 10
+        os.utime(api.application.snapshot_file, (earlier, earlier))
+        with mock.patch.object(api, 'make_cache', return_value=create_catalog()) as make_cache:
+            api.load(False)
+        self.assertTrue(make_cache.called)
+        self.assertEqual(api.catalog_snapshot.generation, generation + 1)
+        self.assertEqual(read_generation(api.application.snapshot_file), generation + 1)
+
+    def test_load_on_change(self):
+        generation = api.catalog_snapshot.generation + 5
+        write_snapshot(CatalogSnapshot(generation, create_catalog()), api.application.snapshot_file)
+        with mock.patch.object(api, 'make_cache', return_value=create_catalog()) as make_cache:
+            api.load(True)
+        self.assertTrue(make_cache.called)
+        self.assertEqual(api.catalog_snapshot.generation, generation + 1)
+
+class TestSearch(ApiTestCase):
+
+    def search_names(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [(module['name'], module['revision'])
+                for module in json.loads(response.get_data(as_text=True))['yang-catalog:modules']['module']]
+
+    def test_search(self):
+        self.assertEqual(self.search_names('/search/organization/ietf'),
+                         [('ietf-interfaces', '2014-05-08'), ('ietf-interfaces', '2018-02-20'),
+                          ('ietf-yang-types', '2013-07-15')])
+        self.assertEqual(self.search_names('/search/compilation-status/failed'),
+                         [('example-system', '2019-01-01')])
+        self.assertEqual(self.client.get('/search/organization/cisco').status_code, 404)
+        self.assertEqual(self.client.get('/search/platform/asr9k').status_code, 400)
+
+    def test_search_nested_key(self):
+        catalog = json.loads(create_catalog())
+        catalog['yang-catalog:catalog']['modules']['module'][2]['ietf'] = {'ietf-wg': 'netmod'}
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps(catalog)))
+        self.assertEqual(self.search_names('/search/ietf/ietf-wg/netmod'), [('ietf-yang-types', '2013-07-15')])
+        self.assertEqual(self.client.get('/search/ietf/ietf-wg/netconf').status_code, 404)
+
+
+class TestSearchFilter(ApiTestCase):
+
+    def setUp(self):
+        super(TestSearchFilter, self).setUp()
+        catalog = json.loads(create_catalog())
+        catalog['yang-catalog:catalog']['modules']['module'][1]['implementations'] = {'implementation': [
+            {'vendor': 'cisco', 'platform': 'asr9k', 'software-version': '6.5.1'},
+            {'vendor': 'juniper', 'platform': 'mx', 'software-version': '18.1'}]}
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps(catalog)))
+
+    def filter_names(self, rpc_input):
+        response = self.post_json('/search-filter', {'input': rpc_input})
+        if response.status_code == 404:
+            return []
+        self.assertEqual(response.status_code, 200)
+        return [(module['name'], module['revision'])
+                for module in json.loads(response.get_data(as_text=True))['yang-catalog:modules']['module']]
+
+    def test_leafs(self):
+        self.assertEqual(self.filter_names({'name': 'ietf-interfaces', 'revision': '2018-02-20'}),
+                         [('ietf-interfaces', '2018-02-20')])
+        self.assertEqual(self.filter_names({'organization': 'ietf', 'compilation-status': 'failed'}), [])
+        self.assertEqual(self.post_json('/search-filter', {'name': 'ietf-interfaces'}).status_code, 400)
+
+    def test_partial(self):
+        self.assertEqual(self.filter_names({'partial': True, 'name': 'interfaces'}),
+                         [('ietf-interfaces', '2014-05-08'), ('ietf-interfaces', '2018-02-20')])
+        self.assertEqual(self.filter_names({'partial': False, 'name': 'interfaces'}), [])
+
+    def test_items_without_revision(self):
+        self.assertEqual(self.filter_names({'dependencies': [{'name': 'ietf-yang-types'}]}),
+                         [('ietf-interfaces', '2014-05-08'), ('ietf-interfaces', '2018-02-20')])
+        # dependencies of the catalog have no revision, so they do not match one
+        self.assertEqual(self.filter_names({'dependencies': [{'name': 'ietf-yang-types',
+                                                              'revision': '2013-07-15'}]}), [])
+
+    def test_implementations(self):
+        self.assertEqual(self.filter_names({'implementations': {'implementation': [
+            {'vendor': 'juniper', 'platform': 'mx'}]}}), [('ietf-interfaces', '2018-02-20')])
+        # every leaf has to be satisfied by the same implementation
+        self.assertEqual(self.filter_names({'implementations': {'implementation': [
+            {'vendor': 'cisco', 'platform': 'mx'}]}}), [])
+
+
+class TestSearchModule(ApiTestCase):
+
+    def test_module(self):
+        response = self.client.get('/search/modules/ietf-yang-types,2013-07-15,ietf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+        self.assertEqual(response.get_data(),
+                         api.catalog_snapshot.module_response[module_signature('ietf-yang-types', '2013-07-15', 'ietf')])
+        module = json.loads(response.get_data(as_text=True))['module'][0]
+        self.assertEqual((module['name'], module['revision']), ('ietf-yang-types', '2013-07-15'))
+        self.assertEqual(self.client.get('/search/modules/ietf-yang-types,2010-09-24,ietf').status_code, 404)
+
+    def test_compressed_module(self):
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, create_catalog(), True))
+        plain = self.client.get('/search/modules/ietf-yang-types,2013-07-15,ietf').get_data()
+        response = self.client.get('/search/modules/ietf-yang-types,2013-07-15,ietf',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), plain)
+        response = self.client.get('/search/modules/ietf-yang-types,2013-07-15,ietf',
+                                   headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data(), plain)
+
+
+def create_vendors():
+    return {'vendor': [
+        {'name': 'cisco', 'platforms': {'platform': [
+            {'name': 'asr9k', 'software-versions': {'software-version': [
+                {'name': '631', 'software-flavors': {'software-flavor': [
+                    {'name': 'ALL', 'modules': {'module': [
+                        {'name': 'ietf-interfaces', 'revision': '2018-02-20',
+                         'organization': 'ietf', 'os-type': 'IOS-XR'}]}}]}}]}}]}}]}
+
+
+class TestBulkResponses(ApiTestCase):
+
+    def setUp(self):
+        super(TestBulkResponses, self).setUp()
+        self.catalog = json.loads(create_catalog())
+        self.catalog['yang-catalog:catalog']['vendors'] = create_vendors()
+        # description bigger than a chunk makes the body to be sent in several pieces
+        self.catalog['yang-catalog:catalog']['modules']['module'][2]['description'] = 'x' * (CHUNK_SIZE + 10)
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps(self.catalog)))
+
+    def get_json(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+        return json.loads(response.get_data(as_text=True))
+
+    def test_modules(self):
+        self.assertEqual(self.get_json('/search/modules'), self.catalog['yang-catalog:catalog']['modules'])
+
+    def test_vendors(self):
+        self.assertEqual(self.get_json('/search/vendors'), self.catalog['yang-catalog:catalog']['vendors'])
+
+    def test_catalog(self):
+        self.assertEqual(self.get_json('/search/catalog'), self.catalog)
+
+    def test_empty_catalog(self):
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps({})))
+        self.assertEqual(self.client.get('/search/modules').status_code, 404)
+        self.assertEqual(self.client.get('/search/vendors').status_code, 404)
+        self.assertEqual(self.client.get('/search/catalog').status_code, 404)
+
+
+class TestLatestRevision(ApiTestCase):
+
+    def get_names(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [(module['name'], module['revision']) for module in json.loads(response.get_data(as_text=True))]
+
+    def test_modules(self):
+        self.assertEqual(self.get_names(self.client.get('/search/modules?latest-revision=True')),
+                         [('example-system', '2019-01-01'), ('ietf-interfaces', '2018-02-20'),
+                          ('ietf-yang-types', '2013-07-15')])
+
+    def test_search(self):
+        self.assertEqual(self.get_names(self.client.get('/search/organization/ietf?latest-revision=True')),
+                         [('ietf-interfaces', '2018-02-20'), ('ietf-yang-types', '2013-07-15')])
+        self.assertEqual(self.get_names(self.client.get('/search/revision/2014-05-08?latest-revision=True')),
+                         [('ietf-interfaces', '2014-05-08')])
+
+    def test_search_filter(self):
+        response = self.post_json('/search-filter?latest-revision=True', {'input': {'name': 'ietf-interfaces'}})
+        self.assertEqual(self.get_names(response), [('ietf-interfaces', '2018-02-20')])
+
+    def test_module(self):
+        response = self.client.get('/search/modules/ietf-interfaces,2014-05-08,ietf?latest-revision=True')
+        self.assertEqual(self.get_names(response), [('ietf-interfaces', '2014-05-08')])
+
+
+class TestSearchFilterLeaf(ApiTestCase):
+
+    def get_values(self, leaf, rpc_input):
+        response = self.post_json('/search-filter/{}'.format(leaf), {'input': rpc_input})
+        self.assertEqual(response.status_code, 201)
+        return sorted(json.loads(response.get_data(as_text=True))['output'][leaf])
+
+    def test_leaf(self):
+        self.assertEqual(self.get_values('revision', {'name': 'ietf-interfaces'}), ['2014-05-08', '2018-02-20'])
+        self.assertEqual(self.post_json('/search-filter/name', {'input': {'name': 'ietf-routing'}}).status_code,
+                         404)
+        self.assertEqual(self.post_json('/search-filter/name', {'name': 'ietf-interfaces'}).status_code, 404)
+
+    def test_recursive(self):
+        self.assertEqual(self.get_values('name', {'name': 'ietf-yang-types', 'recursive': True}),
+                         ['example-system', 'ietf-interfaces', 'ietf-yang-types'])
+        self.assertEqual(self.get_values('organization', {'name': 'ietf-yang-types', 'recursive': True}),
+                         ['example', 'ietf'])
+        self.assertEqual(self.get_values('name', {'name': 'example-system', 'recursive': True}),
+                         ['example-system'])
+        self.assertEqual(self.post_json('/search-filter/name', {'input': {'recursive': True}}).status_code, 404)
+
+
+def create_response(status_code, body=None):
+    response = mock.Mock(status_code=status_code)
+    response.text = json.dumps(body)
+    return response
+
+
+class TestLoadDelta(ApiTestCase):
+
+    def setUp(self):
+        super(TestLoadDelta, self).setUp()
+        self.previous_settings = (api.application.snapshot_file, api.application.delta_load_limit,
+                                  api.checked_file_id)
+        self.directory = tempfile.mkdtemp()
+        api.application.snapshot_file = os.path.join(self.directory, 'catalog.snap')
+        api.application.delta_load_limit = 5
+        self.confd = {}
+
+    def tearDown(self):
+        api.application.snapshot_file, api.application.delta_load_limit, api.checked_file_id = self.previous_settings
+        shutil.rmtree(self.directory)
+        super(TestLoadDelta, self).tearDown()
+
+    def get_from_confd(self, path):
+        return self.confd.get(path.split('/api/config/catalog/')[-1], create_response(404))
+
+    def load_delta(self, modules, vendors):
+        with mock.patch.object(api.requests.Session, 'get', side_effect=self.get_from_confd) as get, \
+                mock.patch.object(api, 'load') as load:
+            api.load_delta(modules, vendors)
+        return get, load
+
+    def test_patch(self):
+        generation = api.catalog_snapshot.generation
+        module = create_module('ietf-yang-types', '2013-07-15', 'ietf', '1.0.0')
+        module['description'] = 'changed'
+        self.confd['modules/module/ietf-yang-types,2013-07-15,ietf?deep'] = \
+            create_response(200, {'yang-catalog:module': module})
+        self.confd['vendors/vendor/cisco?deep'] = \
+            create_response(200, {'yang-catalog:vendor': create_vendors()['vendor'][0]})
+        _, load = self.load_delta([{'name': 'ietf-yang-types', 'revision': '2013-07-15', 'organization': 'ietf'},
+                                   {'name': 'example-system', 'revision': '2019-01-01', 'organization': 'example'}],
+                                  ['cisco'])
+        self.assertFalse(load.called)
+        self.assertGreater(api.catalog_snapshot.generation, generation)
+        modules = json.loads(self.client.get('/search/modules').get_data(as_text=True))['module']
+        self.assertEqual([(module['name'], module['revision']) for module in modules],
+                         [('ietf-interfaces', '2014-05-08'), ('ietf-interfaces', '2018-02-20'),
+                          ('ietf-yang-types', '2013-07-15')])
+        self.assertEqual(modules[2]['description'], 'changed')
+        vendors = json.loads(self.client.get('/search/vendors').get_data(as_text=True))
+        self.assertEqual([vendor['name'] for vendor in vendors['vendor']], ['cisco'])
+        # patched snapshot is published for the other processes
+        self.assertEqual(read_generation(api.application.snapshot_file), api.catalog_snapshot.generation)
+
+    def test_over_limit(self):
+        api.application.delta_load_limit = 1
+        get, load = self.load_delta([{'name': 'ietf-yang-types', 'revision': '2013-07-15', 'organization': 'ietf'}],
+                                    ['cisco'])
+        self.assertFalse(get.called)
+        load.assert_called_once_with(True)
+
+    def test_confd_failure(self):
+        generation = api.catalog_snapshot.generation
+        self.confd['vendors/vendor/cisco?deep'] = create_response(500)
+        _, load = self.load_delta([], ['cisco'])
+        load.assert_called_once_with(True)
+        self.assertEqual(api.catalog_snapshot.generation, generation)
+
+
+class TestStatistics(ApiTestCase):
+
+    def setUp(self):
+        super(TestStatistics, self).setUp()
+        catalog = json.loads(create_catalog())
+        catalog['yang-catalog:catalog']['modules']['module'].append(
+            create_module('Cisco-IOS-XR-ip-domain-cfg', '2015-05-13', 'cisco', '1.0.0'))
+        catalog['yang-catalog:catalog']['vendors'] = create_vendors()
+        api.use_snapshot(CatalogSnapshot(api.catalog_snapshot.generation + 1, json.dumps(catalog)))
+
+    def test_contributors(self):
+        response = self.client.get('/contributors')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+        self.assertIn('ETag', response.headers)
+        # example organization is not listed
+        self.assertEqual(json.loads(response.get_data(as_text=True)), {'contributors': ['cisco', 'ietf']})
+
+    def test_vendor_statistics(self):
+        response = self.client.get('/search/vendor/cisco')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response.headers)
+        self.assertEqual(json.loads(response.get_data(as_text=True)), {'IOS-XR': {'631': ['asr9k']}})
+        self.assertEqual(self.client.get('/search/vendor/juniper').status_code, 404)
@@ -44,36 +44,43 @@ import collections
 import errno
 import grp
 import hashlib
+import io
 import json
-import math
 import os
 import pwd
 import re
 import shutil
-import subprocess
 import sys
+import time
 import uuid
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from threading import Lock
+from html import escape
+from threading import Lock, Thread
 
 import MySQLdb
 import jinja2
 import requests
-import uwsgi as uwsgi
 from OpenSSL.crypto import FILETYPE_PEM, X509, load_publickey, verify
-from flask import Flask, Response, abort, jsonify, make_response, redirect, request
+from flask import (Flask, Response, abort, g, has_request_context, jsonify, make_response, redirect, request,
+                   send_file)
 from flask_cors import CORS
 from flask_httpauth import HTTPBasicAuth
 from flask_wtf.csrf import CSRFProtect
-from pyang.plugins.tree import emit_tree
 
 import api.yangSearch.elasticsearchIndex as inde
 import utility.log as log
+from api.catalogSnapshot import (CHUNK_SIZE, ENCODINGS, SEARCH_KEYS, CatalogSnapshot, join_chunks,
+                                 module_signature, split_chunks)
+from api.filterPlan import FilterPlan
 from api.sender import Sender
+from api.snapshotFile import read_file_id, read_generation, read_snapshot, snapshot_lock, write_snapshot
 from utility import messageFactory, repoutil, yangParser
+from utility.diffCache import MODES, SIDE_BY_SIDE, DiffCache, render_diff
+from utility.mysqlPool import CredentialCache, get_pool
+from utility.pyangPool import PyangPool, PyangPoolException, check_update_from_batch_job, diff_tree_job
+from utility.treeCache import TreeCache
 from utility.util import get_curr_dir
-from utility.yangParser import create_context
 
 if sys.version_info >= (3, 4):
     import configparser as ConfigParser
@@ -88,10 +95,19 @@ yang_models_url = github_repos_url + '/YangModels/yang'
 
 auth = HTTPBasicAuth()
 
+# namespaces of the modules generated from MIBs
+MIB_NAMESPACE = re.compile('yang:smiv2:')
+# GET endpoints that only read the catalog snapshot. Their responses are
+# validated with ETag and Last-Modified of the snapshot.
+CACHED_ENDPOINTS = ['search', 'search_module', 'get_modules', 'get_vendors', 'get_catalog',
+                    'search_vendor_statistics', 'get_organizations']
+# number of parallel requests to confd while loading changes only
+FETCH_WORKERS = 8
+
+
 class MyFlask(Flask):
 
     def __init__(self, import_name):
-        self.loading = True
         super(MyFlask, self).__init__(import_name)
         self.response = None
         self.ys_set = 'set'
@@ -118,7 +134,6 @@ class MyFlask(Flask):
         self.temp_dir = config.get('Directory-Section', 'temp')
         self.integrity_file_location = config.get('API-Section',
                                              'integrity-file-location')
-        self.diff_file_dir = config.get('Web-Section', 'save-diff-dir')
         self.ip = config.get('API-Section', 'ip')
         self.api_port = int(config.get('General-Section', 'api-port'))
         self.api_protocol = config.get('General-Section', 'protocol-api')
@@ -127,10 +142,36 @@ class MyFlask(Flask):
         self.config_email = config.get('General-Section', 'repo-config-email')
         self.ys_users_dir = config.get('Directory-Section', 'ys_users')
         self.my_uri = config.get('Web-Section', 'my_uri')
+        # internal location of the web server that serves files of save_file_dir
+        self.accel_redirect = config.get('Web-Section', 'x-accel-redirect', fallback='')
         self.yang_models = config.get('Directory-Section', 'yang_models_dir')
         self.es_host = config.get('DB-Section', 'es-host')
         self.es_port = config.get('DB-Section', 'es-port')
         self.es_protocol = config.get('DB-Section', 'es-protocol')
+        self.compress_cache = config.get('API-Section', 'compress-cache', fallback='True')
+        self.snapshot_file = config.get('Directory-Section', 'catalog-snapshot',
+                                        fallback=self.temp_dir + '/catalog.snap')
+        # pyang workers and cached trees and diffs are configured for the whole
+        # server and divided among its processes since none of them is shared
+        self.api_processes = int(config.get('API-Section', 'processes',
+                                            fallback=os.environ.get('UWSGI_PROCS', '1')))
+        self.pyang_pool = PyangPool('{}:{}'.format(self.yang_models, self.save_file_dir),
+                                    processes=self.per_process(config, 'pyang-workers', 2),
+                                    max_queue=int(config.get('API-Section', 'pyang-queue', fallback='20')),
+                                    timeout=int(config.get('API-Section', 'pyang-timeout', fallback='120')),
+                                    changed_file='{}/modules-changed'.format(self.temp_dir))
+        self.tree_cache = TreeCache('{}:{}'.format(self.yang_models, self.save_file_dir),
+                                    config.get('Directory-Section', 'tree-cache',
+                                               fallback=self.temp_dir + '/trees'),
+                                    max_items=self.per_process(config, 'tree-cache-size', 1000),
+                                    pool=self.pyang_pool, changed_file='{}/modules-changed'.format(self.temp_dir))
+        self.credential_cache = CredentialCache(get_pool(self.dbHost, self.dbName, self.dbUser, self.dbPass),
+                                                int(config.get('API-Section', 'credential-ttl', fallback='60')),
+                                                '{}/users-changed'.format(self.temp_dir))
+        self.snapshot_check_interval = int(config.get('API-Section', 'snapshot-check-interval', fallback='5'))
+        self.delta_load_limit = int(config.get('API-Section', 'delta-load-limit', fallback='200'))
+        self.diff_cache = DiffCache(self.per_process(config, 'diff-cache-size', 200),
+                                    changed_file='{}/modules-changed'.format(self.temp_dir))
         self.rabbitmq_host = config.get('RabbitMQ-Section', 'host', fallback='127.0.0.1')
         self.rabbitmq_port = int(config.get('RabbitMQ-Section', 'port', fallback='5672'))
         self.rabbitmq_virtual_host = config.get('RabbitMQ-Section', 'virtual_host', fallback='/')
@@ -157,129 +198,51 @@ class MyFlask(Flask):
         self.LOGGER = log.get_logger('api', log_directory + '/yang.log')
         self.LOGGER.debug('Starting api')
 
+    def per_process(self, config, option, default):
+        """Get share of one process of the server from API-Section option
+                Arguments:
+                    :param config: (ConfigParser) configuration of the API
+                    :param option: (str) name of the option for the whole server
+                    :param default: (int) value for the whole server if not configured
+                    :return value for this process, at least 1
+        """
+        total = int(config.get('API-Section', option, fallback=str(default)))
+        return max(1, total // self.api_processes)
+
     def process_response(self, response):
         response.headers['Access-Control-Allow-Headers'] = 'content-type'
+        if self.is_cached_request() and response.status_code in (200, 304):
+            snapshot = get_catalog_snapshot()
+            # weak validator since the same data are sent in several content codings
+            response.set_etag(snapshot.etag, weak=True)
+            response.last_modified = snapshot.created
         self.response = response
-        self.create_response_only_latest_revision()
         #self.create_response_with_yangsuite_link()
 
         self.LOGGER.debug(response.headers)
         return self.response
 
     def preprocess_request(self):
-        if self.loading:
+        follow_snapshot_file()
+        # every request works with one snapshot even if cache is reloaded in the
+        # meantime. The global is read only once so no lock is needed
+        snapshot = catalog_snapshot
+        if snapshot is None:
             message = json.dumps({'Error': 'Server is loading. This can take several minutes. Please try again later'})
             return create_response(message, 503)
+        g.catalog_snapshot = snapshot
+        if self.is_cached_request():
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(snapshot.etag)
+            elif request.if_modified_since:
+                not_modified = request.if_modified_since >= snapshot.created
+            else:
+                not_modified = False
+            if not_modified:
+                return Response(status=304)
 
-    def create_response_only_latest_revision(self):
-        if request.args.get('latest-revision'):
-            if 'True' == request.args.get('latest-revision'):
-                if self.response.data:
-                        if sys.version_info >= (3, 4):
-                            decoded_string = self.response.data.decode(encoding='utf-8', errors='strict')
-                        else:
-                            decoded_string = self.response.data
-                        json_data = json.JSONDecoder(object_pairs_hook=collections.OrderedDict).decode(decoded_string)
-                else:
-                    return self.response
-                modules = None
-                if json_data.get('yang-catalog:modules') is not None:
-                    if json_data.get('yang-catalog:modules').get(
-                            'module') is not None:
-                        modules = json_data.get('yang-catalog:modules').get(
-                            'module')
-                elif json_data.get('module') is not None:
-                    modules = json_data.get('module')
-                modules_to_remove = []
-                if modules:
-                    if len(modules) > 0:
-                        newlist = sorted(modules, key=lambda k: k['name'])
-                        temp_module = None
-                        i = 0
-                        for mod in newlist:
-                            name = mod['name']
-                            if temp_module:
-                                if temp_module['name'] == name:
-                                    revisions = []
-                                    mod['index'] = i
-                                    year = int(temp_module['revision'].split('-')[0])
-                                    month = int(temp_module['revision'].split('-')[1])
-                                    day = int(temp_module['revision'].split('-')[2])
-                                    try:
-                                        revisions.append(datetime(year, month, day))
-                                    except ValueError:
-                                        if day == 29 and month == 2:
-                                            revisions.append(datetime(year, month, 28))
-                                    year = int(mod['revision'].split('-')[0])
-                                    month = int(mod['revision'].split('-')[1])
-                                    day = int(mod['revision'].split('-')[2])
-                                    try:
-                                        revisions.append(datetime(year, month, day))
-                                    except ValueError:
-                                        if day == 29 and month == 2:
-                                            revisions.append(datetime(year, month, 28))
-                                    latest = revisions.index(max(revisions))
-                                    if latest == 0:
-                                        modules_to_remove.append(mod['index'])
-                                    elif latest == 1:
-                                        modules_to_remove.append(temp_module['index'])
-                                else:
-                                    mod['index'] = i
-                                    temp_module = mod
-                            else:
-                                mod['index'] = i
-                                temp_module = mod
-                            i += 1
-                        for mod_to_remove in reversed(modules_to_remove):
-                            newlist.remove(newlist[mod_to_remove])
-                        for mod in newlist:
-                            if mod.get('index'):
-                                del mod['index']
-                        self.response.data = json.dumps(newlist)
-
-    def get_dependencies(self, mod, mods, inset):
-        if mod.get('dependencies'):
-            for dep in mod['dependencies']:
-                if dep['name'] in inset:
-                    continue
-                if dep.get('revision'):
-                    mods.add(dep['name'] + '@' + dep[
-                        'revision'] + '.yang')
-                    inset.add(dep['name'])
-                    search_filter = json.dumps({
-                        'input': {
-                            'name': dep['name'],
-                            'revision': dep['revision']
-                        }
-                    })
-                    rp = requests.post('{}/search-filter'.format(
-                        self.yangcatalog_api_prefix), search_filter,
-                        headers={
-                            'Content-type': 'application/json',
-                            'Accept': 'application/json'}
-                    )
-                    mo = rp.json()['yang-catalog:modules']['module'][0]
-                    self.get_dependencies(mo, mods, inset)
-                else:
-                    rp = requests.get('{}/search/name/{}'
-                                      .format(self.yangcatalog_api_prefix,
-                                              dep['name']))
-                    if rp.status_code == 404:
-                        continue
-                    mo = rp.json()['yang-catalog:modules']['module']
-                    revisions = []
-                    for m in mo:
-                        revision = m['revision']
-                        year = int(revision.split('-')[0])
-                        month = int(revision.split('-')[1])
-                        day = int(revision.split('-')[2])
-                        revisions.append(datetime(year, month, day))
-                    latest = revisions.index(max(revisions))
-                    inset.add(dep['name'])
-                    mods.add('{}@{}.yang'.format(dep['name'],
-                                                 mo[latest][
-                                                     'revision']))
-                    self.get_dependencies(mo[latest], mods, inset)
+    def is_cached_request(self):
+        return request.method == 'GET' and request.endpoint in CACHED_ENDPOINTS
 
     def create_response_with_yangsuite_link(self):
         if request.headers.environ.get('HTTP_YANGSUITE'):
@@ -313,31 +276,28 @@ class MyFlask(Flask):
                     # be happy if someone already created the path
                     if e.errno != errno.EEXIST:
                         return 'Server error - could not create directory'
-                mods = set()
                 inset = set()
                 if len(modules) == 1:
                     defmod = modules[0]['name']
-                for mod in modules:
-                    name = mod['name']
-                    if name in inset:
-                        continue
-                    name += '@{}.yang'.format(mod['revision'])
-                    mods.add(name)
-                    inset.add(mod['name'])
-                    self.get_dependencies(mod, mods, inset)
+                snapshot = get_catalog_snapshot()
+                closure, missing = snapshot.dependency_closure(
+                    [module_signature(mod['name'], mod['revision'], mod['organization']) for mod in modules],
+                    inset)
                 if (('openconfig-interfaces' in inset
                     or 'ietf-interfaces' in inset)
-                    and 'iana-if-type' not in inset):
-                    resp = requests.get(
-                        '{}search/name/iana-if-type?latest-revision=True'.format(self.yangcatalog_api_prefix),
-                        headers={
-                            'Content-type': 'application/json',
-                            'Accept': 'application/json'})
-                    name = '{}@{}.yang'.format(resp.json()[0]['name'],
-                                               resp.json()[0]['revision'])
-                    mods.add(name)
-                    inset.add(resp.json()[0]['name'])
-                    self.get_dependencies(resp.json()[0], mods, inset)
+                    and 'iana-if-type' not in inset
+                        and 'iana-if-type' in snapshot.latest_revision):
+                    iana_closure, iana_missing = snapshot.dependency_closure(
+                        [snapshot.latest_revision['iana-if-type']], inset)
+                    closure.extend(iana_closure)
+                    missing.extend(iana_missing)
+                mods = set()
+                for signature in closure:
+                    mod = snapshot.modules_by_signature[signature]
+                    mods.add('{}@{}.yang'.format(mod['name'], mod['revision']))
+                for dependency in missing:
+                    if dependency['revision']:
+                        mods.add('{}@{}.yang'.format(dependency['name'], dependency['revision']))
 
                 modules = []
                 for mod in mods:
@@ -385,9 +345,17 @@ application = MyFlask(__name__)
 CORS(application)
 csrf = CSRFProtect(application)
 # monitor(application)              # to monitor requests using prometheus
-lock_uwsgi_cache1 = Lock()
-lock_uwsgi_cache2 = Lock()
 lock_for_load = Lock()
+# decoded catalog data shared by all the requests. It is replaced as a whole
+# on every cache load and never modified in place, so readers do not lock it.
+# lock_for_load only keeps two loads from building snapshots at the same time
+catalog_snapshot = None
+# id of the last snapshot file this process has read and time of the next
+# check whether other process has published a new one
+checked_file_id = None
+next_snapshot_check = 0
+# snapshot files saved before this time are not used at start
+process_started = time.time()
 
 NS_MAP = {
     "http://cisco.com/": "cisco",
@@ -397,37 +365,27 @@ NS_MAP = {
     "http://yang.juniper.net/": "juniper"
 }
 
-def make_cache(credentials, response, cache_chunks, main_cache, is_uwsgi=True, data=None):
+
+def make_cache(credentials):
     """After we delete or add modules we need to reload all the modules to the file
     for quicker search. This module is then loaded to the memory.
             Arguments:
-                :param response: (str) Contains string 'work' which will be sent back if
-                    everything went through fine
                 :param credentials: (list) Basic authorization credentials - username, password
                     respectively
-                :return 'work' if everything went through fine otherwise send back the reason
-                    why it failed.
+                :return text of the whole catalog or None if it could not be downloaded
     """
     try:
-        if data is None:
-            path = application.protocol + '://' + application.confd_ip + ':' + repr(application.confdPort) + '/api/config/catalog?deep'
-            data = requests.get(path, auth=(credentials[0], credentials[1]),
-                                headers={'Accept': 'application/vnd.yang.data+json'}).text
-
-        if is_uwsgi == 'True':
-            chunks = int(math.ceil(len(data)/float(64000)))
-            for i in range(0, chunks, 1):
-                uwsgi.cache_set('data{}'.format(i), data[i*64000: (i+1)*64000],
-                                0, main_cache)
-            application.LOGGER.info('all {} chunks are set in uwsgi cache'.format(chunks))
-            uwsgi.cache_set('chunks-data', repr(chunks), 0, cache_chunks)
-        else:
-            return response, data
+        path = application.protocol + '://' + application.confd_ip + ':' + repr(application.confdPort) + '/api/config/catalog?deep'
+        response = requests.get(path, auth=(credentials[0], credentials[1]),
+                                headers={'Accept': 'application/vnd.yang.data+json'})
+        if response.status_code != 200:
+            application.LOGGER.error('Could not load json to cache. Status code: {}'.format(response.status_code))
+            return None
+        return response.text
     except:
         e = sys.exc_info()[0]
         application.LOGGER.error('Could not load json to cache. Error: {}'.format(e))
-        return 'Server error - downloading cache', None
-    return response, data
+        return None
 
 
 def create_response(body, status, headers=None):
@@ -450,12 +408,95 @@ def create_response(body, status, headers=None):
     return resp
 
 
+def accepted_encoding(variants):
+    """Choose which of the precompressed variants of the response can be sent
+    according to Accept-Encoding header of the request.
+            Arguments:
+                :param variants: (dict) content coding to compressed body
+                :return: content coding to use or None if the body has to be
+                    sent uncompressed
+    """
+    if not variants:
+        return None
+    for encoding in ENCODINGS:
+        if encoding in variants and request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def create_modules_response(snapshot, signatures):
+    """Creates flask response with modules of the snapshot. If latest-revision
+    query parameter is set to True only the latest revision of every module is
+    sent as a list of modules.
+            Arguments:
+                :param snapshot: (CatalogSnapshot) snapshot the modules are taken from
+                :param signatures: (list) signatures of the modules to send
+                :return: Response that can be returned.
+    """
+    if request.args.get('latest-revision') == 'True':
+        body = snapshot.modules_list_response(snapshot.latest_revisions(signatures))
+    else:
+        body = snapshot.modules_response(signatures)
+    return Response(body, mimetype='application/json')
+
+
+def create_cached_response(body, variants=None):
+    """Creates flask response out of body that was already serialized while
+    loading the cache. Compressed body is sent if client accepts it.
+            Arguments:
+                :param body: (bytes-like) json encoded body of the response
+                :param variants: (dict) content coding to compressed body or None
+                    if there is no compressed variant
+                :return: Response that can be returned.
+    """
+    encoding = accepted_encoding(variants)
+    if encoding is not None:
+        body = variants[encoding]
+    if isinstance(body, memoryview):
+        # slice of the snapshot file is sent chunk by chunk without copying it as a whole
+        resp = Response(split_chunks(body), mimetype='application/json')
+        resp.headers['Content-Length'] = len(body)
+    else:
+        resp = Response(body, mimetype='application/json')
+    if encoding is not None:
+        resp.headers['Content-Encoding'] = encoding
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+
+def create_stream_response(pieces, length, variants=None):
+    """Creates flask response that sends big body that was already serialized
+    while loading the cache piece by piece, so the body is never copied as a whole.
+    Compressed body is sent instead if client accepts it.
+            Arguments:
+                :param pieces: (generator) bytes-like pieces of the body
+                :param length: (int) length of the whole body
+                :param variants: (dict) content coding to compressed body or None
+                    if there is no compressed variant
+                :return: Response that can be returned.
+    """
+    encoding = accepted_encoding(variants)
+    if encoding is not None:
+        return create_cached_response(None, variants)
+    resp = Response(join_chunks(pieces), mimetype='application/json')
+    resp.headers['Content-Length'] = length
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+
 @application.errorhandler(404)
 def not_found():
     """Error handler for 404"""
     return make_response(jsonify({'error': 'Not found -- in api code'}), 404)
 
 
+@application.errorhandler(PyangPoolException)
+def pyang_pool_error(e):
+    """Error handler for pyang jobs that could not be run or finished in time"""
+    application.LOGGER.warning('pyang job failed: {}'.format(e))
+    return make_response(jsonify({'error': str(e)}), e.get_response_code())
+
+
 def authorize_for_sdos(request, organizations_sent, organization_parsed):
     """Authorize sender whether he has rights to send data via API to confd.
             Arguments:
@@ -468,15 +509,9 @@ def authorize_for_sdos(request, organizations_sent, organization_parsed):
     application.LOGGER.info('Checking sdo authorization for user {}'.format(username))
     accessRigths = None
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        if results_num == 1:
-            data = cursor.fetchone()
+        data = application.credential_cache.get_user(username)
+        if data is not None:
             accessRigths = data[7]
-        db.close()
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
 
@@ -504,15 +539,9 @@ def authorize_for_vendors(request, body):
     application.LOGGER.info('Checking vendor authorization for user {}'.format(username))
     accessRigths = None
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        if results_num == 1:
-            data = cursor.fetchone()
+        data = application.credential_cache.get_user(username)
+        if data is not None:
             accessRigths = data[8]
-        db.close()
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
 
@@ -729,15 +758,9 @@ def delete_module(name, revision, organization):
     application.LOGGER.debug('Checking authorization for user {}'.format(username))
     accessRigths = None
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        if results_num == 1:
-            data = cursor.fetchone()
+        data = application.credential_cache.get_user(username)
+        if data is not None:
             accessRigths = data[7]
-        db.close()
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
     response = requests.get(application.protocol + '://' + application.confd_ip + ':' + repr(
@@ -801,15 +824,9 @@ def delete_modules():
     application.LOGGER.debug('Checking authorization for user {}'.format(username))
     accessRigths = None
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        if results_num == 1:
-            data = cursor.fetchone()
+        data = application.credential_cache.get_user(username)
+        if data is not None:
             accessRigths = data[7]
-        db.close()
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
 
@@ -897,15 +914,9 @@ def delete_vendor(value):
     application.LOGGER.debug('Checking authorization for user {}'.format(username))
     accessRigths = None
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        if results_num == 1:
-            data = cursor.fetchone()
+        data = application.credential_cache.get_user(username)
+        if data is not None:
             accessRigths = data[8]
-        db.close()
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
 
@@ -1229,73 +1240,65 @@ def fast_search():
         search_res, limit_reached = inde.do_search(payload, application.es_host,
                                     application.es_protocol, application.es_port,
                                     application.LOGGER)
+        snapshot = get_catalog_snapshot()
+        found_modules = resolve_fast_modules(snapshot, search_res)
+        include_mibs = payload.get('include-mibs', False) is not False
+        yang_versions = set(payload.get('yang-versions') or [])
+        metadata_fields = None
+        if 'filter' in payload and 'module-metadata' in payload['filter']:
+            metadata_fields = payload['filter']['module-metadata']
         res = []
-        found_modules = {}
-        rejects = []
-        not_founds = []
-        errors = []
+        rejects = set()
+        not_founds = set()
+        errors = set()
 
         for row in search_res:
             res_row = {}
             res_row['node'] = row['node']
             m_name = row['module']['name']
             m_revision = row['module']['revision']
-            m_organization = row['module']['organization']
-            mod_sig = '{}@{}/{}'.format(m_name, m_revision, m_organization)
+            mod_sig = '{}@{}/{}'.format(m_name, m_revision, row['module']['organization'])
             if mod_sig in rejects:
                 continue
 
-            mod_meta = None
             try:
-                if mod_sig not in not_founds:
-                    if mod_sig in found_modules:
-                        mod_meta = found_modules[mod_sig]
-                    else:
-                        mod_meta = search_module(m_name, m_revision, m_organization)
-                        if mod_meta.status_code == 404 and m_revision.endswith('02-28'):
-                            mod_meta = search_module(m_name, m_revision.replace('02-28', '02-29'), m_organization)
-                        if mod_meta.status_code == 404:
-                            not_founds.append(mod_sig)
-                            application.LOGGER.error('index search module {}@{} not found but exist in elasticsearch'.format(m_name, m_revision))
-                            res_row = {'module': {'error': 'no {}@{} in API'.format(m_name, m_revision)}}
-                            res.append(res_row)
-                            continue
-                        else:
-                            mod_meta = mod_meta.json['module'][0]
-                            found_modules[mod_sig] = mod_meta
+                mod_meta = found_modules.get(mod_sig)
+                if mod_meta is None:
+                    if mod_sig not in not_founds:
+                        not_founds.add(mod_sig)
+                        application.LOGGER.error('index search module {}@{} not found but exist in elasticsearch'.format(m_name, m_revision))
+                        res.append({'module': {'error': 'no {}@{} in API'.format(m_name, m_revision)}})
+                    continue
 
-                if 'include-mibs' not in payload or payload['include-mibs'] is False:
-                    if re.search('yang:smiv2:', mod_meta.get('namespace')):
-                        rejects.append(mod_sig)
-                        continue
+                if not include_mibs and MIB_NAMESPACE.search(mod_meta.get('namespace')):
+                    rejects.add(mod_sig)
+                    continue
 
-                if mod_meta is not None and 'yang-versions' in payload and len(payload['yang-versions']) > 0:
-                    if mod_meta.get('yang-version') not in payload['yang-versions']:
-                        rejects.append(mod_sig)
-                        continue
+                if len(yang_versions) > 0 and mod_meta.get('yang-version') not in yang_versions:
+                    rejects.add(mod_sig)
+                    continue
 
-                if mod_meta is not None:
-                    if 'filter' not in payload or 'module-metadata' not in payload['filter']:
-                        # If the filter is not specified, return all
-                        # fields.
-                        res_row['module'] = mod_meta
-                    elif 'module-metadata' in payload['filter']:
-                        res_row['module'] = {}
-                        for field in payload['filter']['module-metadata']:
-                            if field in mod_meta:
-                                res_row['module'][field] = mod_meta[field]
+                if metadata_fields is None:
+                    # If the filter is not specified, return all
+                    # fields.
+                    res_row['module'] = mod_meta
+                else:
+                    res_row['module'] = {}
+                    for field in metadata_fields:
+                        if field in mod_meta:
+                            res_row['module'][field] = mod_meta[field]
             except Exception as e:
                 count -= 1
                 if mod_sig not in errors:
                     res_row['module'] = {
                         'error': 'Search failed at {}: {}'.format(mod_sig, e)}
-                    errors.append(mod_sig)
+                    errors.add(mod_sig)
 
             if not filter_using_api(res_row, payload):
                 count += 1
                 res.append(res_row)
             else:
-                rejects.append(mod_sig)
+                rejects.add(mod_sig)
             if count >= limit:
                 break
         return jsonify({'results': res, 'limit_reched': limit_reached})
@@ -1303,6 +1306,31 @@ def fast_search():
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+def resolve_fast_modules(snapshot, search_res):
+    """Find modules of all the distinct signatures found by the index search
+    in the snapshot at once.
+            Arguments:
+                :param snapshot: (CatalogSnapshot) snapshot the modules are taken from
+                :param search_res: (list) rows found by the index search
+                :return dictionary of signature to module. Signatures that were
+                    not found are missing
+    """
+    distinct = {}
+    for row in search_res:
+        module = row['module']
+        mod_sig = '{}@{}/{}'.format(module['name'], module['revision'], module['organization'])
+        distinct[mod_sig] = module
+    found_modules = snapshot.find_modules(distinct.keys())
+    for mod_sig, module in distinct.items():
+        if mod_sig not in found_modules and module['revision'].endswith('02-28'):
+            # index may contain 02-28 instead of not existing 02-29
+            mod_meta = snapshot.get_module(module['name'], module['revision'].replace('02-28', '02-29'),
+                                           module['organization'])
+            if mod_meta is not None:
+                found_modules[mod_sig] = mod_meta
+    return found_modules
+
+
 def filter_using_api(res_row, payload):
     try:
         if 'filter' not in payload or 'module-metadata-filter' not in payload['filter']:
@@ -1428,42 +1456,23 @@ def filter_using_api(res_row, payload):
 @application.route('/search/<path:value>', methods=['GET'])
 def search(value):
     """Search for a specific leaf from yang-catalog.yang module in modules
-    branch. The key searched is defined in @module_keys variable.
+    branch. The key searched is defined in @SEARCH_KEYS variable.
             Arguments:
-                :param value: (str) path that contains one of the @module_keys and
+                :param value: (str) path that contains one of the @SEARCH_KEYS and
                     ends with /value searched for
                 :return response to the request.
     """
     path = value
     application.LOGGER.info('Searching for {}'.format(value))
-    split = value.split('/')[:-1]
     key = '/'.join(value.split('/')[:-1])
     value = value.split('/')[-1]
-    module_keys = ['ietf/ietf-wg', 'maturity-level', 'document-name', 'author-email', 'compilation-status', 'namespace',
-                   'conformance-type', 'module-type', 'organization', 'yang-version', 'name', 'revision', 'tree-type',
-                   'belongs-to', 'generated-from', 'expires', 'expired', 'prefix', 'reference']
-    for module_key in module_keys:
-        if key == module_key:
-            active_cache = get_active_cache()
-            with active_cache[0]:
-                data = modules_data(active_cache[1]).get('module')
-            if data is None:
-                return not_found()
-            passed_data = []
-            for module in data:
-                count = -1
-                process(module, passed_data, value, module, split, count)
-
-            if len(passed_data) > 0:
-                modules = json.JSONDecoder(object_pairs_hook=collections.OrderedDict) \
-                    .decode(json.dumps(passed_data))
-                return Response(json.dumps({
-                    'yang-catalog:modules': {
-                        'module': modules
-                    }
-                }), mimetype='application/json')
-            else:
-                return not_found()
+    if key in SEARCH_KEYS:
+        snapshot = get_catalog_snapshot()
+        signatures = snapshot.search(key, value)
+        if len(signatures) > 0:
+            return create_modules_response(snapshot, signatures)
+        else:
+            return not_found()
     return Response(json.dumps({'error': 'Search on path {} is not supported'.format(path)})
                     , mimetype='application/json', status=400)
 
@@ -1477,19 +1486,17 @@ def rpc_search_get_one(leaf):
         return not_found()
     if recursive:
         rpc['input'].pop('recursive')
-    response = rpc_search(rpc)
-    modules = json.loads(response.get_data(as_text=True)).get('yang-catalog:modules')
-    if modules is None:
+    if not rpc['input']:
         return not_found()
-    modules = modules.get('module')
-    if modules is None:
+    snapshot = get_catalog_snapshot()
+    signatures = FilterPlan(rpc['input']).execute(snapshot)
+    if len(signatures) == 0:
         return not_found()
+    if recursive:
+        signatures = signatures + snapshot.dependents_closure(signatures)
     output = set()
-    resolved = set()
-    for module in modules:
-        if recursive:
-            search_recursive(output, module, leaf, resolved)
-        meta_data = module.get(leaf)
+    for signature in signatures:
+        meta_data = snapshot.modules_by_signature[signature].get(leaf)
         output.add(meta_data)
     if None in output:
         output.remove(None)
@@ -1500,46 +1507,17 @@ def rpc_search_get_one(leaf):
                         mimetype='application/json', status=201)
 
 
-def search_recursive(output, module, leaf, resolved):
-    r_name = module['name']
-    if r_name not in resolved:
-        resolved.add(r_name)
-        response = rpc_search({'input': {'dependencies': [{'name': r_name}]}})
-        modules = json.loads(response.get_data(as_text=True)).get('yang-catalog:modules')
-        if modules is None:
-            return
-        modules = modules.get('module')
-        if modules is None:
-            return
-        for mod in modules:
-            search_recursive(output, mod, leaf, resolved)
-            meta_data = mod.get(leaf)
-            output.add(meta_data)
-
-
 @application.route('/services/tree/<f1>@<r1>.yang', methods=['GET'])
 def create_tree(f1, r1):
     path_to_yang = '{}/{}@{}.yang'.format(application.save_file_dir, f1, r1)
-    ctx = create_context('{}:{}'.format(application.yang_models, application.save_file_dir))
-    with open(path_to_yang, 'r') as f:
-        a = ctx.add_module(path_to_yang, f.read())
-    if ctx.opts.tree_path is not None:
-        path = ctx.opts.tree_path.split('/')
-        if path[0] == '':
-            path = path[1:]
-    else:
-        path = None
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'w')as f:
-        emit_tree(ctx, [a], f, ctx.opts.tree_depth,
-                  ctx.opts.tree_line_length, path)
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'r')as f:
-        stdout = f.read()
-    os.unlink('{}/pyang_temp.txt'.format(application.temp_dir))
-    if stdout == '' and len(ctx.errors) != 0:
+    if not os.path.isfile(path_to_yang):
+        return create_bootstrap_danger()
+    stdout, errors = application.tree_cache.get_tree(path_to_yang)
+    if stdout == '' and errors:
         return create_bootstrap_danger()
-    elif stdout != '' and len(ctx.errors) != 0:
+    elif stdout != '' and errors:
         return create_bootstrap_warning(stdout)
-    elif stdout == '' and len(ctx.errors) == 0:
+    elif stdout == '' and not errors:
         return create_bootstrap_info()
     else:
         return '<html><body><pre>{}</pre></body></html>'.format(stdout)
@@ -1548,20 +1526,50 @@ def create_tree(f1, r1):
 @application.route('/services/reference/<f1>@<r1>.yang', methods=['GET'])
 def create_reference(f1, r1):
     schema1 = '{}/{}@{}.yang'.format(application.save_file_dir, f1, r1)
-    arguments = ['cat', schema1]
-    cat = subprocess.Popen(arguments,
-                             stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE)
-    stdout, stderr = cat.communicate()
-    if sys.version_info >= (3, 4):
-        stdout = stdout.decode(encoding='utf-8', errors='strict')
-        stderr = stderr.decode(encoding='utf-8', errors='strict')
-    if stdout == '' and stderr != '':
+    if not os.path.isfile(schema1):
         return create_bootstrap_danger()
-    elif stdout != '' and stderr != '':
-        return create_bootstrap_warning(stdout)
-    else:
-        return '<html><body><pre>{}</pre></body></html>'.format(stdout)
+    file_stat = os.stat(schema1)
+    resp = Response(escape_file(schema1), mimetype='text/html')
+    resp.set_etag('{}-{}-html'.format(int(file_stat.st_mtime), file_stat.st_size))
+    resp.last_modified = datetime.utcfromtimestamp(int(file_stat.st_mtime))
+    return resp.make_conditional(request)
+
+
+@application.route('/services/download/<f1>@<r1>.yang', methods=['GET'])
+def download_reference(f1, r1):
+    """Send yang file as it is stored. File is sent by the web server if
+    x-accel-redirect location is configured, otherwise by the WSGI server
+    file wrapper. ETag, Last-Modified and Range requests are supported.
+            Arguments:
+                :param f1: (str) name of the module
+                :param r1: (str) revision of the module
+                :return response with the file
+    """
+    file_name = '{}@{}.yang'.format(f1, r1)
+    schema1 = '{}/{}'.format(application.save_file_dir, file_name)
+    if not os.path.isfile(schema1):
+        return not_found()
+    if application.accel_redirect:
+        resp = Response(mimetype='text/plain')
+        resp.headers['X-Accel-Redirect'] = '{}/{}'.format(application.accel_redirect, file_name)
+        resp.headers['Content-Disposition'] = 'attachment; filename={}'.format(file_name)
+        return resp
+    return send_file(schema1, mimetype='text/plain', as_attachment=True,
+                     attachment_filename=file_name, conditional=True)
+
+
+def escape_file(path):
+    """Generate html page with escaped content of the file piece by piece,
+    so the file is never read into memory as a whole.
+            Arguments:
+                :param path: (str) path to the file
+                :return generator of parts of the page
+    """
+    yield '<html><body><pre>'
+    with io.open(path, 'r', encoding='utf-8') as f:
+        for piece in iter(lambda: f.read(CHUNK_SIZE), ''):
+            yield escape(piece)
+    yield '</pre></body></html>'
 
 
 def create_bootstrap_info():
@@ -1588,116 +1596,129 @@ def create_bootstrap_danger():
 @application.route('/services/file1=<f1>@<r1>/check-update-from/file2=<f2>@<r2>',
            methods=['GET'])
 def create_update_from(f1, r1, f2, r2):
-    try:
-        os.makedirs(get_curr_dir(__file__) + '/temp')
-    except OSError as e:
-        # be happy if someone already created the path
-        if e.errno != errno.EEXIST:
-            return 'Server error - could not create directory'
     schema1 = '{}/{}@{}.yang'.format(application.save_file_dir, f1, r1)
     schema2 = '{}/{}@{}.yang'.format(application.save_file_dir, f2, r2)
-    arguments = ['pyang', '-p',
-                 application.yang_models,
-                 schema1, '--check-update-from',
-                 schema2]
-    pyang = subprocess.Popen(arguments,
-                             stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE)
-    stdout, stderr = pyang.communicate()
-    if sys.version_info >= (3, 4):
-        stderr = stderr.decode(encoding='utf-8', errors='strict')
-    return '<html><body><pre>{}</pre></body></html>'.format(stderr)
+    if not os.path.isfile(schema1) or not os.path.isfile(schema2):
+        return create_bootstrap_danger()
+    output = check_update_from_pairs([(schema1, schema2)])[0]
+    return '<html><body><pre>{}</pre></body></html>'.format(escape(output))
+
+
+def check_update_from_pairs(pairs):
+    """Check backwards compatibility of new and old revisions of modules.
+    Results are cached under the content of both files and all the pairs
+    that are not cached yet are checked in one pyang job.
+            Arguments:
+                :param pairs: (list) tuples of paths to the new and old yang file
+                :return list of pyang outputs in the same order as pairs
+    """
+    keys = []
+    for schema1, schema2 in pairs:
+        with open(schema1, 'rb') as f:
+            content1 = f.read()
+        with open(schema2, 'rb') as f:
+            content2 = f.read()
+        keys.append(DiffCache.key(content1, content2, 'check-update-from'))
+    outputs = [application.diff_cache.lookup(key) for key in keys]
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    if len(missing) > 0:
+        checked = application.pyang_pool.run(check_update_from_batch_job, [pairs[i] for i in missing])
+        for i, output in zip(missing, checked):
+            application.diff_cache.put(keys[i], output)
+            outputs[i] = output
+    return outputs
 
 
 @application.route('/services/diff-file/file1=<f1>@<r1>/file2=<f2>@<r2>',
            methods=['GET'])
 def create_diff_file(f1, r1, f2, r2):
-    try:
-        os.makedirs(get_curr_dir(__file__) + '/temp')
-    except OSError as e:
-        # be happy if someone already created the path
-        if e.errno != errno.EEXIST:
-            return 'Server error - could not create directory'
+    """Compare two yang files. Optional mode argument selects side-by-side
+    (default) or unified diff.
+            :return html page with the diff
+    """
     schema1 = '{}/{}@{}.yang'.format(application.save_file_dir, f1, r1)
     schema2 = '{}/{}@{}.yang'.format(application.save_file_dir, f2, r2)
+    mode = request.args.get('mode', SIDE_BY_SIDE)
+    if mode not in MODES:
+        return make_response(jsonify({'error': 'mode must be one of {}'.format(', '.join(MODES))}), 400)
+    if not os.path.isfile(schema1) or not os.path.isfile(schema2):
+        return create_bootstrap_danger()
+    with open(schema1, 'rb') as f:
+        content1 = f.read()
+    with open(schema2, 'rb') as f:
+        content2 = f.read()
 
-    arguments = ['cat', schema1]
-    cat = subprocess.Popen(arguments, stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE)
-    stdout, stderr = cat.communicate()
-    if sys.version_info >= (3, 4):
-        stdout = stdout.decode(encoding='utf-8', errors='strict')
-    file_name1 = 'schema1-file-diff.txt'
-    with open('{}/{}'.format(application.diff_file_dir, file_name1), 'w+') as f:
-        f.write('<pre>{}</pre>'.format(stdout))
-    arguments = ['cat', schema2]
-    cat = subprocess.Popen(arguments, stdout=subprocess.PIPE,
-                           stderr=subprocess.PIPE)
-    stdout, stderr = cat.communicate()
-    if sys.version_info >= (3, 4):
-        stdout = stdout.decode(encoding='utf-8', errors='strict')
-    file_name2 = 'schema2-file-diff.txt'
-    with open('{}/{}'.format(application.diff_file_dir, file_name2), 'w+') as f:
-        f.write('<pre>{}</pre>'.format(stdout))
-    tree1 = '{}/compatibility/{}'.format(application.my_uri, file_name1)
-    tree2 = '{}/compatibility/{}'.format(application.my_uri, file_name2)
-    diff_url = ('https://www.ietf.org/rfcdiff/rfcdiff.pyht?url1={}&url2={}'
-                .format(tree1, tree2))
-    response = requests.get(diff_url)
-    os.remove(application.diff_file_dir + '/' + file_name1)
-    os.remove(application.diff_file_dir + '/' + file_name2)
-    return '<html><body>{}</body></html>'.format(response.text)
+    def render():
+        return render_diff(content1.decode('utf-8'), content2.decode('utf-8'),
+                           '{}@{}'.format(f1, r1), '{}@{}'.format(f2, r2), mode)
+
+    return application.diff_cache.get(DiffCache.key(content1, content2, 'file-' + mode), render)
 
 
 @application.route('/services/diff-tree/file1=<f1>@<r1>/file2=<f2>@<r2>', methods=['GET'])
 def create_diff_tree(f1, r1, f2, r2):
-    try:
-        os.makedirs(get_curr_dir(__file__) + '/temp')
-    except OSError as e:
-        # be happy if someone already created the path
-        if e.errno != errno.EEXIST:
-            return 'Server error - could not create directory'
+    """Compare trees of two yang files. Optional mode argument selects
+    side-by-side (default) or unified diff.
+            :return html page with the diff
+    """
     schema1 = '{}/{}@{}.yang'.format(application.save_file_dir, f1, r1)
     schema2 = '{}/{}@{}.yang'.format(application.save_file_dir, f2, r2)
-    ctx = create_context('{}:{}'.format(application.yang_models, application.save_file_dir))
-    ctx.lax_quote_checks = True
-    ctx.lax_xpath_checks = True
-    with open(schema1, 'r') as f:
-        a = ctx.add_module(schema1, f.read())
-    ctx.errors = []
-    if ctx.opts.tree_path is not None:
-        path = ctx.opts.tree_path.split('/')
-        if path[0] == '':
-            path = path[1:]
-    else:
-        path = None
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'w')as f:
-        emit_tree(ctx, [a], f, ctx.opts.tree_depth,
-                  ctx.opts.tree_line_length, path)
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'r')as f:
-        stdout = f.read()
-    file_name1 = 'schema1-tree-diff.txt'
-    with open('{}/{}'.format(application.diff_file_dir, file_name1), 'w+') as f:
-        f.write('<pre>{}</pre>'.format(stdout))
-    with open(schema2, 'r') as f:
-        a = ctx.add_module(schema2, f.read())
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'w')as f:
-        emit_tree(ctx, [a], f, ctx.opts.tree_depth,
-                  ctx.opts.tree_line_length, path)
-    with open('{}/pyang_temp.txt'.format(application.temp_dir), 'r')as f:
-        stdout = f.read()
-    file_name2 = 'schema2-tree-diff.txt'
-    with open('{}/{}'.format(application.diff_file_dir, file_name2), 'w+') as f:
-        f.write('<pre>{}</pre>'.format(stdout))
-    tree1 = '{}/compatibility/{}'.format(application.my_uri, file_name1)
-    tree2 = '{}/compatibility/{}'.format(application.my_uri, file_name2)
-    diff_url = ('https://www.ietf.org/rfcdiff/rfcdiff.pyht?url1={}&url2={}'
-                .format(tree1, tree2))
-    response = requests.get(diff_url)
-    os.remove(application.diff_file_dir + '/' + file_name1)
-    os.remove(application.diff_file_dir + '/' + file_name2)
-    os.unlink('{}/pyang_temp.txt'.format(application.temp_dir))
-    return '<html><body>{}</body></html>'.format(response.text)
+    mode = request.args.get('mode', SIDE_BY_SIDE)
+    if mode not in MODES:
+        return make_response(jsonify({'error': 'mode must be one of {}'.format(', '.join(MODES))}), 400)
+    if not os.path.isfile(schema1) or not os.path.isfile(schema2):
+        return create_bootstrap_danger()
+    with open(schema1, 'rb') as f:
+        content1 = f.read()
+    with open(schema2, 'rb') as f:
+        content2 = f.read()
+
+    def render():
+        tree1, tree2 = application.pyang_pool.run(diff_tree_job, schema1, schema2)
+        return render_diff(tree1, tree2, '{}@{}'.format(f1, r1), '{}@{}'.format(f2, r2), mode)
+
+    return application.diff_cache.get(DiffCache.key(content1, content2, 'tree-' + mode), render)
+
+
+@application.route('/dependency-closure', methods=['POST'])
+def get_dependency_closure():
+    """Find all the modules that the given modules import or include
+    transitively. Body of the request contains input container with list of
+    modules each with name and optionally revision. Latest revision is used
+    for modules and imports without revision.
+            :return response with name, revision, organization and schema of all
+                the modules of the closure and list of modules that were not found
+    """
+    body = request.json
+    if body is None or not isinstance(body.get('input'), dict):
+        return make_response(
+            jsonify({'error': 'body request has to start with "input" container'}), 400)
+    modules = body['input'].get('module')
+    if not isinstance(modules, list):
+        return make_response(
+            jsonify({'error': 'input container has to contain list of modules'}), 400)
+    snapshot = get_catalog_snapshot()
+    signatures = []
+    not_found = []
+    for module in modules:
+        if not isinstance(module, dict) or module.get('name') is None:
+            return make_response(jsonify({'error': 'every module has to contain name'}), 400)
+        signature = snapshot.resolve_dependency(module['name'], module.get('revision'))
+        if signature is None:
+            not_found.append({'name': module['name'], 'revision': module.get('revision')})
+        else:
+            signatures.append(signature)
+    closure, missing = snapshot.dependency_closure(signatures)
+    output = []
+    for signature in closure:
+        module = snapshot.modules_by_signature[signature]
+        item = collections.OrderedDict()
+        for key in ['name', 'revision', 'organization', 'schema']:
+            if key in module:
+                item[key] = module[key]
+        output.append(item)
+    return Response(json.dumps({'output': {'module': output, 'not-found': not_found + missing}}),
+                    mimetype='application/json')
 
 
 @application.route('/get-common', methods=['POST'])
@@ -1716,27 +1737,20 @@ def get_common():
                                    'body of request need to contain first and '
                                    'second container'}),
                              400)
-    response_first = rpc_search({'input': body['input']['first']})
-    response_second = rpc_search({'input': body['input']['second']})
+    snapshot = get_catalog_snapshot()
+    modules_first = filter_modules(snapshot, body['input']['first'])
+    modules_second = filter_modules(snapshot, body['input']['second'])
 
-    if response_first.status_code == 404 or response_second.status_code == 404:
+    if len(modules_first) == 0 or len(modules_second) == 0:
         return not_found()
 
-    data = json.JSONDecoder(object_pairs_hook=collections.OrderedDict)\
-        .decode(response_first.get_data(as_text=True))
-    modules_first = data['yang-catalog:modules']['module']
-    data = json.JSONDecoder(object_pairs_hook=collections.OrderedDict)\
-        .decode(response_second.get_data(as_text=True))
-    modules_second = data['yang-catalog:modules']['module']
-
+    names_second = set([module['name'] for module in modules_second])
     output_modules_list = []
-    names = []
+    names = set()
     for mod_first in modules_first:
-        for mod_second in modules_second:
-            if mod_first['name'] == mod_second['name']:
-                if mod_first['name'] not in names:
-                    names.append(mod_first['name'])
-                    output_modules_list.append(mod_first)
+        if mod_first['name'] in names_second and mod_first['name'] not in names:
+            names.add(mod_first['name'])
+            output_modules_list.append(mod_first)
     if len(output_modules_list) == 0:
         return not_found()
     return Response(json.dumps({'output': output_modules_list}),
@@ -1759,37 +1773,29 @@ def compare():
                                    'body of request need to contain new'
                                    ' and old container'}),
                              400)
-    response_new = rpc_search({'input': body['input']['new']})
-    response_old = rpc_search({'input': body['input']['old']})
+    snapshot = get_catalog_snapshot()
+    modules_new = filter_modules(snapshot, body['input']['new'])
+    modules_old = filter_modules(snapshot, body['input']['old'])
 
-    if response_new.status_code == 404 or response_old.status_code == 404:
+    if len(modules_new) == 0 or len(modules_old) == 0:
         return not_found()
 
-    data = json.loads(response_new.data)
-    modules_new = data['yang-catalog:modules']['module']
-    data = json.loads(response_old.data)
-    modules_old = data['yang-catalog:modules']['module']
-
+    old_revisions = {}
+    for mod_old in modules_old:
+        old_revisions.setdefault(mod_old['name'], set()).add(mod_old['revision'])
     new_mods = []
     for mod_new in modules_new:
-        new_rev = mod_new['revision']
-        new_name = mod_new['name']
-        found = False
-        new_rev_found = False
-        for mod_old in modules_old:
-            old_rev = mod_old['revision']
-            old_name = mod_old['name']
-            if new_name == old_name and new_rev == old_rev:
-                found = True
-                break
-            if new_name == old_name and new_rev != old_rev:
-                new_rev_found = True
-        if not found:
-            mod_new['reason-to-show'] = 'New module'
-            new_mods.append(mod_new)
-        if new_rev_found:
-            mod_new['reason-to-show'] = 'Different revision'
-            new_mods.append(mod_new)
+        revisions = old_revisions.get(mod_new['name'])
+        if revisions is None:
+            reason = 'New module'
+        elif mod_new['revision'] not in revisions:
+            reason = 'Different revision'
+        else:
+            continue
+        # modules of the snapshot are shared so they can not be changed
+        mod_new = dict(mod_new)
+        mod_new['reason-to-show'] = reason
+        new_mods.append(mod_new)
     if len(new_mods) == 0:
         return not_found()
     output = {'output': new_mods}
@@ -1813,37 +1819,35 @@ def check_semver():
                                    'body of request need to contain new'
                                    ' and old container'}),
                              400)
-    response_new = rpc_search({'input': body['input']['new']})
-    response_old = rpc_search({'input': body['input']['old']})
+    snapshot = get_catalog_snapshot()
+    modules_new = filter_modules(snapshot, body['input']['new'])
+    modules_old = filter_modules(snapshot, body['input']['old'])
 
-    if response_new.status_code == 404 or response_old.status_code == 404:
+    if len(modules_new) == 0 or len(modules_old) == 0:
         return not_found()
 
-    data = json.loads(response_new.data)
-    modules_new = data['yang-catalog:modules']['module']
-    data = json.loads(response_old.data)
-    modules_old = data['yang-catalog:modules']['module']
+    run_check = body['input'].get('check-update-from') in (True, 'true', 'True')
+    # modules that passed compilation and are checked by pyang in one job
+    to_check = []
 
+    # first new module with the same name and organization is compared
+    new_by_name = {}
+    for mod_new in modules_new:
+        new_by_name.setdefault((mod_new['name'], mod_new['organization']), mod_new)
     output_modules_list = []
     for mod_old in modules_old:
-        name_new = None
         semver_new = None
-        revision_new = None
-        status_new = None
         name_old = mod_old['name']
         revision_old = mod_old['revision']
         organization_old = mod_old['organization']
         status_old = mod_old['compilation-status']
-        for mod_new in modules_new:
+        mod_new = new_by_name.get((name_old, organization_old))
+        if mod_new is not None:
             name_new = mod_new['name']
             revision_new = mod_new['revision']
-            organization_new = mod_new['organization']
             status_new = mod_new['compilation-status']
-            if name_new == name_old and organization_new == organization_old:
-                if revision_old == revision_new:
-                    break
+            if revision_old != revision_new:
                 semver_new = mod_new.get('derived-semantic-version')
-                break
         if semver_new:
             semver_old = mod_old.get('derived-semantic-version')
             if semver_old:
@@ -1862,6 +1866,12 @@ def check_semver():
                                              revision_old))
                         reason = ('pyang --check-update-from output: {}'.
                                   format(file_name))
+                        if run_check:
+                            to_check.append((output_mod,
+                                             '{}/{}@{}.yang'.format(application.save_file_dir, name_new,
+                                                                    revision_new),
+                                             '{}/{}@{}.yang'.format(application.save_file_dir, name_old,
+                                                                    revision_old)))
 
                     diff = (
                         '{}/services/diff-tree/file1={}@{}/file2={}@{}'.
@@ -1884,6 +1894,12 @@ def check_semver():
                     output_modules_list.append(output_mod)
     if len(output_modules_list) == 0:
         return not_found()
+    to_check = [(output_mod, schema1, schema2) for output_mod, schema1, schema2 in to_check
+                if os.path.isfile(schema1) and os.path.isfile(schema2)]
+    if len(to_check) > 0:
+        outputs = check_update_from_pairs([(schema1, schema2) for _, schema1, schema2 in to_check])
+        for (output_mod, _, _), check_output in zip(to_check, outputs):
+            output_mod['check-update-from-output'] = check_output
     output = {'output': output_modules_list}
     return make_response(jsonify(output), 200)
 
@@ -1894,372 +1910,12 @@ def rpc_search(body=None):
         body = request.json
     application.LOGGER.info('Searching and filtering modules based on RPC {}'
                 .format(json.dumps(body)))
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        data = modules_data(active_cache[1])['module']
     body = body.get('input')
     if body:
-        partial = body.get('partial')
-        if partial is None:
-            partial = False
-        passed_modules = []
-        if partial:
-            for module in data:
-                passed = True
-                if 'dependencies' in body:
-                    submodules = deepcopy(module.get('dependencies'))
-                    if submodules is None:
-                        continue
-                    for sub in body['dependencies']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name not in submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision not in submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema not in submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'dependents' in body:
-                    submodules = deepcopy(module.get('dependents'))
-                    if submodules is None:
-                        continue
-                    for sub in body['dependents']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name not in submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision not in submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema not in submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'submodule' in body:
-                    submodules = deepcopy(module.get('submodule'))
-                    if submodules is None:
-                        continue
-                    for sub in body['submodule']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name not in submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision not in submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema not in submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'implementations' in body:
-                    implementations = deepcopy(module.get('implementations'))
-                    if implementations is None:
-                        continue
-                    passed = True
-                    for imp in body['implementations']['implementation']:
-                        if not passed:
-                            break
-                        for leaf in imp:
-                            found = False
-                            impls = []
-                            if leaf == 'deviation':
-                                for implementation in implementations[
-                                    'implementation']:
-                                    deviations = implementation.get('deviation')
-                                    if deviations is None:
-                                        continue
-                                    for dev in imp[leaf]:
-                                        found = True
-                                        name = dev.get('name')
-                                        revision = dev.get('revision')
-                                        for deviation in deviations:
-                                            found = True
-                                            if name:
-                                                if name not in deviation['name']:
-                                                    found = False
-                                            if not found:
-                                                continue
-                                            if revision:
-                                                if revision not in deviation['revision']:
-                                                    found = False
-                                            if found:
-                                                break
-                                        if not found:
-                                            break
-                                    if not found:
-                                        continue
-                                    else:
-                                        impls.append(implementation)
-                                if not found:
-                                    passed = False
-                                    break
-                            elif leaf == 'feature':
-                                for implementation in implementations['implementation']:
-                                    if implementation.get(leaf) is None:
-                                        continue
-                                    if imp[leaf] in implementation[leaf]:
-                                        found = True
-                                        impls.append(implementation)
-                                        continue
-                                if not found:
-                                    passed = False
-                            else:
-                                for implementation in implementations['implementation']:
-                                    if implementation.get(leaf) is None:
-                                        continue
-                                    if imp[leaf] in implementation[leaf]:
-                                        found = True
-                                        impls.append(implementation)
-                                        continue
-                                if not found:
-                                    passed = False
-                            if not passed:
-                                break
-                            implementations['implementation'] = impls
-                if not passed:
-                    continue
-                for leaf in body:
-                    if leaf != 'implementations' and leaf != 'submodule':
-                        module_leaf = module.get(leaf)
-                        if module_leaf:
-                            if body[leaf] not in module_leaf:
-                                passed = False
-                                break
-                if passed:
-                    passed_modules.append(module)
-        else:
-            for module in data:
-                passed = True
-                if 'dependencies' in body:
-                    submodules = deepcopy(module.get('dependencies'))
-                    if submodules is None:
-                        continue
-                    for sub in body['dependencies']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name != submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision != submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema != submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'dependents' in body:
-                    submodules = deepcopy(module.get('dependents'))
-                    if submodules is None:
-                        continue
-                    for sub in body['dependents']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name != submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision!= submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema != submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'submodule' in body:
-                    submodules = deepcopy(module.get('submodule'))
-                    if submodules is None:
-                        continue
-                    for sub in body['submodule']:
-                        found = True
-                        name = sub.get('name')
-                        revision = sub.get('revision')
-                        schema = sub.get('schema')
-                        for submodule in submodules:
-                            found = True
-                            if name:
-                                if name != submodule['name']:
-                                    found = False
-                            if not found:
-                                continue
-                            if revision:
-                                if revision != submodule['revision']:
-                                    found = False
-                            if not found:
-                                continue
-                            if schema:
-                                if schema != submodule['schema']:
-                                    found = False
-                            if found:
-                                break
-
-                        if not found:
-                            passed = False
-                            break
-                if not passed:
-                    continue
-                if 'implementations' in body:
-                    implementations = deepcopy(module.get('implementations'))
-                    if implementations is None:
-                        continue
-                    passed = True
-                    for imp in body['implementations']['implementation']:
-                        if not passed:
-                            break
-                        for leaf in imp:
-                            found = False
-                            impls = []
-                            if leaf == 'deviation':
-                                for implementation in implementations[
-                                    'implementation']:
-                                    deviations = implementation.get('deviation')
-                                    if deviations is None:
-                                        continue
-                                    for dev in imp[leaf]:
-                                        found = True
-                                        name = dev.get('name')
-                                        revision = dev.get('revision')
-                                        for deviation in deviations:
-                                            found = True
-                                            if name:
-                                                if name != deviation['name']:
-                                                    found = False
-                                            if not found:
-                                                continue
-                                            if revision:
-                                                if revision != deviation['revision']:
-                                                    found = False
-                                            if found:
-                                                break
-                                        if not found:
-                                            break
-                                    if not found:
-                                        continue
-                                    else:
-                                        impls.append(implementation)
-                                if not found:
-                                    passed = False
-                                    break
-                            elif leaf == 'feature':
-                                for implementation in implementations['implementation']:
-                                    if implementation.get(leaf) is None:
-                                        continue
-                                    if imp[leaf] == implementation[leaf]:
-                                        found = True
-                                        impls.append(implementation)
-                                        continue
-                                if not found:
-                                    passed = False
-                            else:
-                                for implementation in implementations['implementation']:
-                                    if implementation.get(leaf) is None:
-                                        continue
-                                    if imp[leaf] == implementation[leaf]:
-                                        found = True
-                                        impls.append(implementation)
-                                        continue
-                                if not found:
-                                    passed = False
-                            if not passed:
-                                break
-                            implementations['implementation'] = impls
-                if not passed:
-                    continue
-                for leaf in body:
-                    if (leaf != 'implementations' and leaf != 'submodule'
-                        and leaf != 'dependencies' and leaf != 'dependents'):
-                        if body[leaf] != module.get(leaf):
-                            passed = False
-                            break
-                if passed:
-                    passed_modules.append(module)
+        snapshot = get_catalog_snapshot()
+        passed_modules = FilterPlan(body).execute(snapshot)
         if len(passed_modules) > 0:
-            modules = json.JSONDecoder(object_pairs_hook=collections.OrderedDict) \
-                .decode(json.dumps(passed_modules))
-            return Response(json.dumps({
-                'yang-catalog:modules': {
-                    'module': modules
-                }
-            }), mimetype='application/json')
+            return create_modules_response(snapshot, passed_modules)
         else:
             return not_found()
     else:
@@ -2268,43 +1924,33 @@ def rpc_search(body=None):
             400)
 
 
-@application.route('/search/vendor/<org>', methods=['GET'])
-def search_vendor_statistics(org):
-    vendor = org
-
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        application.LOGGER.info('Searching for vendors')
-        data = vendors_data(active_cache[1], False)
-    ven_data = None
-    for d in data['vendor']:
-        if d['name'] == vendor:
-            ven_data = d
-            break
-
-    os_type = {}
-    for plat in ven_data['platforms']['platform']:
-        version_list = set()
-        os = {}
-        for ver in plat['software-versions']['software-version']:
-            for flav in ver['software-flavors']['software-flavor']:
-                os[ver['name']] = flav['modules']['module'][0]['os-type']
-                if os[ver['name']] not in os_type:
-                    os_type[os[ver['name']]] = {}
-                break
-            if ver['name'] not in os_type[os[ver['name']]]:
-                os_type[os[ver['name']]][ver['name']] = set()
+def filter_modules(snapshot, rpc_input):
+    """Find modules of the snapshot the same way /search-filter does without
+    creating and decoding the response.
+            Arguments:
+                :param snapshot: (CatalogSnapshot) snapshot to search in
+                :param rpc_input: (dict) content of the input container
+                :return list of modules that passed the filter. Modules are
+                    shared by the snapshot and must not be changed
+    """
+    if not rpc_input:
+        return []
+    return [snapshot.modules_by_signature[signature]
+            for signature in FilterPlan(rpc_input).execute(snapshot)]
 
-            version_list.add(ver['name'])
-        for ver in version_list:
-            os_type[os[ver]][ver].add(plat['name'])
 
-    os_types = {}
-    for key, vals in os_type.items():
-        os_types[key] = {}
-        for key2, val in os_type[key].items():
-            os_types[key][key2] = list(os_type[key][key2])
-    return Response(json.dumps(os_types), mimetype='application/json')
+@application.route('/search/vendor/<org>', methods=['GET'])
+def search_vendor_statistics(org):
+    """Search for platforms of the vendor grouped by os-type and software version
+            Arguments:
+                :param org: (str) name of the vendor
+                :return response to the request.
+    """
+    application.LOGGER.info('Searching for vendors')
+    statistics = get_catalog_snapshot().vendor_statistics.get(org)
+    if statistics is None:
+        return not_found()
+    return create_cached_response(statistics)
 
 
 @application.route('/search/vendors/<path:value>', methods=['GET'])
@@ -2338,31 +1984,16 @@ def search_module(name, revision, organization):
                 :return response to the request with job_id that user can use to
                     see if the job is still on or Failed or Finished successfully
     """
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        application.LOGGER.info('Searching for module {}, {}, {}'.format(name, revision,
-                                                             organization))
-        if uwsgi.cache_exists(name + '@' + revision + '/' + organization,
-                              'cache_chunks{}'.format(active_cache[1])):
-            chunks = uwsgi.cache_get(name + '@' + revision + '/' + organization,
-                                     'cache_chunks{}'.format(active_cache[1]))
-            data = ''
-            for i in range(0, int(chunks), 1):
-                if sys.version_info >= (3, 4):
-                    data += uwsgi.cache_get(name + '@' + revision + '/' +
-                                            organization + '-' + repr(i),
-                                            'cache_modules{}'.format(active_cache[1]))\
-                        .decode(encoding='utf-8', errors='strict')
-                else:
-                    data += uwsgi.cache_get(name + '@' + revision + '/' +
-                                            organization + '-' + repr(i),
-                                            'cache_modules{}'.format(active_cache[1]))
-
-            return Response(json.dumps({
-                'module': [json.JSONDecoder(object_pairs_hook=collections.OrderedDict)\
-                    .decode(data)]
-            }), mimetype='application/json')
-        return not_found()
+    application.LOGGER.info('Searching for module {}, {}, {}'.format(name, revision,
+                                                                     organization))
+    snapshot = get_catalog_snapshot()
+    signature = module_signature(name, revision, organization)
+    if signature in snapshot.module_response:
+        if request.args.get('latest-revision') == 'True':
+            return Response(snapshot.modules_list_response([signature]), mimetype='application/json')
+        return create_cached_response(snapshot.module_response[signature],
+                                      snapshot.module_variants(signature))
+    return not_found()
 
 
 @application.route('/search/modules', methods=['GET'])
@@ -2370,13 +2001,51 @@ def get_modules():
     """Search for a all the modules populated in confd
             :return response to the request with all the modules
     """
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        application.LOGGER.info('Searching for modules')
-        data = json.dumps(modules_data(active_cache[1]))
-        if data is None or data == '{}':
-            return not_found()
-        return Response(data, mimetype='application/json')
+    application.LOGGER.info('Searching for modules')
+    snapshot = get_catalog_snapshot()
+    if len(snapshot.modules) == 0:
+        return not_found()
+    if request.args.get('latest-revision') == 'True':
+        return Response(snapshot.modules_list_response(snapshot.latest_signatures),
+                        mimetype='application/json')
+    return create_stream_response(snapshot.modules_body(), snapshot.modules_length,
+                                  snapshot.modules_compressed)
+
+
+@application.route('/search/modules', methods=['POST'])
+def get_modules_batch():
+    """Search for several modules at once. Body of the request contains input
+    container with list of modules each with name, revision and organization.
+            :return response with all the modules that were found and list
+                of modules that were not found
+    """
+    body = request.json
+    if body is None or not isinstance(body.get('input'), dict):
+        return make_response(
+            jsonify({'error': 'body request has to start with "input" container'}), 400)
+    modules = body['input'].get('module')
+    if not isinstance(modules, list):
+        return make_response(
+            jsonify({'error': 'input container has to contain list of modules'}), 400)
+    application.LOGGER.info('Searching for {} modules'.format(len(modules)))
+    snapshot = get_catalog_snapshot()
+    requested = collections.OrderedDict()
+    for module in modules:
+        try:
+            name = module['name']
+            revision = module['revision']
+            organization = module['organization']
+        except (KeyError, TypeError):
+            return make_response(
+                jsonify({'error': 'every module has to contain name, revision and organization'}),
+                400)
+        signature = module_signature(name, revision, organization)
+        if signature not in requested:
+            requested[signature] = {'name': name, 'revision': revision, 'organization': organization}
+    found = snapshot.find_modules(requested.keys())
+    not_found = [module for signature, module in requested.items() if signature not in found]
+    return Response(snapshot.modules_response(list(found.keys()), not_found),
+                    mimetype='application/json')
 
 
 @application.route('/search/vendors', methods=['GET'])
@@ -2384,13 +2053,12 @@ def get_vendors():
     """Search for a all the vendors populated in confd
             :return response to the request with all the vendors
     """
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        application.LOGGER.info('Searching for vendors')
-        data = json.dumps(vendors_data(active_cache[1]))
-        if data is None or data == '{}':
-            return not_found()
-        return Response(data, mimetype='application/json')
+    application.LOGGER.info('Searching for vendors')
+    snapshot = get_catalog_snapshot()
+    if len(snapshot.vendors) == 0:
+        return not_found()
+    return create_stream_response(snapshot.vendors_body(), len(snapshot.vendors_json),
+                                  snapshot.vendors_compressed)
 
 
 @application.route('/search/catalog', methods=['GET'])
@@ -2399,13 +2067,12 @@ def get_catalog():
                 :return response to the request with all the data
     """
     application.LOGGER.info('Searching for catalog data')
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        data = catalog_data(active_cache[1])
-    if data is None or data == '{}':
+    snapshot = get_catalog_snapshot()
+    if len(snapshot.catalog) == 0:
         return not_found()
     else:
-        return Response(json.dumps(data), mimetype='application/json')
+        return create_stream_response(snapshot.catalog_body(), snapshot.catalog_length,
+                                      snapshot.catalog_compressed)
 
 
 @application.route('/job/<job_id>', methods=['GET'])
@@ -2486,194 +2153,237 @@ def load_to_memory():
         return unauthorized
     if get_password(username) != hash_pw(request.authorization['password']):
         return unauthorized()
-    load(True)
+    body = request.get_json(silent=True)
+    if body is not None and body.get('input') is not None:
+        load_delta(body['input'].get('modules', []), body['input'].get('vendors', []))
+    else:
+        load(True)
     return make_response(jsonify({'info': 'Success'}), 201)
 
 
 @application.route('/contributors', methods=['GET'])
 def get_organizations():
-    orgs = set()
-    active_cache = get_active_cache()
-    with active_cache[0]:
-        data = modules_data(active_cache[1]).get('module')
-    for mod in data:
-        if mod['organization'] != 'example' and mod['organization'] != 'missing element':
-            orgs.add(mod['organization'])
-    orgs = list(orgs)
-    resp = make_response(jsonify({'contributors': orgs}), 200)
+    resp = create_cached_response(get_catalog_snapshot().contributors_json)
     resp.headers['Access-Control-Allow-Origin'] = '*'
     return resp
 
 
-def modules_data(which_cache):
-    chunks = int(uwsgi.cache_get('chunks-modules', 'cache_chunks{}'.format(which_cache)))
-    data = ''
-    for i in range(0, chunks, 1):
-        if sys.version_info >= (3, 4):
-            data += uwsgi.cache_get('modules-data{}'.format(i), 'main_cache{}'.format(which_cache))\
-                .decode(encoding='utf-8', errors='strict')
-        else:
-            data += uwsgi.cache_get('modules-data{}'.format(i), 'main_cache{}'.format(which_cache))
-    json_data = \
-        json.JSONDecoder(object_pairs_hook=collections.OrderedDict).decode(data)
-    return json_data
-
-
-def vendors_data(which_cache, clean_data=True):
-    chunks = int(uwsgi.cache_get('chunks-vendor', 'cache_chunks{}'.format(which_cache)))
-    data = ''
-    for i in range(0, chunks, 1):
-        if sys.version_info >= (3, 4):
-            data += uwsgi.cache_get('vendors-data{}'.format(i), 'main_cache{}'.format(which_cache))\
-                .decode(encoding='utf-8', errors='strict')
-        else:
-            data += uwsgi.cache_get('vendors-data{}'.format(i), 'main_cache{}'.format(which_cache))
-    if clean_data:
-        json_data = \
-            json.JSONDecoder(object_pairs_hook=collections.OrderedDict).decode(data)
-    else:
-        json_data = json.loads(data)
-    return json_data
+def get_catalog_snapshot():
+    """Get decoded catalog data that are currently in use. Caller may keep
+    the reference for as long as it needs since the snapshot is never changed,
+    it is only replaced by a new one on the next cache load. During a request
+    the snapshot that was in use when the request started is returned.
+            :return CatalogSnapshot
+    """
+    if has_request_context() and g.get('catalog_snapshot') is not None:
+        return g.catalog_snapshot
+    return catalog_snapshot
 
 
-def catalog_data(which_cache):
-    chunks = int(uwsgi.cache_get('chunks-data', 'cache_chunks{}'.format(which_cache)))
-    if chunks == 0:
-        return None
-    data = ''
-    for i in range(0, chunks, 1):
-        if sys.version_info >= (3, 4):
-            data += uwsgi.cache_get('data{}'.format(i), 'main_cache{}'.format(which_cache))\
-                .decode(encoding='utf-8', errors='strict')
-        else:
-            data += uwsgi.cache_get('data{}'.format(i), 'main_cache{}'.format(which_cache))
-    json_data = \
-        json.JSONDecoder(object_pairs_hook=collections.OrderedDict) \
-            .decode(data)
-    return json_data
+def load(on_change):
+    """Load to cache from confd all the data populated to yang-catalog. If
+    the data do not need to be reloaded and other process of this server
+    already saved the snapshot file, the snapshot is only read from the file.
+    Only one process loads at a time, the others pick the new snapshot file
+    up afterwards.
+            Arguments:
+                :param on_change: (bool) whether data in confd have changed
+    """
+    with lock_for_load, snapshot_lock(application.snapshot_file):
+        snapshot = None
+        if not on_change and snapshot_file_current():
+            try:
+                snapshot = read_snapshot(application.snapshot_file)
+                application.LOGGER.info('Catalog snapshot read from {}'.format(application.snapshot_file))
+            except (IOError, OSError, ValueError) as e:
+                application.LOGGER.warning('Could not read catalog snapshot file {}'.format(e))
+        if snapshot is None:
+            data = make_cache(application.credentials)
+            if data is None:
+                application.LOGGER.error('Could not load or create cache')
+                sys.exit(500)
+            snapshot = CatalogSnapshot(next_generation(), data, application.compress_cache == 'True')
+            snapshot = publish(snapshot)
+        use_snapshot(snapshot)
+
+
+def snapshot_file_current():
+    """Check whether the snapshot file was saved since this process started.
+    All the changes of confd data are loaded by running processes, so such
+    file has current data. When the server starts, the first process loads
+    from confd and the others that wait for it use its file. File saved
+    before the start may miss changes made while the server was down.
+            :return whether the snapshot file can be used instead of loading
+    """
+    try:
+        return os.stat(application.snapshot_file).st_mtime >= process_started
+    except OSError:
+        return False
 
 
-def get_active_cache():
-    active_cache = uwsgi.cache_get('active_cache', 'cache_chunks1')
-    if active_cache is None:
-        return None
-    else:
-        active_cache = int(active_cache)
-        if active_cache == 1:
-            return lock_uwsgi_cache1, '1'
-        else:
-            return lock_uwsgi_cache2, '2'
+def load_delta(modules, vendors):
+    """Load to cache from confd only modules and vendors that have changed.
+    They are patched into the catalog snapshot that is in use. If there is
+    no snapshot yet, there are more changes than delta-load-limit or confd
+    does not answer as expected the whole catalog is loaded instead.
+            Arguments:
+                :param modules: (list) name, revision and organization of
+                    modules that were added, changed or deleted
+                :param vendors: (list) names of vendors that were added,
+                    changed or deleted
+    """
+    if len(modules) + len(vendors) > application.delta_load_limit:
+        application.LOGGER.info('{} modules and {} vendors changed, loading whole catalog'
+                                .format(len(modules), len(vendors)))
+        load(True)
+        return
+    # confd is asked before taking the locks so other loads do not wait for it
+    changes = fetch_changes(modules, vendors) if catalog_snapshot is not None else None
+    if changes is not None:
+        with lock_for_load, snapshot_lock(application.snapshot_file):
+            # changes must be patched into the newest snapshot of all the processes
+            attach_latest()
+            snapshot = publish(catalog_snapshot.patch(next_generation(), *changes))
+            use_snapshot(snapshot)
+        application.LOGGER.info('{} modules and {} vendors changed'.format(len(modules), len(vendors)))
+        return
+    application.LOGGER.warning('Could not load changes only, loading whole catalog')
+    load(True)
 
 
-def load(on_change):
-    """Load to cache from confd all the data populated to yang-catalog."""
-    with lock_for_load:
-        with lock_uwsgi_cache1:
-            application.LOGGER.info('Loading cache 1')
-            modules_text, modules, vendors_text, data =\
-                load_uwsgi_cache('cache_chunks1', 'main_cache1', 'cache_modules1', on_change)
-            # reset active cache back to 1 since we are done with populating cache 1
-            uwsgi.cache_update('active_cache', '1', 0, 'cache_chunks1')
-        application.LOGGER.info('Loading cache 2')
-        with lock_uwsgi_cache2:
-            load_uwsgi_cache('cache_chunks2', 'main_cache2', 'cache_modules2', on_change,
-                             modules_text, modules, vendors_text, data)
-        application.LOGGER.info('Both caches are loaded')
-        application.loading = False
-
-
-def load_uwsgi_cache(cache_chunks, main_cache, cache_modules, on_change,
-                     modules_text=None, modules=None, vendors_text=None, data=None):
-    response = 'work'
-    initialized = uwsgi.cache_get('initialized', cache_chunks)
-    if sys.version_info >= (3, 4) and initialized is not None:
-        initialized = initialized.decode(encoding='utf-8', errors='strict')
-    application.LOGGER.debug('initialized {} on change {}'.format(initialized, on_change))
-    if initialized is None or initialized == 'False' or on_change:
-        uwsgi.cache_clear(cache_chunks)
-        uwsgi.cache_clear(main_cache)
-        uwsgi.cache_clear(cache_modules)
-        if cache_chunks == 'cache_chunks1':
-            # set active cache to 2 until we work on cache 1
-            uwsgi.cache_set('active_cache', '2', 0, 'cache_chunks1')
-        uwsgi.cache_set('initialized', 'False', 0, cache_chunks)
-        response, data = make_cache(application.credentials, response, cache_chunks, main_cache,
-                                    is_uwsgi=application.is_uwsgi, data=data)
-        vendors = {}
-        if modules is None or vendors_text is None:
-            cat = json.JSONDecoder(object_pairs_hook=collections.OrderedDict) \
-                    .decode(data)['yang-catalog:catalog']
-            modules = cat['modules']
-            if cat.get('vendors'):
-                vendors = cat['vendors']
-            else:
-                vendors = {}
-        if len(modules) != 0:
-            for i, mod in enumerate(modules['module']):
-                key = mod['name'] + '@' + mod['revision'] + '/' + mod[
-                    'organization']
-                value = json.dumps(mod)
-                chunks = int(math.ceil(len(value) / float(20000)))
-                uwsgi.cache_set(key, repr(chunks), 0, cache_chunks)
-                for j in range(0, chunks, 1):
-                    uwsgi.cache_set(key + '-{}'.format(j),
-                                    value[j * 20000: (j + 1) * 20000], 0,
-                                    cache_modules)
-
-        if modules_text is None:
-            modules_text = json.dumps(modules)
-        chunks = int(math.ceil(len(modules_text) / float(64000)))
-        for i in range(0, chunks, 1):
-            uwsgi.cache_set('modules-data{}'.format(i),
-                            modules_text[i * 64000: (i + 1) * 64000],
-                            0, main_cache)
-        application.LOGGER.info(
-            'all {} modules chunks are set in uwsgi cache'.format(chunks))
-        uwsgi.cache_set('chunks-modules', repr(chunks), 0, cache_chunks)
-
-        if vendors_text is None:
-            vendors_text = json.dumps(vendors)
-        chunks = int(math.ceil(len(vendors_text) / float(64000)))
-        for i in range(0, chunks, 1):
-            uwsgi.cache_set('vendors-data{}'.format(i),
-                            vendors_text[i * 64000: (i + 1) * 64000],
-                            0, main_cache)
-        application.LOGGER.info(
-            'all {} vendors chunks are set in uwsgi cache'.format(chunks))
-        uwsgi.cache_set('chunks-vendor', repr(chunks), 0, cache_chunks)
-    if response != 'work':
-        application.LOGGER.error('Could not load or create cache')
-        sys.exit(500)
-    uwsgi.cache_update('initialized', 'True', 0, cache_chunks)
-    return modules_text, modules, vendors_text, data
-
-
-def process(data, passed_data, value, module, split, count):
-    """Iterates recursively through the data to find only modules
-    that are searched for
+def next_generation():
+    """Get generation of the next snapshot. It is higher than generation of
+    the snapshot in use and of the snapshot saved in the snapshot file.
+            :return generation
+    """
+    generation = read_generation(application.snapshot_file)
+    snapshot = catalog_snapshot
+    if snapshot is not None:
+        generation = max(generation, snapshot.generation)
+    return generation + 1
+
+
+def publish(snapshot):
+    """Save snapshot to the snapshot file so other processes can use it and
+    read it back, so also this process uses serialized data from the file
+    instead of its own copy.
             Arguments:
-                :param data: (dict) module that is searched
-                :param passed_data: (list) data that contain value searched
-                    for are saved in this variable
-                :param value: (str) value searched for
-                :param module: (dict) module that is searched
-                :param split: (str) key value that conatins value searched for
-                :param count: (int) if split contains '/' then we need to know
-                    which part of the path are we searching.
+                :param snapshot: (CatalogSnapshot) snapshot to save
+                :return snapshot read from the file
     """
-    if isinstance(data, str):
-        if data == value:
-            passed_data.append(module)
-            return True
-    elif isinstance(data, list):
-        for part in data:
-            if process(part, passed_data, value, module, split, count):
-                break
-    elif isinstance(data, dict):
-        if data:
-            count += 1
-            return process(data.get(split[count]), passed_data, value, module, split, count)
-    return False
+    try:
+        write_snapshot(snapshot, application.snapshot_file)
+        return read_snapshot(application.snapshot_file)
+    except (IOError, OSError) as e:
+        application.LOGGER.error('Could not save catalog snapshot file {}'.format(e))
+        return snapshot
+
+
+def use_snapshot(snapshot):
+    """Replace snapshot in use with the given one
+            Arguments:
+                :param snapshot: (CatalogSnapshot) new snapshot
+    """
+    global catalog_snapshot, checked_file_id
+    # single assignment is enough for readers to see either old or new snapshot.
+    # Old snapshot is freed once the last request that uses it finishes
+    catalog_snapshot = snapshot
+    if snapshot.file_id is not None:
+        checked_file_id = snapshot.file_id
+    application.LOGGER.info('Catalog snapshot generation {} is in use'.format(snapshot.generation))
+
+
+def follow_snapshot_file():
+    """Check at most once in snapshot-check-interval seconds whether other
+    process has published a new snapshot file. If so, it is read in the
+    background and requests use the current snapshot until it is ready.
+    """
+    global next_snapshot_check
+    now = time.time()
+    if now < next_snapshot_check:
+        return
+    next_snapshot_check = now + application.snapshot_check_interval
+    current = read_file_id(application.snapshot_file)
+    if current is None or current == checked_file_id or lock_for_load.locked():
+        return
+    Thread(target=attach_snapshot_file, name='attach-snapshot', daemon=True).start()
+
+
+def attach_snapshot_file():
+    """Read newer snapshot file unless this process is loading right now"""
+    if not lock_for_load.acquire(False):
+        return
+    try:
+        attach_latest()
+    finally:
+        lock_for_load.release()
+
+
+def attach_latest():
+    """Start using snapshot from the snapshot file if it is newer than the
+    snapshot in use. Must be called with lock_for_load held.
+    """
+    global checked_file_id
+    current = read_file_id(application.snapshot_file)
+    if current is None or current == checked_file_id:
+        return
+    try:
+        snapshot = read_snapshot(application.snapshot_file)
+    except (IOError, OSError, ValueError) as e:
+        application.LOGGER.warning('Could not read catalog snapshot file {}'.format(e))
+        return
+    checked_file_id = snapshot.file_id
+    if catalog_snapshot is None or snapshot.generation > catalog_snapshot.generation:
+        use_snapshot(snapshot)
+
+
+def fetch_changes(modules, vendors):
+    """Get current state of the given modules and vendors from confd. They
+    are requested in parallel over keep-alive connections.
+            Arguments:
+                :param modules: (list) name, revision and organization of modules
+                :param vendors: (list) names of vendors
+                :return tuple of changed modules, signatures of deleted modules,
+                    changed vendors and names of deleted vendors or None if
+                    some of them could not be fetched
+    """
+    prefix = '{}://{}:{}/api/config/catalog'.format(application.protocol, application.confd_ip,
+                                                    application.confdPort)
+    session = requests.Session()
+    session.auth = (application.credentials[0], application.credentials[1])
+    session.headers['Accept'] = 'application/vnd.yang.data+json'
+    paths = ['{}/modules/module/{},{},{}?deep'.format(prefix, module['name'], module['revision'],
+                                                      module['organization']) for module in modules]
+    paths.extend(['{}/vendors/vendor/{}?deep'.format(prefix, vendor) for vendor in vendors])
+    try:
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            responses = list(executor.map(session.get, paths))
+    except requests.RequestException as e:
+        application.LOGGER.error('Could not get data from confd {}'.format(e))
+        return None
+    finally:
+        session.close()
+    for path, response in zip(paths, responses):
+        if response.status_code not in (200, 404):
+            application.LOGGER.error('Could not get data from confd {} {}'.format(path, response.status_code))
+            return None
+
+    decoder = json.JSONDecoder(object_pairs_hook=collections.OrderedDict)
+    changed_modules = []
+    deleted_modules = []
+    for module, response in zip(modules, responses):
+        if response.status_code == 404:
+            deleted_modules.append(module_signature(module['name'], module['revision'], module['organization']))
+        else:
+            changed_modules.append(decoder.decode(response.text)['yang-catalog:module'])
+    changed_vendors = []
+    deleted_vendors = []
+    for vendor, response in zip(vendors, responses[len(modules):]):
+        if response.status_code == 404:
+            deleted_vendors.append(vendor)
+        else:
+            changed_vendors.append(decoder.decode(response.text)['yang-catalog:vendor'])
+    return changed_modules, deleted_modules, changed_vendors, deleted_vendors
 
 
 @auth.hash_password
@@ -2696,18 +2406,10 @@ def get_password(username):
                 :return hashed password
     """
     try:
-        db = MySQLdb.connect(host=application.dbHost, db=application.dbName, user=application.dbUser, passwd=application.dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-
-        # execute SQL query using execute() method.
-        results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
-        db.close()
-        if results_num == 0:
+        data = application.credential_cache.get_user(username)
+        if data is None:
             return None
-        else:
-            data = cursor.fetchone()
-            return data[2]
+        return data[2]
 
     except MySQLdb.MySQLError as err:
         application.LOGGER.error('Cannot connect to database. MySQL error: {}'.format(err))
@@ -18,11 +18,6 @@ __copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Tru
 __license__ = "Apache License, Version 2.0"
 __email__ = "miroslav.kovac@pantheon.tech"
 
-import sys
-if sys.version_info >= (3, 4):
-    import urllib.parse as urlib
-else:
-    import urllib as urlib
 
 class Module(object):
     __object_dict = {
@@ -103,9 +98,25 @@ class Module(object):
         if self.__initialized:
             return
 
-        result = self.__rester.get('/search/modules/{},{},{}'.format(urlib.quote(
-            self.__dict['name']), urlib.quote(self.__dict['revision']), urlib.quote(self.__dict['organization'])))
-        for key, value in result['module'][0].items():
+        # fetch all the modules that are waiting for their data in one request
+        pending = [mod for mod in Module.__seen_modules.values()
+                   if mod is not None and not mod.__initialized and mod.__rester is self.__rester]
+        if self not in pending:
+            pending.append(self)
+        result = self.__rester.post('/search/modules', {'input': {'module': [
+            {'name': mod.__dict['name'], 'revision': mod.__dict['revision'],
+             'organization': mod.__dict['organization']} for mod in pending]}})
+        fetched = {}
+        for module in result['yang-catalog:modules']['module']:
+            fetched['{}@{}/{}'.format(module['name'], module['revision'], module['organization'])] = module
+        if self.get_mod_sig() not in fetched:
+            raise Exception('Failed to fetch module {}: not found'.format(self.get_mod_sig()))
+        for mod in pending:
+            if mod.get_mod_sig() in fetched:
+                mod.__set_fetched(fetched[mod.get_mod_sig()])
+
+    def __set_fetched(self, module):
+        for key, value in module.items():
             if key in Module.__object_dict:
                 self.__dict[key] = value
             else:
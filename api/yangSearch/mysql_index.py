@@ -24,6 +24,8 @@ import re
 import MySQLdb
 import MySQLdb.cursors
 
+from utility.mysqlPool import get_pool
+
 
 def __mysql_regexp(pattern, buf, modifiers=re.I | re.S):
     if pattern is not None and buf is not None:
@@ -34,12 +36,10 @@ def __mysql_regexp(pattern, buf, modifiers=re.I | re.S):
 
 
 def create_connection(dbHost, dbPass, dbName, dbUser):
-    conn = MySQLdb.connect(host=dbHost,  # your host, usually localhost
-                           user=dbUser,  # your username
-                           passwd=dbPass,  # your password
-                           db=dbName)  # name of the data base
-    cursor = conn.cursor(cursorclass=MySQLdb.cursors.DictCursor)
-    return conn, cursor
+    """Borrow connection from the pool shared by this process
+            :return context manager that gives MySQLdb connection
+    """
+    return get_pool(dbHost, dbName, dbUser, dbPass).connection()
 
 
 __schema_types = [
@@ -73,8 +73,12 @@ __node_data = {
 
 def do_search(options, dbHost, dbName, dbPass,  dbUser):
     opts = json.loads(options)
-    conn, cur = create_connection(dbHost, dbPass, dbName, dbUser)
+    with create_connection(dbHost, dbPass, dbName, dbUser) as conn:
+        cur = conn.cursor(MySQLdb.cursors.DictCursor)
+        return __search(opts, cur)
+
 
+def __search(opts, cur):
     try:
         case_sensitivity = ''
         if 'case-sensitive' in opts and opts['case-sensitive']:
@@ -127,10 +131,8 @@ def do_search(options, dbHost, dbName, dbPass,  dbUser):
                     result['node'][nf] = row[__node_data[nf]]
 
             results.append(result)
-        conn.close()
         return results
     except MySQLdb.Error as e:
-        conn.close()
         raise Exception("Error searching for {}: {}".format(
             opts['search'], e.args[0]))
 
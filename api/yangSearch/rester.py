@@ -49,6 +49,13 @@ class Rester(object):
                 msg, resp.text), resp.status_code)
 
     def get(self, path, want_json=True):
+        return self.__request('get', path, want_json, "get {} from {}".format(path, self.__base))
+
+    def post(self, path, body, want_json=True):
+        return self.__request('post', path, want_json, "post {} to {}".format(path, self.__base),
+                              json=body, headers={'Content-Type': 'application/json'})
+
+    def __request(self, method, path, want_json, msg, headers=None, **kwargs):
         url = self.__base
 
         url += path
@@ -57,14 +64,13 @@ class Rester(object):
         if self.__username is not None and self.__password is not None:
             auth = (self.__username, self.__password)
 
-        headers = {}
+        headers = dict(headers or {})
         if want_json:
             headers['Accept'] = 'application/json'
 
-        resp = requests.get(url, auth=auth, headers=headers,
-                            timeout=self.__timeout)
-        Rester.__assert_response(
-            resp, "get {} from {}".format(path, self.__base))
+        resp = requests.request(method, url, auth=auth, headers=headers,
+                                timeout=self.__timeout, **kwargs)
+        Rester.__assert_response(resp, msg)
 
         if want_json:
             return resp.json()
@@ -37,7 +37,7 @@ from pyang.plugins.check_update import check_update
 from pyang.plugins.tree import emit_tree
 
 from utility import log
-from utility.util import find_first_file
+from utility.util import find_first_file, get_json_cached
 from utility.yangParser import create_context
 
 
@@ -67,9 +67,12 @@ class ModulesComplicatedAlgorithms:
 
     def parse_requests(self):
         LOGGER.info('get all modules for semver and dependents algorithm')
-        response = requests.get(self.__yangcatalog_api_prefix + 'search/modules',
-                                headers={'Accept': 'application/json'})
-        modules = response.json().get('module')
+        status, data = get_json_cached(self.__yangcatalog_api_prefix + 'search/modules',
+                                       '{}/complicated-algorithms-modules.json'.format(self.temp_dir))
+        if status != 200:
+            LOGGER.error('Could not get modules from API, response code: {}'.format(status))
+            return
+        modules = data.get('module')
         LOGGER.info("parsing semantic version")
         self.__parse_semver(modules)
         LOGGER.info("parsing dependents")
@@ -109,10 +112,19 @@ class ModulesComplicatedAlgorithms:
                 LOGGER.error('Request with body on path {} failed with {}'.
                              format(json_modules_data, url,
                                     response.text))
+        # only modules changed here need to be reloaded to the cache
+        changed = []
+        seen = set()
+        for module in self.__new_modules:
+            key = (module['name'], module['revision'], module['organization'])
+            if key not in seen:
+                seen.add(key)
+                changed.append({'name': key[0], 'revision': key[1], 'organization': key[2]})
         url = (self.__yangcatalog_api_prefix + 'load-cache')
-        response = requests.post(url, None,
+        response = requests.post(url, json.dumps({'input': {'modules': changed, 'vendors': []}}),
                                  auth=(self.__credentials[0],
-                                       self.__credentials[1]))
+                                       self.__credentials[1]),
+                                 headers={'Content-type': 'application/json'})
         if response.status_code != 201:
             LOGGER.warning('Could not send a load-cache request')
 
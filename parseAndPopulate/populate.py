@@ -45,6 +45,9 @@ import requests
 import utility.log as log
 from api.receiver import prepare_to_indexing, send_to_indexing
 from parseAndPopulate.modulesComplicatedAlgorithms import ModulesComplicatedAlgorithms
+from utility.pyangPool import PyangPool
+from utility.treeCache import TreeCache
+from utility.util import touch_invalidation_file
 
 if sys.version_info >= (3, 4):
     import configparser as ConfigParser
@@ -97,6 +100,9 @@ if __name__ == "__main__":
     yang_models = config.get('Directory-Section', 'yang_models_dir')
     temp_dir = config.get('Directory-Section', 'temp')
     save_file_dir = config.get('Directory-Section', 'save-file-dir')
+    tree_cache_dir = config.get('Directory-Section', 'tree-cache', fallback=temp_dir + '/trees')
+    pyang_workers = int(config.get('API-Section', 'pyang-workers', fallback='2'))
+    tree_warm_limit = int(config.get('API-Section', 'tree-warm-limit', fallback='1000'))
     result_dir = config.get('Web-Section', 'result-html-dir')
     parser = argparse.ArgumentParser(description="Parse hello messages and YANG files to JSON dictionary. These"
                                                  " dictionaries are used for populating a yangcatalog. This script runs"
@@ -297,6 +303,8 @@ if __name__ == "__main__":
     if body_to_send != '':
         LOGGER.info('Sending files for indexing')
         send_to_indexing(body_to_send, args.credentials, set_key=key, apiIp=args.api_ip)
+    # pyang workers of the API scan their search path again with the next job
+    touch_invalidation_file('{}/modules-changed'.format(temp_dir))
     if not args.api:
         thread = None
         if not args.force_indexing:
@@ -327,3 +335,13 @@ if __name__ == "__main__":
         except OSError:
             # Be happy if deleted
             pass
+
+    LOGGER.info('Creating trees of new modules')
+    pyang_pool = PyangPool('{}:{}'.format(yang_models, args.save_file_dir), processes=pyang_workers)
+    tree_cache = TreeCache('{}:{}'.format(yang_models, args.save_file_dir), tree_cache_dir, pool=pyang_pool)
+    try:
+        rendered = tree_cache.warm(['{}/{}@{}.yang'.format(args.save_file_dir, module['name'], module['revision'])
+                                    for module in modules_json], tree_warm_limit)
+        LOGGER.info('Created {} trees'.format(rendered))
+    finally:
+        pyang_pool.terminate()
@@ -54,17 +54,32 @@ class Prepare:
 
             self.name_revision_organization.add(key)
             self.yang_modules[key] = yang
-            if self.yang_modules[key].compilation_status is None:
-                try:
-                    self.yang_modules[key].compilation_status = requests.get('{}search/modules/{},{},{}'.format(
-                                                                             self.yangcatalog_api_prefix,
-                                                                             yang.name, yang.revision,
-                                                                             yang.organization)).json()["module"][0].get('compilation-status')
-                except:
-                    self.yang_modules[key].compilation_status = 'unknown'
+
+    def __resolve_compilation_status(self):
+        """Get compilation status of all the modules that do not have it
+        from yangcatalog using one batch request"""
+        keys = [key for key, yang in self.yang_modules.items() if yang.compilation_status is None]
+        if len(keys) == 0:
+            return
+        compilation_status = {}
+        try:
+            body = {'input': {'module': [{'name': self.yang_modules[key].name,
+                                          'revision': self.yang_modules[key].revision,
+                                          'organization': self.yang_modules[key].organization}
+                                         for key in keys]}}
+            response = requests.post('{}search/modules'.format(self.yangcatalog_api_prefix), json=body,
+                                     headers={'Accept': 'application/json'})
+            for module in response.json()['yang-catalog:modules']['module']:
+                compilation_status['{}@{}/{}'.format(module['name'], module['revision'],
+                                                     module['organization'])] = module.get('compilation-status')
+        except:
+            LOGGER.warning('Could not get compilation status of parsed modules')
+        for key in keys:
+            self.yang_modules[key].compilation_status = compilation_status.get(key, 'unknown')
 
     def dump_modules(self, directory):
         LOGGER.debug('Creating prepare.json file from sdo information')
+        self.__resolve_compilation_status()
 
         with open(directory + '/' + self.file_name +
                           '.json', "w") as prepare_model:
@@ -47,6 +47,7 @@ import requests
 
 import utility.log as log
 from utility import repoutil, yangParser
+from utility.util import get_json_cached
 
 if sys.version_info >= (3, 4):
     import configparser as ConfigParser
@@ -326,6 +327,7 @@ if __name__ == '__main__':
     is_uwsgi = config.get('General-Section', 'uwsgi')
     yang_models = config.get('Directory-Section', 'yang_models_dir')
     log_directory = config.get('Directory-Section', 'logs')
+    temp_dir = config.get('Directory-Section', 'temp')
     LOGGER = log.get_logger('statistics', log_directory + '/statistics/yang.log')
     separator = ':'
     suffix = api_port
@@ -431,21 +433,23 @@ if __name__ == '__main__':
         # Fetch the list of all modules known by YangCatalog
         path = yangcatalog_api_prefix + 'search/modules'
         # TODO handle properly the case when the request to YangCatalog failed...
+        # modules are downloaded again only if they changed since the last run
+        cache_file = '{}/statistics-modules.json'.format(temp_dir)
         try:
-            response = requests.get(path, auth=(auth[0], auth[1]), headers={'Accept': 'application/json'})
-            if response.status_code != 200:
-                print("Cannot access " + path + ', response code: ' + str(response.status_code))
-                LOGGER.error("Cannot access " + path + ', response code: ' + str(response.status_code))
+            status, all_modules_data = get_json_cached(path, cache_file, auth=(auth[0], auth[1]))
+            if status != 200:
+                print("Cannot access " + path + ', response code: ' + str(status))
+                LOGGER.error("Cannot access " + path + ', response code: ' + str(status))
                 sys.exit(1)
-            else:
-                all_modules_data = response.json()
         except requests.exceptions.RequestException:
-            print("Cannot access " + path + ', response code: ' + str(response.status_code))
-            LOGGER.error("Cannot access " + path + ', response code: ' + str(response.status_code))
+            print("Cannot access " + path)
+            LOGGER.error("Cannot access " + path)
             # Let's try again, who knows?
             time.sleep(120)
-            response = requests.get(path, auth=(auth[0], auth[1]), headers={'Accept': 'application/json'})
-            all_modules_data = response.json()
+            status, all_modules_data = get_json_cached(path, cache_file, auth=(auth[0], auth[1]))
+            if status != 200:
+                LOGGER.error("Cannot access " + path + ', response code: ' + str(status))
+                sys.exit(1)
             LOGGER.error("After a while, OK to access " + path)
         all_modules_data_unique = {}
         for mod in all_modules_data['module']:
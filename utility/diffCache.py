@@ -0,0 +1,126 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Diff of two texts rendered locally into html. Rendered diffs and other
+results of comparing two files are kept in memory under the hashes of
+both files and the kind of comparison so the same pair is compared only
+once. Trees and results of pyang checks depend also on the imported
+modules, so the whole cache is dropped when populate touches the
+modules-changed file.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import collections
+import difflib
+import hashlib
+from html import escape
+from threading import Lock
+
+from utility.pyangPool import file_mtime
+
+SIDE_BY_SIDE = 'side-by-side'
+UNIFIED = 'unified'
+MODES = [SIDE_BY_SIDE, UNIFIED]
+
+
+def render_diff(text1, text2, name1, name2, mode=SIDE_BY_SIDE):
+    """Render diff of two texts as html page
+            Arguments:
+                :param text1: (str) old text
+                :param text2: (str) new text
+                :param name1: (str) description of the old text
+                :param name2: (str) description of the new text
+                :param mode: (str) side-by-side or unified
+                :return html page with the diff
+    """
+    lines1 = text1.splitlines()
+    lines2 = text2.splitlines()
+    if mode == UNIFIED:
+        diff = difflib.unified_diff(lines1, lines2, name1, name2, lineterm='')
+        return '<html><body><pre>{}</pre></body></html>'.format(escape('\n'.join(diff)))
+    return difflib.HtmlDiff(wrapcolumn=80).make_file(lines1, lines2, name1, name2)
+
+
+class DiffCache(object):
+
+    def __init__(self, max_items=200, changed_file=None):
+        """Create cache of rendered diffs
+                Arguments:
+                    :param max_items: (int) number of diffs kept in memory
+                    :param changed_file: (str) path to the file that is touched
+                        when modules in the search path change
+        """
+        self.max_items = max_items
+        self.changed_file = changed_file
+        self.__changed_mtime = file_mtime(changed_file)
+        self.__diffs = collections.OrderedDict()
+        self.__lock = Lock()
+
+    @staticmethod
+    def key(content1, content2, mode):
+        """Create key of the diff from the content of the compared files
+                Arguments:
+                    :param content1: (bytes) content of the old file
+                    :param content2: (bytes) content of the new file
+                    :param mode: (str) mode of the diff
+                    :return key of the diff
+        """
+        return hashlib.sha1(content1).hexdigest(), hashlib.sha1(content2).hexdigest(), mode
+
+    def get(self, key, render):
+        """Get diff from memory or render it if it is not cached yet
+                Arguments:
+                    :param key: (tuple) key created by key()
+                    :param render: (function) function without arguments that
+                        returns the rendered diff
+                    :return rendered diff
+        """
+        diff = self.lookup(key)
+        if diff is None:
+            diff = render()
+            self.put(key, diff)
+        return diff
+
+    def lookup(self, key):
+        """Get cached result of the comparison
+                Arguments:
+                    :param key: (tuple) key created by key()
+                    :return cached result or None if it is not cached
+        """
+        mtime = file_mtime(self.changed_file)
+        with self.__lock:
+            if mtime != self.__changed_mtime:
+                self.__changed_mtime = mtime
+                self.__diffs.clear()
+            if key in self.__diffs:
+                self.__diffs.move_to_end(key)
+                return self.__diffs[key]
+        return None
+
+    def put(self, key, diff):
+        """Cache result of the comparison
+                Arguments:
+                    :param key: (tuple) key created by key()
+                    :param diff: result of the comparison
+        """
+        with self.__lock:
+            self.__diffs[key] = diff
+            if len(self.__diffs) > self.max_items:
+                self.__diffs.popitem(last=False)
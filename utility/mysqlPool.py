@@ -0,0 +1,185 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of MySQL connections that are reused by the threads of one process
+instead of connecting to the database for every query, and short lived
+cache of the users table used for authorization. Cache of the users is
+dropped whenever the invalidation file is touched, so another process
+like validate.py can tell the API that users have changed.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+import MySQLdb
+
+# pools of this process by the database they connect to
+pools = {}
+pools_lock = Lock()
+
+
+def get_pool(host, db, user, passwd, max_idle=5):
+    """Get pool of connections to the database shared by this process
+            Arguments:
+                :param host: (str) host of the database
+                :param db: (str) name of the database
+                :param user: (str) database user
+                :param passwd: (str) password of the database user
+                :param max_idle: (int) number of connections kept open
+                :return MySQLPool
+    """
+    key = (host, db, user, passwd)
+    with pools_lock:
+        if key not in pools:
+            pools[key] = MySQLPool(host, db, user, passwd, max_idle)
+        return pools[key]
+
+
+class MySQLPool(object):
+
+    def __init__(self, host, db, user, passwd, max_idle=5):
+        """Create pool of connections. Connections are opened when they
+        are needed and at most max_idle of them are kept open afterwards.
+                Arguments:
+                    :param host: (str) host of the database
+                    :param db: (str) name of the database
+                    :param user: (str) database user
+                    :param passwd: (str) password of the database user
+                    :param max_idle: (int) number of connections kept open
+        """
+        self.host = host
+        self.db = db
+        self.user = user
+        self.passwd = passwd
+        self.max_idle = max_idle
+        self.__idle = []
+        self.__lock = Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrow connection from the pool. Connection is returned to the
+        pool when the with block ends and it is closed if the block raised
+        an exception. Uncommitted changes are rolled back.
+                :return MySQLdb connection
+        """
+        db = self.__take()
+        try:
+            yield db
+        except BaseException:
+            self.__close(db)
+            raise
+        try:
+            # end the transaction so the next user does not read old snapshot
+            db.rollback()
+        except MySQLdb.MySQLError:
+            self.__close(db)
+            return
+        with self.__lock:
+            if len(self.__idle) < self.max_idle:
+                self.__idle.append(db)
+                return
+        self.__close(db)
+
+    def __take(self):
+        while True:
+            with self.__lock:
+                if len(self.__idle) == 0:
+                    break
+                db = self.__idle.pop()
+            try:
+                db.ping()
+                return db
+            except MySQLdb.MySQLError:
+                # server closed idle connection
+                self.__close(db)
+        return MySQLdb.connect(host=self.host, db=self.db, user=self.user, passwd=self.passwd)
+
+    @staticmethod
+    def __close(db):
+        try:
+            db.close()
+        except MySQLdb.MySQLError:
+            pass
+
+
+class CredentialCache(object):
+
+    def __init__(self, pool, ttl=60, invalidation_file=None):
+        """Create cache of the rows of the users table
+                Arguments:
+                    :param pool: (MySQLPool) pool used to read the users
+                    :param ttl: (int) seconds for which the user is cached
+                    :param invalidation_file: (str) path to the file that is
+                        touched when users change
+        """
+        self.pool = pool
+        self.ttl = ttl
+        self.invalidation_file = invalidation_file
+        self.__users = {}
+        self.__mtime = self.__invalidation_mtime()
+        self.__lock = Lock()
+
+    def get_user(self, username):
+        """Get row of the user from the users table
+                Arguments:
+                    :param username: (str) username of the user
+                    :return tuple with the row or None if the user does not exist
+        """
+        mtime = self.__invalidation_mtime()
+        now = time.time()
+        with self.__lock:
+            if mtime != self.__mtime:
+                self.__users = {}
+                self.__mtime = mtime
+            cached = self.__users.get(username)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        with self.pool.connection() as db:
+            cursor = db.cursor()
+            results_num = cursor.execute("""SELECT * FROM `users` where Username=%s""", (username, ))
+            row = cursor.fetchone() if results_num == 1 else None
+        # unknown users are not cached so a new user can log in right away
+        if row is not None:
+            with self.__lock:
+                self.__users[username] = (now + self.ttl, row)
+        return row
+
+    def invalidate(self, username=None):
+        """Remove user or all the users from the cache of this process
+                Arguments:
+                    :param username: (str) username to remove. All the users
+                        are removed if not given
+        """
+        with self.__lock:
+            if username is None:
+                self.__users = {}
+            else:
+                self.__users.pop(username, None)
+
+    def __invalidation_mtime(self):
+        if self.invalidation_file is None:
+            return None
+        try:
+            return os.stat(self.invalidation_file).st_mtime
+        except OSError:
+            return None
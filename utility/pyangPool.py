@@ -0,0 +1,367 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pool of long-lived worker processes that run CPU heavy pyang jobs of the
+/services endpoints outside of the request threads. Every worker scans
+the yang search path when it starts and creates a new pyang context over
+that repository for every job. The path is scanned again only after the
+modules-changed file is touched by populate. Number of jobs waiting for
+a worker is limited and every job has to finish in given time, otherwise
+the worker that runs it is killed and the pool starts a new one.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import io
+import itertools
+import multiprocessing
+import optparse
+import os
+import signal
+import time
+from functools import partial
+from threading import Lock
+
+from prometheus_client import Counter, Gauge, Histogram
+from pyang import FileRepository
+from pyang.error import err_level, err_to_str, is_warning
+from pyang.plugins.check_update import CheckUpdatePlugin, check_update
+from pyang.plugins.tree import emit_tree
+
+from utility.yangParser import create_repository_context
+
+pyang_jobs = Counter('pyang_pool_jobs', 'Number of pyang jobs by result', ['job', 'result'])
+pyang_pending_jobs = Gauge('pyang_pool_pending_jobs', 'Number of pyang jobs waiting or running')
+pyang_job_seconds = Histogram('pyang_pool_job_seconds', 'Time to get result of pyang job', ['job'])
+
+# repository of the worker process and modification time of the modules-changed
+# file when it was scanned
+worker_repository = None
+worker_search_path = None
+worker_changed_file = None
+worker_changed_mtime = None
+# queue the worker tells the pool through which job it runs
+worker_started = None
+
+
+def initialize_worker(search_path, changed_file=None, started=None):
+    """Scan the repository of the worker process
+            Arguments:
+                :param search_path: (str) paths separated by colon where pyang
+                    looks for imported modules
+                :param changed_file: (str) path to the file that is touched
+                    when modules in the search path change
+                :param started: (multiprocessing.SimpleQueue) queue to send
+                    job token and pid of the worker to when job starts
+    """
+    global worker_repository, worker_search_path, worker_changed_file, worker_changed_mtime, worker_started
+    worker_search_path = search_path
+    worker_changed_file = changed_file
+    worker_changed_mtime = file_mtime(changed_file)
+    worker_started = started
+    worker_repository = FileRepository(search_path)
+    # error codes of check_update are registered only with options of the plugin
+    CheckUpdatePlugin().add_opts(optparse.OptionParser())
+
+
+def file_mtime(path):
+    """Get modification time of the file
+            Arguments:
+                :param path: (str) path to the file or None
+                :return modification time or None if there is no such file
+    """
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def worker_context():
+    """Create new pyang context over the repository of the worker process.
+    Repository is scanned again if modules have changed since the last scan.
+            :return pyang.Context
+    """
+    global worker_repository, worker_changed_mtime
+    mtime = file_mtime(worker_changed_file)
+    if mtime != worker_changed_mtime:
+        worker_changed_mtime = mtime
+        worker_repository = FileRepository(worker_search_path)
+    return create_repository_context(worker_repository)
+
+
+def run_job(token, job, args):
+    """Run the job in the worker after telling the pool which worker runs it
+            Arguments:
+                :param token: (int) token of the job
+                :param job: (function) module level function to run
+                :param args: arguments of the job
+                :return result of the job
+    """
+    if worker_started is not None:
+        worker_started.put((token, os.getpid()))
+    return job(*args)
+
+
+def render_tree(ctx, path_to_yang, text):
+    """Render pyang tree of the module into memory
+            Arguments:
+                :param ctx: (pyang.Context) context to parse the module in
+                :param path_to_yang: (str) path to the yang file
+                :param text: (str) content of the yang file
+                :return tree as text, empty if the module could not be parsed
+    """
+    a = ctx.add_module(path_to_yang, text)
+    if ctx.opts.tree_path is not None:
+        path = ctx.opts.tree_path.split('/')
+        if path[0] == '':
+            path = path[1:]
+    else:
+        path = None
+    out = io.StringIO()
+    if a is not None:
+        emit_tree(ctx, [a], out, ctx.opts.tree_depth,
+                  ctx.opts.tree_line_length, path)
+    return out.getvalue()
+
+
+def tree_result(ctx, path_to_yang, tree):
+    """Describe the rendered tree and what it was resolved from
+            Arguments:
+                :param ctx: (pyang.Context) context the module was parsed in
+                :param path_to_yang: (str) path to the yang file
+                :param tree: (str) rendered tree
+                :return tuple of the tree as text, whether pyang reported any
+                    errors and paths of the other modules the tree was resolved
+                    from. Paths are None if pyang reported any error level
+                    message because the tree may change without any of these
+                    files changing, e.g. when a missing import is added
+    """
+    if any(not is_warning(err_level(tag)) for pos, tag, args in ctx.errors):
+        dependencies = None
+    else:
+        dependencies = sorted(set(module.pos.ref for module in ctx.modules.values()
+                                  if module.pos.ref != path_to_yang))
+    return tree, len(ctx.errors) != 0, dependencies
+
+
+def tree_job(path_to_yang, text):
+    """Render tree of the module in the worker
+            Arguments:
+                :param path_to_yang: (str) path to the yang file
+                :param text: (str) content of the yang file
+                :return tuple as returned by tree_result()
+    """
+    ctx = worker_context()
+    tree = render_tree(ctx, path_to_yang, text)
+    return tree_result(ctx, path_to_yang, tree)
+
+
+def diff_tree_job(schema1, schema2):
+    """Render trees of two modules in the worker so they can be compared.
+    Both modules are parsed in the same context with lax checks.
+            Arguments:
+                :param schema1: (str) path to the first yang file
+                :param schema2: (str) path to the second yang file
+                :return tuple of both trees as text
+    """
+    ctx = worker_context()
+    ctx.lax_quote_checks = True
+    ctx.lax_xpath_checks = True
+    with open(schema1, 'r') as f:
+        tree1 = render_tree(ctx, schema1, f.read())
+    ctx.errors = []
+    with open(schema2, 'r') as f:
+        tree2 = render_tree(ctx, schema2, f.read())
+    return tree1, tree2
+
+
+def check_update_from(ctx, schema1, schema2):
+    """Check whether new revision of the module is backwards compatible
+    with the old one like pyang --check-update-from does
+            Arguments:
+                :param ctx: (pyang.Context) context to parse the new module in
+                :param schema1: (str) path to the new yang file
+                :param schema2: (str) path to the old yang file
+                :return errors and warnings as printed by pyang
+    """
+    with open(schema1, 'r', errors='ignore') as f:
+        new_module = ctx.add_module(schema1, f.read())
+    ctx.validate()
+    if new_module is not None:
+        # pyang exits when the old module can not be read, worker must not
+        try:
+            with io.open(schema2, 'r', encoding='utf-8') as f:
+                f.read()
+        except IOError as e:
+            return 'error {}: {}'.format(schema2, e)
+        ctx.opts.check_update_from = schema2
+        ctx.opts.old_path = []
+        ctx.opts.old_deviation = []
+        ctx.opts.verbose = False
+        try:
+            check_update(ctx, schema2, new_module)
+        except SystemExit:
+            return 'error {}: could not be checked'.format(schema2)
+    messages = []
+    # same order as pyang prints them, errors of the new module go first
+    errors = sorted(ctx.errors, key=lambda e: (str(e[0].ref), e[0].line))
+    for epos, etag, eargs in sorted(errors, key=lambda e: e[0].ref != schema1):
+        kind = 'warning' if is_warning(err_level(etag)) else 'error'
+        messages.append('{}: {}: {}'.format(epos, kind, err_to_str(etag, eargs)))
+    return '\n'.join(messages)
+
+
+def check_update_from_batch_job(pairs):
+    """Run check of backwards compatibility for several pairs of modules in
+    one worker job. Every pair is checked in its own context
+            Arguments:
+                :param pairs: (list) tuples of paths to the new and old yang file
+                :return list of outputs in the same order as pairs
+    """
+    return [check_update_from(worker_context(), schema1, schema2) for schema1, schema2 in pairs]
+
+
+class PyangPoolException(Exception):
+
+    def __init__(self, msg, rcode):
+        super(PyangPoolException, self).__init__(msg)
+        self._rcode = rcode
+
+    def get_response_code(self):
+        return self._rcode
+
+
+class PyangPool(object):
+
+    def __init__(self, search_path, processes=2, max_queue=20, timeout=120, changed_file=None):
+        """Create pool of pyang workers. Worker processes are started with
+        the first job so they are created in the process that uses them.
+                Arguments:
+                    :param search_path: (str) paths separated by colon where pyang
+                        looks for imported modules
+                    :param processes: (int) number of worker processes
+                    :param max_queue: (int) maximal number of jobs that are waiting
+                        or running at the same time
+                    :param timeout: (int) seconds to wait for result of the job
+                    :param changed_file: (str) path to the file that is touched
+                        when modules in the search path change
+        """
+        self.search_path = search_path
+        self.processes = processes
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.changed_file = changed_file
+        self.__pool = None
+        self.__started = None
+        # tokens of the jobs that are waiting or running and pids of the
+        # workers that run them
+        self.__pending = set()
+        self.__workers = {}
+        self.__tokens = itertools.count()
+        self.__lock = Lock()
+
+    def run(self, job, *args):
+        """Run job in one of the workers and wait for its result
+                Arguments:
+                    :param job: (function) module level function to run
+                    :param args: arguments of the job
+                    :return result of the job
+        """
+        name = job.__name__
+        with self.__lock:
+            if len(self.__pending) >= self.max_queue:
+                pyang_jobs.labels(name, 'rejected').inc()
+                raise PyangPoolException('Server is busy. Too many pyang jobs are waiting, please try again later',
+                                         503)
+            if self.__pool is None:
+                self.__started = multiprocessing.SimpleQueue()
+                self.__pool = multiprocessing.Pool(self.processes, initialize_worker,
+                                                   (self.search_path, self.changed_file, self.__started))
+            token = next(self.__tokens)
+            self.__pending.add(token)
+            pyang_pending_jobs.set(len(self.__pending))
+        start = time.time()
+        try:
+            result = self.__pool.apply_async(run_job, (token, job, args), callback=partial(self.__finished, token),
+                                             error_callback=partial(self.__finished, token))
+        except Exception:
+            self.__finished(token, None)
+            raise
+        try:
+            value = result.get(self.timeout)
+        except multiprocessing.TimeoutError:
+            pyang_jobs.labels(name, 'timeout').inc()
+            self.__kill(token)
+            raise PyangPoolException('pyang job did not finish in {} seconds'.format(self.timeout), 504)
+        except Exception:
+            pyang_jobs.labels(name, 'failed').inc()
+            raise
+        finally:
+            pyang_job_seconds.labels(name).observe(time.time() - start)
+        pyang_jobs.labels(name, 'finished').inc()
+        return value
+
+    def __finished(self, token, result):
+        # job left the pool, either it finished or it failed
+        with self.__lock:
+            self.__drain_started()
+            self.__pending.discard(token)
+            self.__workers.pop(token, None)
+            pyang_pending_jobs.set(len(self.__pending))
+
+    def __kill(self, token):
+        """Kill the worker that runs the job that timed out. Pool replaces
+        the killed worker with a new one. Job that did not start yet can not
+        be stopped, it only stops counting as pending.
+                Arguments:
+                    :param token: (int) token of the job
+        """
+        with self.__lock:
+            self.__drain_started()
+            pid = self.__workers.pop(token, None)
+            running = token in self.__pending
+            self.__pending.discard(token)
+            pyang_pending_jobs.set(len(self.__pending))
+        if pid is not None and running:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                # job has just finished and worker exited
+                pass
+
+    def __drain_started(self):
+        # must be called with the lock held. Workers block when the pipe of the
+        # queue is full, so it is emptied whenever any job leaves the pool
+        while not self.__started.empty():
+            started, pid = self.__started.get()
+            if started in self.__pending:
+                self.__workers[started] = pid
+
+    def terminate(self):
+        """Stop all the worker processes, new ones are started with the next job"""
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.terminate()
+                self.__pool.join()
+            self.__pool = None
+            self.__pending.clear()
+            self.__workers.clear()
+            pyang_pending_jobs.set(0)
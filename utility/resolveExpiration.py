@@ -34,6 +34,7 @@ import dateutil.parser
 import requests
 
 import utility.log as log
+from utility.util import get_json_cached
 
 if sys.version_info >= (3, 4):
     import configparser as ConfigParser
@@ -115,10 +116,15 @@ if __name__ == '__main__':
     LOGGER = log.get_logger('resolveExpiration', log_directory + '/jobs/resolveExpiration.log')
     updated = False
 
-    modules = requests.get('{}://{}/api/search/modules'.format(args.api_protocol,
-                                                               args.api_ip),
-                           auth=(args.credentials[0], args.credentials[1]))
-    modules = modules.json()['module']
+    temp_dir = config.get('Directory-Section', 'temp')
+    status, modules = get_json_cached('{}://{}/api/search/modules'.format(args.api_protocol,
+                                                                          args.api_ip),
+                                      '{}/resolve-expiration-modules.json'.format(temp_dir),
+                                      auth=(args.credentials[0], args.credentials[1]))
+    if status != 200:
+        LOGGER.error('Could not get modules from API, response code: {}'.format(status))
+        sys.exit(1)
+    modules = modules['module']
     for mod in modules:
         ref = mod.get('reference')
         ret = __resolve_expiration(ref, mod, args)
@@ -0,0 +1,98 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utility.diffCache import SIDE_BY_SIDE, UNIFIED, DiffCache, render_diff
+from utility.util import touch_invalidation_file
+
+OLD_TEXT = 'module example {\n  leaf hostname { type string; }\n}\n'
+NEW_TEXT = 'module example {\n  leaf hostname { type int8; }\n  leaf <contact> { type string; }\n}\n'
+
+
+class TestRenderDiff(unittest.TestCase):
+
+    def test_unified(self):
+        diff = render_diff(OLD_TEXT, NEW_TEXT, 'example@2019-01-01', 'example@2019-02-01', UNIFIED)
+        self.assertEqual(diff, '<html><body><pre>--- example@2019-01-01\n+++ example@2019-02-01\n@@ -1,3 +1,4 @@\n'
+                               ' module example {\n-  leaf hostname { type string; }\n'
+                               '+  leaf hostname { type int8; }\n+  leaf &lt;contact&gt; { type string; }\n'
+                               ' }</pre></body></html>')
+
+    def test_side_by_side(self):
+        diff = render_diff(OLD_TEXT, NEW_TEXT, 'example@2019-01-01', 'example@2019-02-01', SIDE_BY_SIDE)
+        self.assertIn('<table class="diff"', diff)
+        self.assertIn('example@2019-02-01', diff)
+        self.assertIn('&lt;contact&gt;', diff)
+        self.assertNotIn('<contact>', diff)
+
+    def test_same_texts(self):
+        diff = render_diff(OLD_TEXT, OLD_TEXT, 'a', 'b', UNIFIED)
+        self.assertEqual(diff, '<html><body><pre></pre></body></html>')
+
+
+class TestDiffCache(unittest.TestCase):
+
+    def test_rendered_once(self):
+        cache = DiffCache()
+        rendered = []
+
+        def render():
+            rendered.append(1)
+            return 'diff {}'.format(len(rendered))
+
+        key = DiffCache.key(b'old', b'new', UNIFIED)
+        self.assertEqual(cache.get(key, render), 'diff 1')
+        self.assertEqual(cache.get(key, render), 'diff 1')
+        self.assertEqual(DiffCache.key(b'old', b'new', UNIFIED), key)
+        # other mode or changed content is another diff
+        self.assertEqual(cache.get(DiffCache.key(b'old', b'new', SIDE_BY_SIDE), render), 'diff 2')
+        self.assertEqual(cache.get(DiffCache.key(b'old', b'newer', UNIFIED), render), 'diff 3')
+
+    def test_least_recently_used_dropped(self):
+        cache = DiffCache(max_items=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.lookup('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.lookup('b'))
+        self.assertEqual(cache.lookup('a'), 1)
+        self.assertEqual(cache.lookup('c'), 3)
+
+    def test_modules_changed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        changed_file = os.path.join(directory, 'modules-changed')
+        cache = DiffCache(changed_file=changed_file)
+        key = DiffCache.key(b'old', b'new', 'check-update-from')
+        cache.put(key, 'old output')
+        self.assertEqual(cache.lookup(key), 'old output')
+        # imported modules may have changed so the same files give other result
+        touch_invalidation_file(changed_file)
+        self.assertIsNone(cache.lookup(key))
+        cache.put(key, 'new output')
+        self.assertEqual(cache.lookup(key), 'new output')
+        later = time.time() + 10
+        os.utime(changed_file, (later, later))
+        self.assertIsNone(cache.lookup(key))
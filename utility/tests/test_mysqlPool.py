@@ -0,0 +1,148 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+import MySQLdb
+
+from utility.mysqlPool import CredentialCache, MySQLPool, get_pool
+from utility.util import touch_invalidation_file
+
+
+class TestMySQLPool(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(MySQLdb, 'connect', side_effect=lambda **kwargs: mock.MagicMock())
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = MySQLPool('localhost', 'users', 'yang', 'secret', max_idle=1)
+
+    def test_connection_reused(self):
+        with self.pool.connection() as db:
+            first = db
+        with self.pool.connection() as db:
+            self.assertIs(db, first)
+        self.assertEqual(self.connect.call_count, 1)
+        self.connect.assert_called_with(host='localhost', db='users', user='yang', passwd='secret')
+        # transaction is ended before the connection goes back to the pool
+        self.assertEqual(first.rollback.call_count, 2)
+
+    def test_failed_connection_closed(self):
+        with self.assertRaises(ValueError):
+            with self.pool.connection() as db:
+                failed = db
+                raise ValueError()
+        failed.close.assert_called_once_with()
+        with self.pool.connection() as db:
+            self.assertIsNot(db, failed)
+
+    def test_dead_connection_replaced(self):
+        with self.pool.connection() as db:
+            dead = db
+        dead.ping.side_effect = MySQLdb.MySQLError()
+        with self.pool.connection() as db:
+            self.assertIsNot(db, dead)
+        dead.close.assert_called_once_with()
+
+    def test_max_idle(self):
+        with self.pool.connection() as first:
+            with self.pool.connection() as second:
+                pass
+        # only the connection returned first is kept open
+        second.close.assert_not_called()
+        first.close.assert_called_once_with()
+        with self.pool.connection() as db:
+            self.assertIs(db, second)
+
+    def test_shared_pool(self):
+        pool = get_pool('localhost', 'users', 'yang', 'secret')
+        self.assertIs(get_pool('localhost', 'users', 'yang', 'secret'), pool)
+        self.assertIsNot(get_pool('localhost', 'search', 'yang', 'secret'), pool)
+
+
+class UsersPool(object):
+    """Pool with users table in memory that counts the queries"""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = 0
+
+    @contextmanager
+    def connection(self):
+        db = mock.MagicMock()
+        cursor = db.cursor.return_value
+
+        def execute(query, args):
+            self.queries += 1
+            cursor.fetchone.return_value = self.users.get(args[0])
+            return 1 if args[0] in self.users else 0
+
+        cursor.execute.side_effect = execute
+        yield db
+
+
+class TestCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.invalidation_file = os.path.join(self.directory, 'users-changed')
+        self.pool = UsersPool({'admin': (1, 'admin', 'hash')})
+        self.cache = CredentialCache(self.pool, 60, self.invalidation_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_user_cached(self):
+        self.assertEqual(self.cache.get_user('admin'), (1, 'admin', 'hash'))
+        self.assertEqual(self.cache.get_user('admin'), (1, 'admin', 'hash'))
+        self.assertEqual(self.pool.queries, 1)
+
+    def test_unknown_user_not_cached(self):
+        self.assertIsNone(self.cache.get_user('new'))
+        self.pool.users['new'] = (2, 'new', 'hash')
+        self.assertEqual(self.cache.get_user('new'), (2, 'new', 'hash'))
+
+    def test_expired(self):
+        cache = CredentialCache(self.pool, 0, self.invalidation_file)
+        cache.get_user('admin')
+        cache.get_user('admin')
+        self.assertEqual(self.pool.queries, 2)
+
+    def test_users_changed(self):
+        self.cache.get_user('admin')
+        self.pool.users['admin'] = (1, 'admin', 'new hash')
+        self.assertEqual(self.cache.get_user('admin'), (1, 'admin', 'hash'))
+        touch_invalidation_file(self.invalidation_file)
+        # modification time must differ even on coarse file systems
+        later = time.time() + 10
+        os.utime(self.invalidation_file, (later, later))
+        self.assertEqual(self.cache.get_user('admin'), (1, 'admin', 'new hash'))
+
+    def test_invalidate(self):
+        self.cache.get_user('admin')
+        self.pool.users['admin'] = (1, 'admin', 'new hash')
+        self.cache.invalidate('admin')
+        self.assertEqual(self.cache.get_user('admin'), (1, 'admin', 'new hash'))
@@ -0,0 +1,152 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+from utility.pyangPool import (PyangPool, PyangPoolException, check_update_from_batch_job, initialize_worker,
+                               tree_job)
+
+OLD_MODULE = """module example {
+  namespace "urn:example";
+  prefix ex;
+  revision 2019-01-01;
+  container system {
+    leaf hostname { type string; }
+    leaf contact { type string; }
+  }
+}
+"""
+
+NEW_MODULE = """module example {
+  namespace "urn:example:new";
+  prefix ex;
+  revision 2019-02-01;
+  revision 2019-01-01;
+  container system {
+    leaf hostname { type int8; }
+  }
+}
+"""
+
+IMPORTING_MODULE = """module importing {
+  namespace "urn:importing";
+  prefix im;
+  import example { prefix ex; }
+  leaf address { type string; }
+  augment "/ex:system" {
+    leaf location { type string; }
+  }
+}
+"""
+
+
+class TestCheckUpdateFrom(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old = os.path.join(self.directory, 'example@2019-01-01.yang')
+        self.new = os.path.join(self.directory, 'example@2019-02-01.yang')
+        with open(self.old, 'w') as f:
+            f.write(OLD_MODULE)
+        with open(self.new, 'w') as f:
+            f.write(NEW_MODULE)
+        initialize_worker(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def pyang_output(self, old):
+        pyang = subprocess.Popen(['pyang', '-p', self.directory, self.new, '--check-update-from', old],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = pyang.communicate()
+        return stderr.decode('utf-8').strip()
+
+    def test_same_output_as_pyang(self):
+        output = check_update_from_batch_job([(self.new, self.old)])[0]
+        self.assertIn('namespace MUST NOT be changed', output)
+        self.assertIn("the leaf 'contact'", output)
+        self.assertEqual(output, self.pyang_output(self.old))
+
+    def test_missing_old_module(self):
+        missing = os.path.join(self.directory, 'example@2018-01-01.yang')
+        outputs = check_update_from_batch_job([(self.new, missing), (self.new, self.old)])
+        self.assertEqual(outputs[0], self.pyang_output(missing))
+        # worker keeps checking the other pairs
+        self.assertEqual(outputs[1], self.pyang_output(self.old))
+
+
+class TestRepositoryRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.changed_file = os.path.join(self.directory, 'modules-changed')
+        self.importing = os.path.join(self.directory, 'importing.yang')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rescan_after_modules_changed(self):
+        initialize_worker(self.directory, self.changed_file)
+        tree, errors, dependencies = tree_job(self.importing, IMPORTING_MODULE)
+        self.assertTrue(errors)
+        # tree with unresolved import must not be saved
+        self.assertIsNone(dependencies)
+        with open(os.path.join(self.directory, 'example@2019-01-01.yang'), 'w') as f:
+            f.write(OLD_MODULE)
+        # repository is not scanned until populate tells that modules changed
+        self.assertTrue(tree_job(self.importing, IMPORTING_MODULE)[1])
+        with open(self.changed_file, 'w'):
+            pass
+        tree, errors, dependencies = tree_job(self.importing, IMPORTING_MODULE)
+        self.assertFalse(errors)
+        self.assertEqual(dependencies, [os.path.join(self.directory, 'example@2019-01-01.yang')])
+        self.assertIn('+--rw address?', tree)
+
+
+class TestPyangPool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.pool = PyangPool(self.directory, processes=1, max_queue=2, timeout=1)
+
+    def tearDown(self):
+        self.pool.terminate()
+        shutil.rmtree(self.directory)
+
+    def test_timed_out_worker_replaced(self):
+        with self.assertRaises(PyangPoolException) as context:
+            self.pool.run(time.sleep, 30)
+        self.assertEqual(context.exception.get_response_code(), 504)
+        # killed worker does not block the only slot of the pool
+        tree, errors, dependencies = self.pool.run(tree_job, os.path.join(self.directory, 'example.yang'),
+                                                   OLD_MODULE)
+        self.assertFalse(errors)
+        self.assertIn('+--rw system', tree)
+
+    def test_many_jobs(self):
+        # workers report every job they start, this must never fill up the pipe
+        self.pool.timeout = 5
+        pids = set(self.pool.run(os.getpid) for i in range(6000))
+        self.assertEqual(len(pids), 1)
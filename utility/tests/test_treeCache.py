@@ -0,0 +1,103 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utility.tests.test_pyangPool import IMPORTING_MODULE, OLD_MODULE
+from utility.treeCache import TreeCache
+
+CHANGED_MODULE = """module example {
+  namespace "urn:example";
+  prefix ex;
+  revision 2019-01-01;
+  container config {
+    leaf hostname { type string; }
+  }
+}
+"""
+
+
+class TestTreeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.modules = os.path.join(self.directory, 'modules')
+        self.cache_dir = os.path.join(self.directory, 'trees')
+        self.changed_file = os.path.join(self.directory, 'modules-changed')
+        os.makedirs(self.modules)
+        self.example = self.write('example@2019-01-01.yang', OLD_MODULE)
+        self.importing = self.write('importing@2019-01-01.yang', IMPORTING_MODULE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.modules, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def create_cache(self):
+        return TreeCache(self.modules, self.cache_dir, changed_file=self.changed_file)
+
+    def saved_trees(self):
+        return os.listdir(self.cache_dir)
+
+    def touch_changed_file(self):
+        with open(self.changed_file, 'a'):
+            pass
+        # make sure the modification time differs even on coarse file systems
+        later = time.time() + 10
+        os.utime(self.changed_file, (later, later))
+
+    def test_saved_tree_reused(self):
+        tree, errors = self.create_cache().get_tree(self.importing)
+        self.assertFalse(errors)
+        self.assertIn('+--rw address?', tree)
+        self.assertEqual(len(self.saved_trees()), 1)
+        self.assertEqual(self.create_cache().get_tree(self.importing), (tree, errors))
+
+    def test_imported_module_changed(self):
+        self.assertFalse(self.create_cache().get_tree(self.importing)[1])
+        # augmented container is gone so the saved tree must not be used
+        self.write('example@2019-01-01.yang', CHANGED_MODULE)
+        self.assertTrue(self.create_cache().get_tree(self.importing)[1])
+
+    def test_error_tree_not_saved(self):
+        os.remove(self.example)
+        cache = self.create_cache()
+        self.assertTrue(cache.get_tree(self.importing)[1])
+        self.assertEqual(self.saved_trees(), [])
+        self.write('example@2019-01-01.yang', OLD_MODULE)
+        # tree with errors stays in memory until populate tells modules changed
+        self.assertTrue(cache.get_tree(self.importing)[1])
+        self.touch_changed_file()
+        self.assertFalse(cache.get_tree(self.importing)[1])
+        self.assertEqual(len(self.saved_trees()), 1)
+
+    def test_warm_limit(self):
+        cache = self.create_cache()
+        self.assertEqual(cache.warm([self.example, self.importing], limit=1), 1)
+        self.assertEqual(cache.warm([self.example, self.importing]), 1)
+        self.assertEqual(len(self.saved_trees()), 2)
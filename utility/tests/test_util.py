@@ -0,0 +1,98 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from utility.util import get_json_cached
+
+
+class ModulesHandler(BaseHTTPRequestHandler):
+    """Serves modules with ETag like yangcatalog API does"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('If-None-Match'))
+        if server.status != 200:
+            self.send_response(server.status)
+            self.end_headers()
+            return
+        etag = '"{}"'.format(server.version)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps({'module': [{'name': 'example', 'revision': server.version}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestGetJsonCached(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.directory, 'modules.json')
+        self.server = HTTPServer(('127.0.0.1', 0), ModulesHandler)
+        self.server.requests = []
+        self.server.status = 200
+        self.server.version = '2019-01-01'
+        self.url = 'http://127.0.0.1:{}/api/search/modules'.format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.directory)
+
+    def test_not_modified(self):
+        status, data = get_json_cached(self.url, self.cache_file)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['module'][0]['revision'], '2019-01-01')
+        # second request is answered with 304 and data are read from the file
+        self.assertEqual(get_json_cached(self.url, self.cache_file), (200, data))
+        self.assertEqual(self.server.requests, [None, '"2019-01-01"'])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['modules.json', 'modules.json.etag'])
+
+    def test_changed(self):
+        get_json_cached(self.url, self.cache_file)
+        self.server.version = '2019-02-01'
+        status, data = get_json_cached(self.url, self.cache_file)
+        self.assertEqual(data['module'][0]['revision'], '2019-02-01')
+        with open(self.cache_file + '.etag') as f:
+            self.assertEqual(f.read(), '"2019-02-01"')
+
+    def test_failed(self):
+        get_json_cached(self.url, self.cache_file)
+        self.server.status = 500
+        self.assertEqual(get_json_cached(self.url, self.cache_file), (500, None))
@@ -0,0 +1,207 @@
+# Copyright The IETF Trust 2019, All Rights Reserved
+# Copyright 2018 Cisco and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of pyang trees of the yang modules. Tree is rendered into memory
+and saved in memory and on disk under the hash of the content of the
+module and of the tree options, so a changed file is never served with
+an old tree. Saved tree remembers hashes of the imported modules it was
+resolved from and it is rendered again when any of them changes. Trees
+with pyang errors are kept only in memory until populate touches the
+modules-changed file. Disk cache is shared by all the processes that use
+the same directory and it is filled for new modules by populate script.
+"""
+
+__author__ = "Miroslav Kovac"
+__copyright__ = "Copyright 2018 Cisco and its affiliates, Copyright The IETF Trust 2019, All Rights Reserved"
+__license__ = "Apache License, Version 2.0"
+__email__ = "miroslav.kovac@pantheon.tech"
+
+import collections
+import errno
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from pyang import FileRepository
+
+from utility.pyangPool import file_mtime, render_tree, tree_job, tree_result
+from utility.yangParser import DEFAULT_OPTIONS, create_repository_context, objectify
+
+
+class TreeCache(object):
+
+    def __init__(self, search_path, cache_dir, max_items=1000, pool=None, changed_file=None):
+        """Create cache of trees
+                Arguments:
+                    :param search_path: (str) paths separated by colon where pyang
+                        looks for imported modules
+                    :param cache_dir: (str) directory where trees are saved
+                    :param max_items: (int) number of trees kept in memory
+                    :param pool: (PyangPool) pool of pyang workers that render
+                        the trees. If not given trees are rendered by the caller
+                    :param changed_file: (str) path to the file that is touched
+                        when modules in the search path change
+        """
+        self.search_path = search_path
+        self.pool = pool
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.changed_file = changed_file
+        self.__changed_mtime = file_mtime(changed_file)
+        opts = objectify(DEFAULT_OPTIONS)
+        self.__options = 'depth={},line-length={},path={}'.format(opts.tree_depth, opts.tree_line_length,
+                                                                  opts.tree_path).encode('utf-8')
+        self.__repository = None
+        self.__trees = collections.OrderedDict()
+        self.__lock = Lock()
+        self.__rendering = {}
+        try:
+            os.makedirs(cache_dir)
+        except OSError as e:
+            # be happy if someone already created the path
+            if e.errno != errno.EEXIST:
+                raise
+
+    def get_tree(self, path_to_yang):
+        """Get tree of the module from memory, disk or render it if it is
+        not cached yet.
+                Arguments:
+                    :param path_to_yang: (str) path to the yang file
+                    :return tuple of the tree as text and whether pyang reported
+                        any errors
+        """
+        with open(path_to_yang, 'rb') as f:
+            content = f.read()
+        key = self.__key(content)
+        self.__check_changed()
+        with self.__lock:
+            if key in self.__trees:
+                self.__trees.move_to_end(key)
+                return self.__trees[key]
+            key_lock = self.__rendering.setdefault(key, Lock())
+        # only one thread renders the same tree, others wait for it
+        with key_lock:
+            with self.__lock:
+                if key in self.__trees:
+                    return self.__trees[key]
+            try:
+                tree = self.__load(key)
+                if tree is None:
+                    tree, errors, dependencies = self.__render(path_to_yang, content)
+                    tree = tree, errors
+                    if dependencies is not None:
+                        self.__save(key, tree, dependencies)
+                with self.__lock:
+                    self.__trees[key] = tree
+                    if len(self.__trees) > self.max_items:
+                        self.__trees.popitem(last=False)
+            finally:
+                with self.__lock:
+                    self.__rendering.pop(key, None)
+        return tree
+
+    def warm(self, paths, limit=None):
+        """Render trees of the modules to disk cache if they are not there yet.
+        Trees are rendered by all the workers of the pool at once if the cache
+        has a pool.
+                Arguments:
+                    :param paths: (list) paths to the yang files
+                    :param limit: (int) maximal number of trees to render, rest
+                        of them is rendered when requested for the first time
+                :return number of rendered trees
+        """
+        missing = []
+        for path_to_yang in paths:
+            if limit is not None and len(missing) >= limit:
+                break
+            if not os.path.isfile(path_to_yang):
+                continue
+            with open(path_to_yang, 'rb') as f:
+                content = f.read()
+            key = self.__key(content)
+            if self.__load(key) is None:
+                missing.append((key, path_to_yang, content))
+        workers = 1 if self.pool is None else self.pool.processes
+        with ThreadPoolExecutor(workers) as executor:
+            return sum(executor.map(self.__warm_one, missing))
+
+    def __warm_one(self, missing):
+        key, path_to_yang, content = missing
+        try:
+            tree, errors, dependencies = self.__render(path_to_yang, content)
+        except Exception:
+            # tree will be rendered when it is requested for the first time
+            return 0
+        if dependencies is None:
+            return 0
+        self.__save(key, (tree, errors), dependencies)
+        return 1
+
+    def __check_changed(self):
+        # trees with errors and resolved imports may change when modules change
+        mtime = file_mtime(self.changed_file)
+        if mtime != self.__changed_mtime:
+            with self.__lock:
+                self.__changed_mtime = mtime
+                self.__trees.clear()
+                self.__repository = None
+
+    def __key(self, content):
+        return hashlib.sha1(content + self.__options).hexdigest()
+
+    def __hash_file(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError):
+            return None
+
+    def __file(self, key):
+        return '{}/{}.json'.format(self.cache_dir, key)
+
+    def __render(self, path_to_yang, content):
+        if self.pool is not None:
+            return self.pool.run(tree_job, path_to_yang, content.decode('utf-8'))
+        if self.__repository is None:
+            # path is scanned only once for all the trees rendered by this process
+            self.__repository = FileRepository(self.search_path)
+        ctx = create_repository_context(self.__repository)
+        tree = render_tree(ctx, path_to_yang, content.decode('utf-8'))
+        return tree_result(ctx, path_to_yang, tree)
+
+    def __load(self, key):
+        try:
+            with open(self.__file(key), 'r') as f:
+                cached = json.load(f)
+            for path, file_hash in cached['dependencies'].items():
+                if self.__hash_file(path) != file_hash:
+                    # imported module changed, tree may be different now
+                    return None
+            return cached['tree'], cached['errors']
+        except (IOError, OSError, ValueError, KeyError, AttributeError):
+            return None
+
+    def __save(self, key, tree, dependencies):
+        hashes = dict((path, self.__hash_file(path)) for path in dependencies)
+        # write to temporary file first so nobody can read half written tree
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'tree': tree[0], 'errors': tree[1], 'dependencies': hashes}, f)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, self.__file(key))
@@ -19,8 +19,12 @@ __license__ = "Apache License, Version 2.0"
 __email__ = "miroslav.kovac@pantheon.tech"
 
 import fnmatch
+import json
 import os
 import stat
+import tempfile
+
+import requests
 
 from utility import yangParser
 
@@ -78,3 +82,67 @@ def change_permissions_recursive(path):
     else:
         os.chmod(path, stat.S_IRGRP | stat.S_IWGRP | stat.S_IXGRP | stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_IROTH)
 
+
+def touch_invalidation_file(path):
+    """Tell all the processes that watch modification time of the file that
+    data they cache have changed
+            Arguments:
+                :param path: (str) path to the invalidation file
+    """
+    with open(path, 'a'):
+        os.utime(path, None)
+
+
+def get_json_cached(url, cache_file, auth=None, headers=None):
+    """Download json data from yangcatalog API. Downloaded data are saved
+    together with their ETag so the next time we ask API only whether
+    the data changed and if not we read them from the file.
+
+            :param url: (str) url of the API endpoint
+            :param cache_file: (str) path to the file where data are saved
+            :param auth: (tuple) basic authorization credentials
+            :param headers: (dict) additional headers of the request
+            :return tuple of response status code and decoded json data.
+                Data are None if the request failed.
+    """
+    etag_file = cache_file + '.etag'
+    if headers is None:
+        headers = {}
+    headers = dict(headers)
+    headers['Accept'] = 'application/json'
+    if os.path.isfile(cache_file) and os.path.isfile(etag_file):
+        with open(etag_file, 'r') as f:
+            headers['If-None-Match'] = f.read().strip()
+    response = requests.get(url, auth=auth, headers=headers)
+    if response.status_code == 304:
+        with open(cache_file, 'r') as f:
+            return 200, json.load(f)
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    etag = response.headers.get('ETag')
+    if etag:
+        # body goes first so the ETag never describes data that are not saved
+        write_atomic(cache_file, response.text)
+        write_atomic(etag_file, etag)
+    elif os.path.isfile(etag_file):
+        os.remove(etag_file)
+    return response.status_code, data
+
+
+def write_atomic(path, text):
+    """Write the file so other processes see either its old or its whole
+    new content
+            Arguments:
+                :param path: (str) path to the file
+                :param text: (str) content of the file
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
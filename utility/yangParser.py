@@ -147,6 +147,26 @@ def create_context(path='.', *options, **kwargs):
 
     opts = objectify(DEFAULT_OPTIONS, *options, **kwargs)
     repo = FileRepository(path, no_path_recurse=opts.no_path_recurse)
+    return create_repository_context(repo, opts)
+
+
+def create_repository_context(repo, opts=None):
+    """Generates a pyang context over already created repository.
+
+    Creating ``FileRepository`` scans the whole path for YANG modules, so
+    processes that create many contexts over the same path should create
+    the repository only once and use it for all the contexts.
+
+    Arguments:
+        repo (pyang.FileRepository): repository of YANG modules.
+        opts (objectify): options of the context as created by
+            ``create_context``. Default options are used if not given.
+
+    Returns:
+        pyang.Context: Context object for ``pyang`` usage
+    """
+    if opts is None:
+        opts = objectify(DEFAULT_OPTIONS)
 
     ctx = Context(repo)
     ctx.opts = opts
@@ -42,7 +42,9 @@ from email.mime.text import MIMEText
 
 import MySQLdb
 
+from utility.mysqlPool import get_pool
 from utility.repoutil import pull
+from utility.util import touch_invalidation_file
 
 if sys.version_info >= (3, 4):
     import configparser as ConfigParser
@@ -125,13 +127,12 @@ def query_create(question):
 
 def connect():
     try:
-        db = MySQLdb.connect(host=dbHost, db=dbName, user=dbUser, passwd=dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        cursor.execute("SELECT * FROM users_temp")
-        data = cursor.fetchall()
-        db.close()
+        with get_pool(dbHost, dbName, dbUser, dbPass).connection() as db:
+            # prepare a cursor object using cursor() method
+            cursor = db.cursor()
+            # execute SQL query using execute() method.
+            cursor.execute("SELECT * FROM users_temp")
+            data = cursor.fetchall()
 
         return data
     except MySQLdb.MySQLError as err:
@@ -140,32 +141,32 @@ def connect():
 
 def delete():
     try:
-        db = MySQLdb.connect(host=dbHost, db=dbName, user=dbUser, passwd=dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-        cursor.execute("""DELETE FROM users_temp WHERE Id=%s LIMIT 1""", (row[0], ))
-        db.commit()
-        db.close()
+        with get_pool(dbHost, dbName, dbUser, dbPass).connection() as db:
+            # prepare a cursor object using cursor() method
+            cursor = db.cursor()
+            # execute SQL query using execute() method.
+            cursor.execute("""DELETE FROM users_temp WHERE Id=%s LIMIT 1""", (row[0], ))
+            db.commit()
     except MySQLdb.MySQLError as err:
         print("Cannot connect to database. MySQL error: " + str(err))
 
 
 def copy():
     try:
-        db = MySQLdb.connect(host=dbHost, db=dbName, user=dbUser, passwd=dbPass)
-        # prepare a cursor object using cursor() method
-        cursor = db.cursor()
-        # execute SQL query using execute() method.
-
-        cursor.execute("""UPDATE users_temp SET AccessRightsVendor=%s, AccessRightsSdo=%s WHERE Id=%s""",
-                       (vendor_path, sdo_path, row[0],))
-        cursor.execute("""INSERT INTO users(Username, Password, Email, ModelsProvider, FirstName, LastName,
-                          AccessRightsVendor, AccessRightsSdo) SELECT Username, Password, Email, ModelsProvider,
-                          FirstName, LastName, AccessRightsVendor, AccessRightsSdo FROM users_temp WHERE Id=%s""",
-                       (row[0],))
-        db.commit()
-        db.close()
+        with get_pool(dbHost, dbName, dbUser, dbPass).connection() as db:
+            # prepare a cursor object using cursor() method
+            cursor = db.cursor()
+            # execute SQL query using execute() method.
+
+            cursor.execute("""UPDATE users_temp SET AccessRightsVendor=%s, AccessRightsSdo=%s WHERE Id=%s""",
+                           (vendor_path, sdo_path, row[0],))
+            cursor.execute("""INSERT INTO users(Username, Password, Email, ModelsProvider, FirstName, LastName,
+                              AccessRightsVendor, AccessRightsSdo) SELECT Username, Password, Email, ModelsProvider,
+                              FirstName, LastName, AccessRightsVendor, AccessRightsSdo FROM users_temp WHERE Id=%s""",
+                           (row[0],))
+            db.commit()
+        # API caches users so tell it that they have changed
+        touch_invalidation_file('{}/users-changed'.format(temp_dir))
     except MySQLdb.MySQLError as err:
         print("Cannot connect to database. MySQL error: " + str(err))
 
@@ -194,6 +195,7 @@ if __name__ == "__main__":
     dbName = config.get('Validate-Section', 'dbName')
     dbUser = config.get('Validate-Section', 'dbUser')
     dbPass = config.get('Validate-Section', 'dbPassword')
+    temp_dir = config.get('Directory-Section', 'temp')
     dbData = connect()
     yang_models = config.get('Directory-Section', 'yang_models_dir')
     pull(yang_models)